@@ -1,9 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import CustomUser, Doctor, Patient
+from .principal import invalidate_principals
+from .security import LoginAttemptStore, OTPStore, SecurityStoreUnavailable
 
 
 @admin.register(CustomUser)
@@ -36,9 +38,7 @@ class CustomUserAdmin(UserAdmin):
         'created_at', 
         'updated_at', 
         'last_login',
-        'otp_created_at',
-        'login_locked_until',
-        'otp_locked_until'
+        'security_status'
     ]
     
     fieldsets = (
@@ -48,21 +48,8 @@ class CustomUserAdmin(UserAdmin):
         ('Role & Verification', {
             'fields': ('role', 'is_verified', 'is_profile_complete')
         }),
-        ('OTP & Security', {
-            'fields': (
-                'otp', 
-                'otp_type',
-                'otp_created_at', 
-                'otp_attempts',
-                'otp_locked_until'
-            ),
-            'classes': ('collapse',)
-        }),
-        ('Login Security', {
-            'fields': (
-                'login_attempts',
-                'login_locked_until'
-            ),
+        ('OTP & Login Security', {
+            'fields': ('security_status',),
             'classes': ('collapse',)
         }),
         ('Permissions', {
@@ -133,29 +120,50 @@ class CustomUserAdmin(UserAdmin):
             '<span style="color: orange; font-size: 16px;">⚠ Incomplete</span>'
         )
     is_profile_complete_badge.short_description = 'Profile'
-    
+
+    def security_status(self, obj):
+        """Live lock state from Redis"""
+        if not obj.pk:
+            return '-'
+        try:
+            login_minutes = LoginAttemptStore.locked_minutes(obj.pk)
+            otp_minutes = OTPStore.locked_minutes(obj.pk)
+        except SecurityStoreUnavailable:
+            return 'Unavailable'
+        parts = []
+        if login_minutes:
+            parts.append(f'Login locked ({login_minutes} min left)')
+        if otp_minutes:
+            parts.append(f'OTP locked ({otp_minutes} min left)')
+        return ', '.join(parts) or 'Not locked'
+    security_status.short_description = 'Lock status'
+
     actions = ['verify_users', 'mark_profile_complete', 'reset_otp_locks']
     
     def verify_users(self, request, queryset):
 
         updated = queryset.update(is_verified=True)
+        invalidate_principals(queryset.values_list('id', flat=True))
         self.message_user(request, f'{updated} user(s) verified successfully.')
     verify_users.short_description = "Verify selected users"
     
     def mark_profile_complete(self, request, queryset):
         """Mark profiles as complete"""
         updated = queryset.update(is_profile_complete=True)
+        invalidate_principals(queryset.values_list('id', flat=True))
         self.message_user(request, f'{updated} profile(s) marked as complete.')
     mark_profile_complete.short_description = "Mark profiles as complete"
     
     def reset_otp_locks(self, request, queryset):
         """Reset OTP locks for users"""
-        updated = queryset.update(
-            otp_attempts=0,
-            otp_locked_until=None,
-            login_attempts=0,
-            login_locked_until=None
-        )
+        user_ids = list(queryset.values_list('id', flat=True))
+        try:
+            OTPStore.unlock_many(user_ids)
+            LoginAttemptStore.unlock_many(user_ids)
+        except SecurityStoreUnavailable:
+            self.message_user(request, 'Lock state is unavailable right now. Try again later.', messages.ERROR)
+            return
+        updated = len(user_ids)
         self.message_user(request, f'{updated} user(s) unlocked successfully.')
     reset_otp_locks.short_description = "Reset OTP/Login locks"
 
@@ -278,12 +286,14 @@ class DoctorAdmin(admin.ModelAdmin):
     def approve_doctors(self, request, queryset):
         """Bulk approve doctors"""
         updated = queryset.update(is_approved=True)
+        invalidate_principals(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} doctor(s) approved successfully.')
     approve_doctors.short_description = "✓ Approve selected doctors"
     
     def disapprove_doctors(self, request, queryset):
         """Bulk disapprove doctors"""
         updated = queryset.update(is_approved=False)
+        invalidate_principals(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} doctor(s) disapproved.')
     disapprove_doctors.short_description = "✗ Disapprove selected doctors"
 
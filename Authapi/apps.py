@@ -5,3 +5,6 @@ from django.apps import AppConfig
 class AuthapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Authapi'
+
+    def ready(self):
+        import Authapi.signals
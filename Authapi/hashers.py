@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with cost parameters taken from settings.ARGON2_PARAMETERS; any
+    left unset keep Django's defaults, so nothing is rehashed until one is set.
+
+    Keeps the "argon2" algorithm name, so existing hashes verify as before and
+    must_update() flags any hash made with different parameters for rehash on
+    the user's next login.
+    """
+    time_cost = settings.ARGON2_PARAMETERS.get('time_cost', Argon2PasswordHasher.time_cost)
+    memory_cost = settings.ARGON2_PARAMETERS.get('memory_cost', Argon2PasswordHasher.memory_cost)
+    parallelism = settings.ARGON2_PARAMETERS.get('parallelism', Argon2PasswordHasher.parallelism)
@@ -0,0 +1,48 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+logger = logging.getLogger(__name__)
+
+# Password hashing is CPU and memory heavy by design. Running it in a small
+# fixed pool caps how many hashes are in flight at once, so a login burst
+# queues here instead of oversubscribing the CPU every other request needs.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix='password-hash',
+)
+
+
+def _run(func, *args):
+    return _executor.submit(func, *args).result()
+
+
+def hash_password(raw_password):
+    return _run(make_password, raw_password)
+
+
+def set_password(user, raw_password):
+    """Like user.set_password(), with the hashing done in the pool."""
+    user.password = hash_password(raw_password)
+    user._password = raw_password
+
+
+def verify_password(user, raw_password):
+    """
+    Like user.check_password(), with the hashing done in the pool. If the
+    stored hash uses an outdated hasher or parameters it is upgraded and
+    saved; the save stays on the calling thread, which owns the DB connection.
+    """
+    needs_rehash = []
+    is_valid = _run(check_password, raw_password, user.password, needs_rehash.append)
+
+    if is_valid and needs_rehash:
+        try:
+            set_password(user, raw_password)
+            user.save(update_fields=['password'])
+            logger.info(f"Rehashed password for user {user.id}")
+        except Exception as e:
+            logger.error(f"Password rehash failed for user {user.id}: {e}")
+    return is_valid
@@ -0,0 +1,91 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+from Authapi.hashers import TunedArgon2PasswordHasher
+
+SAMPLE_PASSWORD = 'Medtrax@2025'
+
+
+def argon2_variant(spec):
+    try:
+        time_cost, memory_cost, parallelism = (int(part) for part in spec.split(','))
+    except ValueError:
+        raise CommandError(f"Bad --argon2 value '{spec}', expected time_cost,memory_cost,parallelism")
+    return type('Argon2Candidate', (TunedArgon2PasswordHasher,), {
+        'time_cost': time_cost,
+        'memory_cost': memory_cost,
+        'parallelism': parallelism,
+    })()
+
+
+def describe(hasher):
+    if hasattr(hasher, 'memory_cost'):
+        return f"{hasher.algorithm} t={hasher.time_cost} m={hasher.memory_cost} p={hasher.parallelism}"
+    if hasattr(hasher, 'iterations'):
+        return f"{hasher.algorithm} iterations={hasher.iterations}"
+    if hasattr(hasher, 'rounds'):
+        return f"{hasher.algorithm} rounds={hasher.rounds}"
+    return hasher.algorithm
+
+
+class Command(BaseCommand):
+    help = 'Measure password verification latency and login throughput for each hasher on this machine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Sequential verifications used for the latency figure')
+        parser.add_argument('--duration', type=float, default=3.0,
+                            help='Seconds spent measuring concurrent throughput per hasher')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+                            help='Concurrent verifications (defaults to PASSWORD_HASH_WORKERS)')
+        parser.add_argument('--argon2', action='append', default=[], metavar='T,M,P',
+                            help='Extra Argon2 parameter set to try, e.g. --argon2 3,65536,4 (repeatable)')
+
+    def handle(self, *args, **options):
+        hashers = list(get_hashers()) + [argon2_variant(spec) for spec in options['argon2']]
+        workers = options['workers']
+
+        header = f"{'hasher':<44}{'hash ms':>10}{'verify ms':>11}{'logins/s':>11}"
+        self.stdout.write(f"{workers} worker(s), {options['duration']}s per hasher\n")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for hasher in hashers:
+            try:
+                start = time.perf_counter()
+                encoded = hasher.encode(SAMPLE_PASSWORD, hasher.salt())
+            except ValueError as e:
+                # Hasher library not installed
+                self.stdout.write(self.style.WARNING(f"{describe(hasher):<44}skipped: {e}"))
+                continue
+            hash_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(options['iterations']):
+                hasher.verify(SAMPLE_PASSWORD, encoded)
+            verify_ms = (time.perf_counter() - start) / options['iterations'] * 1000
+
+            deadline = time.perf_counter() + options['duration']
+
+            def worker():
+                count = 0
+                while time.perf_counter() < deadline:
+                    hasher.verify(SAMPLE_PASSWORD, encoded)
+                    count += 1
+                return count
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                total = sum(f.result() for f in [pool.submit(worker) for _ in range(workers)])
+            throughput = total / (time.perf_counter() - start)
+
+            self.stdout.write(f"{describe(hasher):<44}{hash_ms:>10.1f}{verify_ms:>11.1f}{throughput:>11.1f}")
+
+        self.stdout.write(self.style.SUCCESS(
+            "\nDone. Set ARGON2_TIME_COST / ARGON2_MEMORY_COST / ARGON2_PARALLELISM to roll out new "
+            "parameters; existing hashes are upgraded on each user's next login."
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2025-11-20 10:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authapi', '0003_doctor_unique_doctor_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customuser',
+            name='login_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='login_locked_until',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp_created_at',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp_locked_until',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp_type',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2025-11-26 09:40
+
+from django.db import migrations
+
+# Inlined so later changes to Authapi.search can't alter this migration.
+POSTGRES_SEARCH_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS authapi_doctor_name_trgm_idx ON "Authapi_doctor" '
+    "USING GIN ((lower(first_name || ' ' || last_name)) gin_trgm_ops)",
+    'CREATE INDEX IF NOT EXISTS authapi_doctor_specialization_trgm_idx ON "Authapi_doctor" '
+    "USING GIN ((lower(coalesce(specialization, ''))) gin_trgm_ops)",
+]
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRES_SEARCH_SQL:
+            schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS authapi_doctor_name_trgm_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS authapi_doctor_specialization_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authapi', '0004_remove_customuser_otp_and_lockout_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,7 +1,5 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.utils import timezone
-from datetime import timedelta
 
 
 class CustomUser(AbstractUser):
@@ -14,13 +12,6 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True, db_index=True)
     is_verified = models.BooleanField(default=False)
     is_profile_complete = models.BooleanField(default=False)
-    otp = models.CharField(max_length=6, null=True, blank=True)
-    otp_created_at = models.DateTimeField(null=True, blank=True)
-    otp_attempts = models.IntegerField(default=0)
-    otp_locked_until = models.DateTimeField(null=True, blank=True)
-    otp_type = models.CharField(max_length=15, null=True, blank=True, help_text="verification or reset")
-    login_attempts = models.IntegerField(default=0)
-    login_locked_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -39,49 +30,6 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.username if self.username else self.email} ({self.role if self.role else 'unassigned'})"
 
-    def is_otp_locked(self):
-        if self.otp_locked_until and timezone.now() < self.otp_locked_until:
-            return True
-        if self.otp_locked_until and timezone.now() >= self.otp_locked_until:
-            self.otp_locked_until = None
-            self.otp_attempts = 0
-            self.save(update_fields=['otp_locked_until', 'otp_attempts'])
-        return False
-
-    def is_login_locked(self):
-    
-        if self.login_locked_until and timezone.now() < self.login_locked_until:
-            return True
-        if self.login_locked_until and timezone.now() >= self.login_locked_until:
-            self.login_locked_until = None
-            self.login_attempts = 0
-            self.save(update_fields=['login_locked_until', 'login_attempts'])
-        return False
-
-    def is_otp_expired(self):
-       
-        if not self.otp_created_at:
-            return True
-        return timezone.now() - self.otp_created_at > timedelta(minutes=3)
-
-    def reset_otp_attempts(self):
-        self.otp_attempts = 0
-        self.otp_locked_until = None
-        self.save(update_fields=['otp_attempts', 'otp_locked_until'])
-
-    def reset_login_attempts(self):
-        self.login_attempts = 0
-        self.login_locked_until = None
-        self.save(update_fields=['login_attempts', 'login_locked_until'])
-
-    def clear_otp(self):
-        self.otp = None
-        self.otp_created_at = None
-        self.otp_attempts = 0
-        self.otp_locked_until = None
-        self.otp_type = None
-        self.save(update_fields=['otp', 'otp_created_at', 'otp_attempts', 'otp_locked_until', 'otp_type'])
-
 
 class Doctor(models.Model):
     GENDER_CHOICES = [
@@ -130,6 +78,15 @@ class Doctor(models.Model):
     emergency_contact_number = models.CharField(max_length=15, blank=True, null=True)
  
     is_approved = models.BooleanField(default=False, help_text="Admin approval for doctor account")
+
+    # Denormalized from DoctorReview by doctor_dashboard.signals; reconciled nightly.
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    ratings_1 = models.PositiveIntegerField(default=0)
+    ratings_2 = models.PositiveIntegerField(default=0)
+    ratings_3 = models.PositiveIntegerField(default=0)
+    ratings_4 = models.PositiveIntegerField(default=0)
+    ratings_5 = models.PositiveIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -155,6 +112,16 @@ class Doctor(models.Model):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @property
+    def rating_histogram(self):
+        return {str(stars): getattr(self, f'ratings_{stars}') for stars in range(1, 6)}
+
 
 class Patient(models.Model):
 
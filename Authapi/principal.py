@@ -0,0 +1,121 @@
+import pickle
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CustomUser
+
+# The authenticated user loaded together with its role profile, so
+# request.user.doctor_profile / patient_profile never cost another query.
+#
+# L2 is the shared cache, keyed by user id plus a version that is bumped on
+# every user or profile write. L1 is a short-lived per-process copy in front
+# of it; other processes may serve a stale principal for at most its TTL.
+
+L1_MAX_SIZE = 10000
+
+_l1 = {}
+_l1_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"principal:{user_id}:ver"
+
+
+def _principal_key(user_id, version):
+    return f"principal:{user_id}:v{version}"
+
+
+def _current_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 0 so an evicted version key can't
+        # bring an old cached principal back to life.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _load(user_id):
+    return (
+        CustomUser.objects
+        .select_related('doctor_profile', 'patient_profile')
+        .get(id=user_id)
+    )
+
+
+def peek_principal(user_id):
+    """L1 only; never touches the cache or the database, safe on the event loop."""
+    entry = _l1.get(int(user_id))
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    # Each caller gets its own instance so request code can't mutate a shared one.
+    return pickle.loads(entry[1])
+
+
+def get_principal(user_id):
+    """
+    CustomUser with doctor_profile and patient_profile preloaded, or None if
+    the user doesn't exist.
+    """
+    # Token claims may carry the id as a string.
+    user_id = int(user_id)
+    user = peek_principal(user_id)
+    if user is not None:
+        return user
+
+    try:
+        version = _current_version(user_id)
+        key = _principal_key(user_id, version)
+        data = cache.get(key)
+    except Exception:
+        version, key, data = None, None, None
+
+    if data is None:
+        try:
+            user = _load(user_id)
+        except CustomUser.DoesNotExist:
+            return None
+        data = pickle.dumps(user)
+        if key is not None:
+            try:
+                cache.set(key, data, settings.PRINCIPAL_CACHE_TTL)
+            except Exception:
+                pass
+    else:
+        user = pickle.loads(data)
+
+    with _l1_lock:
+        if len(_l1) >= L1_MAX_SIZE:
+            _l1.clear()
+        _l1[user_id] = (time.monotonic() + settings.PRINCIPAL_L1_TTL, data)
+    return user
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        _l1.pop(user_id, None)
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            cache.set(_version_key(user_id), int(time.time() * 1000), None)
+        except Exception:
+            pass
+
+
+def invalidate_principals(user_ids):
+    """
+    Drop cached principals for ``user_ids``. Runs after commit so a reader
+    can't cache the pre-commit row under the new version.
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def invalidate_principal(user_id):
+    invalidate_principals([user_id])
@@ -0,0 +1,198 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Doctor
+
+# Doctor search ranks by trigram word similarity against the full name and
+# the specialization, with a boost for prefix matches so "ann" puts Ann Lee
+# ahead of Joann Smith. On PostgreSQL the pg_trgm GIN indexes from migration
+# 0005 do the matching; elsewhere an in-process trigram index stands in for them.
+
+VERSION_KEY = 'doctor_search:ver'
+NAME_PREFIX_BOOST = 1.0
+SPECIALIZATION_PREFIX_BOOST = 0.5
+FALLBACK_BATCH_SIZE = 500
+
+
+def normalize(value):
+    return ' '.join(re.findall(r'\w+', (value or '').lower()))
+
+
+def trigrams(value):
+    """Trigram set of ``value`` the way pg_trgm builds it: per word, padded."""
+    grams = set()
+    for word in normalize(value).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _postgres_search(queryset, query, threshold):
+    table = connection.ops.quote_name(Doctor._meta.db_table)
+    # Must match the indexed expressions exactly for the planner to use them.
+    name = f"lower({table}.first_name || ' ' || {table}.last_name)"
+    specialization = f"lower(coalesce({table}.specialization, ''))"
+    last_name = f"lower({table}.last_name)"
+    prefix = _escape_like(query) + '%'
+
+    with connection.cursor() as cursor:
+        # <% compares against this threshold; session-level since it's the same for every search.
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(threshold)])
+
+    matches = RawSQL(
+        f"(%s <%% {name} OR %s <%% {specialization} OR {name} LIKE %s)",
+        [query, query, prefix],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"greatest(word_similarity(%s, {name}), word_similarity(%s, {specialization})) + "
+        f"CASE WHEN {name} LIKE %s OR {last_name} LIKE %s THEN {NAME_PREFIX_BOOST} "
+        f"WHEN {specialization} LIKE %s THEN {SPECIALIZATION_PREFIX_BOOST} ELSE 0 END",
+        [query, query, prefix, prefix, prefix],
+        output_field=FloatField(),
+    )
+    return queryset.filter(matches).annotate(search_rank=rank).order_by('-search_rank', 'id')
+
+
+class TrigramIndex:
+    """In-memory inverted trigram index over doctor names and specializations."""
+
+    def __init__(self, rows):
+        self.names = {}
+        self.specializations = {}
+        self.name_index = {}
+        self.specialization_index = {}
+        for doctor_id, first_name, last_name, specialization in rows:
+            name = normalize(f"{first_name} {last_name}")
+            self.names[doctor_id] = (name, normalize(last_name))
+            self.specializations[doctor_id] = normalize(specialization)
+            for gram in trigrams(name):
+                self.name_index.setdefault(gram, []).append(doctor_id)
+            for gram in trigrams(specialization):
+                self.specialization_index.setdefault(gram, []).append(doctor_id)
+
+    def search(self, query, threshold):
+        """[(doctor_id, rank)] best first, scored like the PostgreSQL path."""
+        query = normalize(query)
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        name_hits = Counter()
+        specialization_hits = Counter()
+        for gram in grams:
+            name_hits.update(self.name_index.get(gram, ()))
+            specialization_hits.update(self.specialization_index.get(gram, ()))
+
+        results = []
+        for doctor_id in name_hits.keys() | specialization_hits.keys():
+            name, last_name = self.names[doctor_id]
+            specialization = self.specializations[doctor_id]
+            similarity = max(name_hits[doctor_id], specialization_hits[doctor_id]) / len(grams)
+            if name.startswith(query) or last_name.startswith(query):
+                boost = NAME_PREFIX_BOOST
+            elif specialization.startswith(query):
+                boost = SPECIALIZATION_PREFIX_BOOST
+            else:
+                boost = 0
+            if similarity >= threshold or boost:
+                results.append((doctor_id, similarity + boost))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_fallback_index():
+    """The process-wide TrigramIndex, rebuilt when a doctor write bumps the version."""
+    global _index, _index_version
+    try:
+        version = _current_version()
+    except Exception:
+        version = _index_version
+
+    if _index is None or version != _index_version:
+        with _index_lock:
+            if _index is None or version != _index_version:
+                rows = Doctor.objects.values_list('id', 'first_name', 'last_name', 'specialization')
+                _index = TrigramIndex(rows.iterator(chunk_size=2000))
+                _index_version = version
+    return _index
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+    except Exception:
+        pass
+
+
+def invalidate_search_index():
+    transaction.on_commit(_bump)
+
+
+def search_doctors(query, queryset=None, city=None, specialization=None, limit=20):
+    """
+    Doctors matching ``query`` by name or specialization, best match first,
+    optionally narrowed to a city and/or specialization (case-insensitive).
+    ``queryset`` lets callers restrict the candidates, e.g. to active users.
+    """
+    query = normalize(query)
+    if queryset is None:
+        queryset = Doctor.objects.all()
+    if city:
+        queryset = queryset.filter(city__iexact=city)
+    if specialization:
+        queryset = queryset.filter(specialization__iexact=specialization)
+    if not query:
+        return []
+
+    threshold = settings.DOCTOR_SEARCH_SIMILARITY
+    if connection.vendor == 'postgresql':
+        return list(_postgres_search(queryset, query, threshold)[:limit])
+
+    ranked = get_fallback_index().search(query, threshold)
+    results = []
+    # Filter the ranked ids a batch at a time, best first, so the queryset's
+    # filters apply before anything is cut off.
+    for start in range(0, len(ranked), FALLBACK_BATCH_SIZE):
+        batch = ranked[start:start + FALLBACK_BATCH_SIZE]
+        doctors = {
+            doctor.id: doctor
+            for doctor in queryset.filter(id__in=[doctor_id for doctor_id, _ in batch]).order_by()
+        }
+        for doctor_id, rank in batch:
+            doctor = doctors.get(doctor_id)
+            if doctor is None:
+                continue
+            doctor.search_rank = rank
+            results.append(doctor)
+            if len(results) == limit:
+                return results
+    return results
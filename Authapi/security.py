@@ -0,0 +1,171 @@
+import logging
+import secrets
+import time
+from contextlib import contextmanager
+
+from redis.exceptions import RedisError
+
+from medtrax.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Login lockouts and OTP state live in Redis rather than on CustomUser, so
+# failed logins and OTP attempts never write to the users table. Counters
+# use INCR and every key carries a TTL, so nothing needs cleaning up.
+#
+# Both stores fail closed: when Redis is unreachable every call logs at
+# error level and raises SecurityStoreUnavailable, so a login or OTP check
+# is refused rather than let through without its lockout.
+
+
+class SecurityStoreUnavailable(Exception):
+    pass
+
+
+@contextmanager
+def _redis_errors(action, user_id):
+    try:
+        yield
+    except RedisError as e:
+        logger.error(f"Could not {action} for user {user_id}, Redis unavailable: {e}")
+        raise SecurityStoreUnavailable(action) from e
+
+
+def _remaining_minutes(ttl_ms):
+    return int(max(0, ttl_ms) // 60000) + 1
+
+
+class LoginAttemptStore:
+    MAX_ATTEMPTS = 5
+    LOCK_SECONDS = 15 * 60
+
+    @staticmethod
+    def _attempts_key(user_id):
+        return f"auth:login:attempts:{user_id}"
+
+    @staticmethod
+    def _lock_key(user_id):
+        return f"auth:login:lock:{user_id}"
+
+    @classmethod
+    def locked_minutes(cls, user_id):
+        """Minutes left on the login lock (rounded up), or 0 if not locked."""
+        with _redis_errors('check the login lock', user_id):
+            ttl = get_redis().pttl(cls._lock_key(user_id))
+        return _remaining_minutes(ttl) if ttl and ttl > 0 else 0
+
+    @classmethod
+    def record_failure(cls, user_id):
+        with _redis_errors('record a failed login', user_id):
+            pipe = get_redis().pipeline()
+            pipe.incr(cls._attempts_key(user_id))
+            pipe.expire(cls._attempts_key(user_id), cls.LOCK_SECONDS)
+            attempts, _ = pipe.execute()
+            if attempts >= cls.MAX_ATTEMPTS:
+                pipe.set(cls._lock_key(user_id), 1, ex=cls.LOCK_SECONDS)
+                pipe.delete(cls._attempts_key(user_id))
+                pipe.execute()
+        return attempts
+
+    @classmethod
+    def reset(cls, user_id):
+        with _redis_errors('reset login attempts', user_id):
+            get_redis().delete(cls._attempts_key(user_id), cls._lock_key(user_id))
+
+    @classmethod
+    def unlock_many(cls, user_ids):
+        keys = [key for user_id in user_ids for key in (cls._attempts_key(user_id), cls._lock_key(user_id))]
+        if keys:
+            with _redis_errors('clear login locks', user_ids):
+                get_redis().delete(*keys)
+
+
+class OTPStore:
+    VALID_SECONDS = 3 * 60
+    RESEND_INTERVAL_SECONDS = 30
+    # The record outlives its validity so an old code reports "expired"
+    # rather than "no OTP generated".
+    RECORD_TTL_SECONDS = 60 * 60
+    MAX_ATTEMPTS = 3
+    LOCK_SECONDS = 10 * 60
+
+    @staticmethod
+    def _otp_key(user_id):
+        return f"auth:otp:{user_id}"
+
+    @staticmethod
+    def _attempts_key(user_id):
+        return f"auth:otp:attempts:{user_id}"
+
+    @staticmethod
+    def _lock_key(user_id):
+        return f"auth:otp:lock:{user_id}"
+
+    @classmethod
+    def issue(cls, user_id, otp_type):
+        """Generate and store a new code, resetting attempts and any lock. Returns the code."""
+        otp = str(secrets.randbelow(900000) + 100000)
+        with _redis_errors('issue an OTP', user_id):
+            pipe = get_redis().pipeline()
+            pipe.delete(cls._otp_key(user_id), cls._attempts_key(user_id), cls._lock_key(user_id))
+            pipe.hset(cls._otp_key(user_id), mapping={
+                'code': otp,
+                'type': otp_type,
+                'created_at': f"{time.time():.3f}",
+            })
+            pipe.expire(cls._otp_key(user_id), cls.RECORD_TTL_SECONDS)
+            pipe.execute()
+        return otp
+
+    @classmethod
+    def get(cls, user_id):
+        """{'code', 'type', 'created_at'} for the current code, or None."""
+        with _redis_errors('read the OTP', user_id):
+            record = get_redis().hgetall(cls._otp_key(user_id))
+        if not record:
+            return None
+        record = {key.decode(): value.decode() for key, value in record.items()}
+        record['created_at'] = float(record['created_at'])
+        return record
+
+    @classmethod
+    def is_expired(cls, record):
+        return record is None or time.time() - record['created_at'] > cls.VALID_SECONDS
+
+    @classmethod
+    def resend_too_soon(cls, user_id):
+        record = cls.get(user_id)
+        return record is not None and time.time() - record['created_at'] < cls.RESEND_INTERVAL_SECONDS
+
+    @classmethod
+    def locked_minutes(cls, user_id):
+        """Minutes left on the OTP lock (rounded up), or 0 if not locked."""
+        with _redis_errors('check the OTP lock', user_id):
+            ttl = get_redis().pttl(cls._lock_key(user_id))
+        return _remaining_minutes(ttl) if ttl and ttl > 0 else 0
+
+    @classmethod
+    def record_failure(cls, user_id):
+        """Count a wrong code; locks once MAX_ATTEMPTS is reached. Returns attempts left."""
+        with _redis_errors('record a wrong OTP', user_id):
+            pipe = get_redis().pipeline()
+            pipe.incr(cls._attempts_key(user_id))
+            pipe.expire(cls._attempts_key(user_id), cls.RECORD_TTL_SECONDS)
+            attempts, _ = pipe.execute()
+            if attempts >= cls.MAX_ATTEMPTS:
+                pipe.set(cls._lock_key(user_id), 1, ex=cls.LOCK_SECONDS)
+                pipe.delete(cls._attempts_key(user_id))
+                pipe.execute()
+        return max(0, cls.MAX_ATTEMPTS - attempts)
+
+    @classmethod
+    def clear(cls, user_id):
+        with _redis_errors('clear the OTP', user_id):
+            get_redis().delete(cls._otp_key(user_id), cls._attempts_key(user_id), cls._lock_key(user_id))
+
+    @classmethod
+    def unlock_many(cls, user_ids):
+        keys = [key for user_id in user_ids for key in (cls._attempts_key(user_id), cls._lock_key(user_id))]
+        if keys:
+            with _redis_errors('clear OTP locks', user_ids):
+                get_redis().delete(*keys)
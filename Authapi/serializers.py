@@ -1,13 +1,13 @@
 from rest_framework import serializers
-from django.utils import timezone
-from datetime import timedelta, date
+from datetime import date
 from django.core.mail import send_mail
 from django.conf import settings
 import re
 import logging
-import random
 from Authapi.tasks import send_otp_email_task 
 from Authapi.models import CustomUser, Doctor, Patient
+from Authapi.security import LoginAttemptStore, OTPStore
+from Authapi.hashing import set_password, verify_password
 
 logger = logging.getLogger(__name__)
 class PasswordValidator:
@@ -108,20 +108,15 @@ class LoginSerializer(serializers.Serializer):
         except CustomUser.DoesNotExist:
             raise serializers.ValidationError("Invalid email or password.")
 
-        if user.is_login_locked():
-            if user.login_locked_until:
-                remaining = max(0, (user.login_locked_until - timezone.now()).total_seconds() // 60)
-                raise serializers.ValidationError(f"Account locked due to multiple failed attempts. Try again in {int(remaining) + 1} minutes.")
-            raise serializers.ValidationError("Account temporarily locked. Try again later.")
-
-        if not user.check_password(password):
-            user.login_attempts += 1
-            if user.login_attempts >= 5:
-                user.login_locked_until = timezone.now() + timedelta(minutes=15)
-            user.save()
+        locked_minutes = LoginAttemptStore.locked_minutes(user.id)
+        if locked_minutes:
+            raise serializers.ValidationError(f"Account locked due to multiple failed attempts. Try again in {locked_minutes} minutes.")
+
+        if not verify_password(user, password):
+            LoginAttemptStore.record_failure(user.id)
             raise serializers.ValidationError("Invalid email or password.")
 
-        user.reset_login_attempts()
+        LoginAttemptStore.reset(user.id)
 
         if not user.is_verified:
             raise serializers.ValidationError("Your account is not verified. Please verify your email first.")
@@ -148,13 +143,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
         if not user.is_verified:
             raise serializers.ValidationError("Your account is not verified. Please complete registration first.")
 
-        otp = str(random.randint(100000, 999999))
-        user.otp = otp
-        user.otp_created_at = timezone.now()
-        user.otp_type = 'reset'
-        user.otp_attempts = 0
-        user.otp_locked_until = None
-        user.save()
+        otp = OTPStore.issue(user.id, 'reset')
 
         try:
            send_otp_email_task.delay(email, otp, 'reset')
@@ -186,25 +175,20 @@ class VerifyPasswordResetOTPSerializer(serializers.Serializer):
         except CustomUser.DoesNotExist:
             raise serializers.ValidationError("No account found with this email.")
 
-        if user.is_otp_locked():
-            if user.otp_locked_until:
-                remaining = max(0, (user.otp_locked_until - timezone.now()).total_seconds() // 60)
-                raise serializers.ValidationError(f"Too many attempts. Try again in {int(remaining) + 1} minutes.")
-            raise serializers.ValidationError("Account temporarily locked. Try again later.")
+        locked_minutes = OTPStore.locked_minutes(user.id)
+        if locked_minutes:
+            raise serializers.ValidationError(f"Too many attempts. Try again in {locked_minutes} minutes.")
 
-        if not user.otp:
+        record = OTPStore.get(user.id)
+        if not record:
             raise serializers.ValidationError("No OTP generated. Request a new one.")
 
-        if user.is_otp_expired():
-            user.clear_otp()
+        if OTPStore.is_expired(record):
+            OTPStore.clear(user.id)
             raise serializers.ValidationError("OTP expired. Request a new one.")
 
-        if user.otp != otp:
-            user.otp_attempts += 1
-            if user.otp_attempts >= 3:
-                user.otp_locked_until = timezone.now() + timedelta(minutes=10)
-            user.save()
-            attempts_left = max(0, 3 - user.otp_attempts)
+        if record['code'] != otp:
+            attempts_left = OTPStore.record_failure(user.id)
             raise serializers.ValidationError(f"Invalid OTP. {attempts_left} attempts remaining.")
 
         data['user'] = user
@@ -236,7 +220,7 @@ class ResetPasswordSerializer(serializers.Serializer):
         if new_password != confirm_password:
             raise serializers.ValidationError("Passwords do not match.")
 
-        if user.check_password(new_password):
+        if verify_password(user, new_password):
             raise serializers.ValidationError("New password cannot be the same as your current password.")
 
         data['user'] = user
@@ -244,9 +228,9 @@ class ResetPasswordSerializer(serializers.Serializer):
 
     def save(self):
         user = self.validated_data['user']
-        user.set_password(self.validated_data['new_password'])
-        user.clear_otp()
+        set_password(user, self.validated_data['new_password'])
         user.save()
+        OTPStore.clear(user.id)
         return user
 
 
@@ -267,11 +251,9 @@ class ResendPasswordResetOTPSerializer(serializers.Serializer):
         if not user.is_verified:
             raise serializers.ValidationError("Your account is not verified.")
 
-        if user.is_otp_locked():
-            if user.otp_locked_until:
-                remaining = max(0, (user.otp_locked_until - timezone.now()).total_seconds() // 60)
-                raise serializers.ValidationError(f"Too many attempts. Try again in {int(remaining) + 1} minutes.")
-            raise serializers.ValidationError("Account temporarily locked. Try again later.")
+        locked_minutes = OTPStore.locked_minutes(user.id)
+        if locked_minutes:
+            raise serializers.ValidationError(f"Too many attempts. Try again in {locked_minutes} minutes.")
 
         data['user'] = user
         return data
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from Authapi.models import CustomUser, Doctor, Patient
+from Authapi.principal import invalidate_principal
+from Authapi.search import invalidate_search_index
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_user_principal(sender, instance, **kwargs):
+    invalidate_principal(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+@receiver([post_save, post_delete], sender=Patient)
+def invalidate_profile_principal(sender, instance, **kwargs):
+    invalidate_principal(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def invalidate_doctor_search(sender, instance, **kwargs):
+    invalidate_search_index()
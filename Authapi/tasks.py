@@ -250,4 +250,20 @@ def send_otp_email_task(email, otp, email_type):
         }
     except Exception as e:
         logger.error(f"❌ Failed to send OTP email ({email_type}) to {email}: {str(e)}")
-        raise Exception(f"Email delivery failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Email delivery failed: {str(e)}")
+
+@shared_task
+def prune_expired_tokens(chunk_size=1000):
+    """Drop expired outstanding/blacklisted JWTs and keep the Redis blacklist in step."""
+    from Authapi.tokens import delete_expired_tokens, ensure_blacklist_loaded, trim_blacklist
+
+    deleted = delete_expired_tokens(chunk_size=chunk_size)
+    try:
+        loaded = ensure_blacklist_loaded()
+        trimmed = trim_blacklist()
+    except Exception as e:
+        logger.error(f"Failed to refresh token blacklist cache: {str(e)}")
+        loaded, trimmed = 0, 0
+
+    logger.info(f"Pruned {deleted} expired tokens, trimmed {trimmed} from blacklist cache, loaded {loaded}")
+    return {'deleted': deleted, 'trimmed': trimmed, 'loaded': loaded}
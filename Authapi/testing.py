@@ -0,0 +1,28 @@
+from .models import CustomUser, Doctor, Patient
+
+# Shared factories for the test suites. Profiles get valid defaults for every
+# required field and a unique phone number; pass keyword arguments to override.
+
+
+def make_user(username, role):
+    return CustomUser.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pw', role=role
+    )
+
+
+def make_doctor(username, **fields):
+    fields = {
+        'first_name': username, 'last_name': 'Doc', 'date_of_birth': '1980-01-01', 'gender': 'F',
+        'blood_group': 'A+', 'city': 'Delhi', 'phone_number': f'9{Doctor.objects.count():09d}',
+        **fields,
+    }
+    return Doctor.objects.create(user=make_user(username, 'doctor'), **fields)
+
+
+def make_patient(username, **fields):
+    fields = {
+        'first_name': username, 'last_name': 'Pat', 'date_of_birth': '1990-01-01', 'gender': 'M',
+        'blood_group': 'O+', 'city': 'Delhi', 'phone_number': f'8{Patient.objects.count():09d}',
+        **fields,
+    }
+    return Patient.objects.create(user=make_user(username, 'patient'), **fields)
@@ -0,0 +1,113 @@
+import logging
+import time
+
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from medtrax.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Blacklisted jtis mirrored into a sorted set scored by token expiry, so the
+# check on every refresh is one ZSCORE and expired entries can be trimmed by
+# score. The ready marker is a member of the same set, scored +inf so trimming
+# never removes it, and is only added once the set has been loaded from the
+# database. If the set is evicted the marker goes with it; until it is
+# reloaded (or if Redis is down) checks go to the database.
+BLACKLIST_KEY = 'jwt:blacklist'
+READY_MEMBER = '__ready__'
+
+
+def is_blacklisted(jti):
+    try:
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.zscore(BLACKLIST_KEY, READY_MEMBER)
+        pipe.zscore(BLACKLIST_KEY, jti)
+        ready, score = pipe.execute()
+        if ready is not None:
+            return score is not None
+    except Exception as e:
+        logger.warning(f"Token blacklist cache unavailable, checking database: {e}")
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def cache_blacklisted(jti, exp):
+    try:
+        get_redis().zadd(BLACKLIST_KEY, {jti: exp})
+    except Exception as e:
+        logger.warning(f"Could not cache blacklisted token {jti}: {e}")
+
+
+def load_blacklist(chunk_size=5000):
+    """Rebuild the Redis blacklist from unexpired BlacklistedToken rows."""
+    redis = get_redis()
+    redis.zrem(BLACKLIST_KEY, READY_MEMBER)
+
+    loaded = 0
+    last_id = 0
+    while True:
+        rows = list(
+            BlacklistedToken.objects
+            .filter(id__gt=last_id, token__expires_at__gt=timezone.now())
+            .order_by('id')
+            .values_list('id', 'token__jti', 'token__expires_at')[:chunk_size]
+        )
+        if not rows:
+            break
+        redis.zadd(BLACKLIST_KEY, {jti: int(expires_at.timestamp()) for _, jti, expires_at in rows})
+        loaded += len(rows)
+        last_id = rows[-1][0]
+
+    redis.zadd(BLACKLIST_KEY, {READY_MEMBER: '+inf'})
+    return loaded
+
+
+def trim_blacklist():
+    return get_redis().zremrangebyscore(BLACKLIST_KEY, '-inf', int(time.time()))
+
+
+def ensure_blacklist_loaded():
+    if get_redis().zscore(BLACKLIST_KEY, READY_MEMBER) is None:
+        return load_blacklist()
+    return 0
+
+
+class RefreshToken(BaseRefreshToken):
+    """RefreshToken whose blacklist check reads the Redis mirror instead of the database."""
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        result = super().blacklist()
+        cache_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return result
+
+
+def delete_expired_tokens(chunk_size=1000):
+    """
+    Delete expired outstanding tokens (and their blacklist rows) in id-ordered
+    chunks so no single statement holds locks across the whole table.
+    Returns the number of outstanding tokens removed.
+    """
+    now = timezone.now()
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects
+            .filter(id__gt=last_id, expires_at__lt=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        last_id = ids[-1]
+    return deleted
@@ -2,23 +2,23 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.db import transaction, IntegrityError
 from django.db import transaction
-from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import logging
 from django.core.mail import send_mail
 from django.conf import settings
-import random
-from datetime import timedelta
 from dateutil import parser
 from rest_framework.permissions import IsAuthenticated
 from Authapi.tasks import send_otp_email_task
 from Authapi.throttles import AuthAnonRateThrottle, OTPRateThrottle, LoginRateThrottle
 
 from Authapi.models import CustomUser, Doctor, Patient
+from Authapi.security import OTPStore
+from Authapi.hashing import set_password
+from Authapi.tokens import RefreshToken
 from .serializers import (
     SignupSerializer, VerifySignupOTPSerializer, ResendSignupOTPSerializer,
     DoctorDetailsSerializer, PatientDetailsSerializer,
@@ -115,8 +115,6 @@ class SignupView(APIView):
                 password = serializer.validated_data['password1']
                 role = serializer.validated_data['role']
 
-                otp = str(random.randint(100000, 999999))
-
                 user, created = CustomUser.objects.get_or_create(
                     email=email,
                     defaults={
@@ -133,13 +131,10 @@ class SignupView(APIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
 
-                user.set_password(password)
+                set_password(user, password)
                 user.role = role
-                user.otp = otp
-                user.otp_created_at = timezone.now()
-                user.otp_attempts = 0
-                user.otp_locked_until = None
                 user.save()
+                otp = OTPStore.issue(user.id, 'verification')
 
                 try:
                     send_otp_email_task.delay(email, otp, "Verification")
@@ -223,25 +218,21 @@ class VerifySignupOTPView(APIView):
                     {'success': False, 'error': 'No pending signup found for this email.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            if user.otp_locked_until and timezone.now() < user.otp_locked_until:
-                remaining = max(0, (user.otp_locked_until - timezone.now()).total_seconds() // 60)
+            locked_minutes = OTPStore.locked_minutes(user.id)
+            if locked_minutes:
                 return Response(
-                    {'success': False, 'error': f'Too many attempts. Try again in {int(remaining) + 1} minutes.'},
+                    {'success': False, 'error': f'Too many attempts. Try again in {locked_minutes} minutes.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            if not user.otp_created_at or timezone.now() - user.otp_created_at > timedelta(minutes=3):
+            record = OTPStore.get(user.id)
+            if OTPStore.is_expired(record):
                 return Response(
                     {'success': False, 'error': 'OTP expired. Request a new one.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if user.otp != otp:
-                user.otp_attempts += 1
-                if user.otp_attempts >= 3:
-                    user.otp_locked_until = timezone.now() + timedelta(minutes=10)
-                user.save()
-                
-                attempts_left = max(0, 3 - user.otp_attempts)
+            if record['code'] != otp:
+                attempts_left = OTPStore.record_failure(user.id)
                 return Response(
                     {'success': False, 'error': f'Invalid OTP. {attempts_left} attempts remaining.'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -250,11 +241,8 @@ class VerifySignupOTPView(APIView):
             role = user.role
 
             user.is_verified = True
-            user.otp = None
-            user.otp_created_at = None
-            user.otp_attempts = 0
-            user.otp_locked_until = None
-            user.save()
+            user.save(update_fields=['is_verified', 'updated_at'])
+            OTPStore.clear(user.id)
 
             logger.info(f"User created and verified: {email} as {role}")
 
@@ -316,26 +304,21 @@ class ResendSignupOTPView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if user.otp_locked_until and timezone.now() < user.otp_locked_until:
-                remaining = max(0, (user.otp_locked_until - timezone.now()).total_seconds() // 60)
+            locked_minutes = OTPStore.locked_minutes(user.id)
+            if locked_minutes:
                 return Response(
-                    {'success': False, 'error': f'Too many attempts. Try again in {int(remaining) + 1} minutes.'},
+                    {'success': False, 'error': f'Too many attempts. Try again in {locked_minutes} minutes.'},
                     status=status.HTTP_429_TOO_MANY_REQUESTS
                 ) 
             
           
-            if user.otp_created_at and (timezone.now() - user.otp_created_at) < timedelta(seconds=30):
+            if OTPStore.resend_too_soon(user.id):
                 return Response(
                     {'success': False, 'error': 'Please wait at least 30 seconds before requesting a new OTP.'},
                     status=status.HTTP_429_TOO_MANY_REQUESTS
                 )
 
-            otp = str(random.randint(100000, 999999))
-            user.otp = otp
-            user.otp_created_at = timezone.now()
-            user.otp_attempts = 0
-            user.otp_locked_until = None
-            user.save()
+            otp = OTPStore.issue(user.id, 'verification')
 
             try:
                 send_otp_email_task.delay(email, otp, 'verification')
@@ -976,19 +959,13 @@ class ResendPasswordResetOTPView(APIView):
                 )
 
             user = serializer.validated_data['user']
-            if user.otp_created_at and (timezone.now() - user.otp_created_at) < timedelta(seconds=30):
+            if OTPStore.resend_too_soon(user.id):
                 return Response(
                     {'success': False, 'error': 'Please wait at least 30 seconds before requesting a new OTP.'},
                     status=status.HTTP_429_TOO_MANY_REQUESTS
                 )
             email = user.email
-            otp = str(random.randint(100000, 999999))
-
-            user.otp = otp
-            user.otp_created_at = timezone.now()
-            user.otp_attempts = 0
-            user.otp_locked_until = None
-            user.save()
+            otp = OTPStore.issue(user.id, 'reset')
 
             try:
                 send_otp_email_task.delay(email, otp, 'reset')
@@ -1105,6 +1082,13 @@ class LogoutView(APIView):
 
     def post(self, request):
         try:
+            refresh_token = request.COOKIES.get('refresh_token')
+            if refresh_token:
+                try:
+                    RefreshToken(refresh_token).blacklist()
+                except TokenError:
+                    pass
+
             response = Response({
                 'success': True,
                 'message': 'Logged out successfully'
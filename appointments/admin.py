@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Appointment
+from .models import Appointment, AppointmentEvent
+from .services import bulk_transition
 
 
 @admin.register(Appointment)
@@ -91,16 +92,32 @@ class AppointmentAdmin(admin.ModelAdmin):
     actions = ['mark_confirmed', 'mark_completed', 'mark_cancelled']
     
     def mark_confirmed(self, request, queryset):
-        updated = queryset.update(status='confirmed')
+        updated = bulk_transition(queryset, 'confirmed')
         self.message_user(request, f'{updated} appointment(s) confirmed.')
     mark_confirmed.short_description = "Mark as Confirmed"
     
     def mark_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = bulk_transition(queryset, 'completed')
         self.message_user(request, f'{updated} appointment(s) marked as completed.')
     mark_completed.short_description = "Mark as Completed"
     
     def mark_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
+        updated = bulk_transition(queryset, 'cancelled')
         self.message_user(request, f'{updated} appointment(s) cancelled.')
-    mark_cancelled.short_description = "Mark as Cancelled"
\ No newline at end of file
+    mark_cancelled.short_description = "Mark as Cancelled"
+
+
+@admin.register(AppointmentEvent)
+class AppointmentEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'appointment', 'from_status', 'to_status', 'created_at', 'processed_at', 'attempts']
+    list_filter = ['to_status', 'processed_at']
+    readonly_fields = ['appointment', 'from_status', 'to_status', 'created_at', 'processed_at', 'attempts', 'last_error']
+    ordering = ['-id']
+
+    actions = ['retry_events']
+
+    def retry_events(self, request, queryset):
+        """Reset failed events so the next sweep picks them up"""
+        updated = queryset.filter(processed_at__isnull=True).update(attempts=0, last_error='')
+        self.message_user(request, f'{updated} event(s) queued for retry.')
+    retry_events.short_description = "Retry unprocessed events"
@@ -6,4 +6,4 @@ class AppointmentsConfig(AppConfig):
     name = 'appointments'
 
     def ready(self):
-        import appointments.signals 
\ No newline at end of file
+        import appointments.signals
@@ -0,0 +1,181 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from medtrax.redis_client import get_redis
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+# Cross-doctor availability, kept in Redis as one hash per date:
+#   availability:<YYYY-MM-DD>  {doctor_id: bitmask of booked slots, '_ready': 1}
+# Bit i is the i-th slot of the day (see SLOT_TIMES). Doctors without a field
+# have nothing booked; '_ready' tells "nothing booked" apart from "not built".
+#
+# The outbox processor recomputes the (doctor, date) masks touched by each
+# batch of appointment events, and a nightly task rebuilds the whole horizon
+# to pick up anything that bypassed the outbox (e.g. deleted appointments).
+
+SLOT_START_HOUR = 9
+SLOT_END_HOUR = 17
+SLOT_MINUTES = 30
+BOOKED_STATUSES = ('pending', 'confirmed')
+READY_FIELD = '_ready'
+
+SLOT_TIMES = [
+    f"{minutes // 60:02d}:{minutes % 60:02d}"
+    for minutes in range(SLOT_START_HOUR * 60, SLOT_END_HOUR * 60, SLOT_MINUTES)
+]
+SLOT_INDEX = {slot: index for index, slot in enumerate(SLOT_TIMES)}
+FULL_MASK = (1 << len(SLOT_TIMES)) - 1
+
+
+def _key(day):
+    return f"availability:{day.isoformat()}"
+
+
+def horizon(start=None, days=None):
+    """Dates covered by the index, from ``start`` (default today) for ``days`` days."""
+    today = timezone.now().date()
+    start = max(start or today, today)
+    end = today + timedelta(days=settings.AVAILABILITY_DAYS)
+    days = settings.AVAILABILITY_DAYS if days is None else days
+    return [start + timedelta(days=offset) for offset in range(days) if start + timedelta(days=offset) < end]
+
+
+def _booked_masks(doctor_ids=None, dates=None):
+    """{(doctor_id, date): mask} straight from the database."""
+    appointments = Appointment.objects.filter(status__in=BOOKED_STATUSES)
+    if doctor_ids is not None:
+        appointments = appointments.filter(doctor_id__in=doctor_ids)
+    if dates is not None:
+        appointments = appointments.filter(appointment_date__in=dates)
+
+    masks = defaultdict(int)
+    for doctor_id, day, time in appointments.values_list('doctor_id', 'appointment_date', 'appointment_time'):
+        index = SLOT_INDEX.get(time.strftime("%H:%M")) if time else None
+        if index is not None:
+            masks[doctor_id, day] |= 1 << index
+    return masks
+
+
+def _expire_at(day):
+    return int(datetime.combine(day + timedelta(days=2), datetime.min.time()).timestamp())
+
+
+def rebuild_dates(dates):
+    """Recompute every doctor's mask for ``dates`` from the database; returns the masks."""
+    dates = list(dates)
+    if not dates:
+        return {}
+    masks = _booked_masks(dates=dates)
+    by_date = defaultdict(dict)
+    for (doctor_id, day), mask in masks.items():
+        by_date[day][doctor_id] = mask
+
+    redis = get_redis()
+    with redis.pipeline(transaction=True) as pipe:
+        for day in dates:
+            key = _key(day)
+            pipe.delete(key)
+            pipe.hset(key, mapping={READY_FIELD: 1, **by_date.get(day, {})})
+            pipe.expireat(key, _expire_at(day))
+        pipe.execute()
+    return masks
+
+
+def rebuild():
+    dates = horizon()
+    rebuild_dates(dates)
+    logger.info(f"Rebuilt slot availability for {len(dates)} days")
+    return len(dates)
+
+
+def refresh(pairs):
+    """
+    Recompute the masks of the given (doctor_id, date) pairs. Reading the
+    current rows rather than applying deltas keeps it idempotent, so replayed
+    or reordered events can't leave a slot marked wrongly.
+    """
+    dates = set(horizon())
+    pairs = {(doctor_id, day) for doctor_id, day in pairs if day in dates}
+    if not pairs:
+        return
+    masks = _booked_masks({doctor_id for doctor_id, _ in pairs}, {day for _, day in pairs})
+
+    redis = get_redis()
+    with redis.pipeline(transaction=False) as pipe:
+        for doctor_id, day in pairs:
+            mask = masks.get((doctor_id, day), 0)
+            if mask:
+                pipe.hset(_key(day), doctor_id, mask)
+            else:
+                pipe.hdel(_key(day), doctor_id)
+        pipe.execute()
+
+
+def get_masks(doctor_ids, dates):
+    """{date: {doctor_id: booked mask}}; dates not built yet are built first."""
+    doctor_ids = list(doctor_ids)
+    redis = get_redis()
+    with redis.pipeline(transaction=False) as pipe:
+        for day in dates:
+            pipe.hmget(_key(day), [READY_FIELD, *doctor_ids])
+        replies = pipe.execute()
+
+    missing = [day for day, values in zip(dates, replies) if values[0] is None]
+    if missing:
+        fresh = rebuild_dates(missing)
+        for index, day in enumerate(dates):
+            if day in missing:
+                replies[index] = [1, *(fresh.get((doctor_id, day), 0) for doctor_id in doctor_ids)]
+
+    return {
+        day: {doctor_id: int(value or 0) for doctor_id, value in zip(doctor_ids, values[1:])}
+        for day, values in zip(dates, replies)
+    }
+
+
+def _free_slot_times(mask, day, now):
+    free = FULL_MASK & ~mask
+    slots = [slot for index, slot in enumerate(SLOT_TIMES) if free >> index & 1]
+    # Same cut-off as get_available_slots: nothing starting within 30 minutes.
+    threshold = now + timedelta(minutes=30)
+    if threshold.date() > day:
+        return []
+    if threshold.date() == day:
+        slots = [slot for slot in slots if slot >= threshold.strftime("%H:%M")]
+    return slots
+
+
+def earliest_slots(doctor_ids, start=None, days=None):
+    """{doctor_id: (date, 'HH:MM')} of each doctor's first free slot in the window."""
+    now = timezone.now()
+    dates = horizon(start, days)
+    masks = get_masks(doctor_ids, dates)
+    earliest = {}
+    for day in dates:
+        for doctor_id, mask in masks[day].items():
+            if doctor_id in earliest or mask == FULL_MASK:
+                continue
+            slots = _free_slot_times(mask, day, now)
+            if slots:
+                earliest[doctor_id] = (day, slots[0])
+    return earliest
+
+
+def free_slots(doctor_ids, start=None, days=None):
+    """{doctor_id: {date: ['HH:MM', ...]}} of every free slot in the window."""
+    now = timezone.now()
+    dates = horizon(start, days)
+    masks = get_masks(doctor_ids, dates)
+    result = defaultdict(dict)
+    for day in dates:
+        for doctor_id, mask in masks[day].items():
+            slots = _free_slot_times(mask, day, now)
+            if slots:
+                result[doctor_id][day] = slots
+    return result
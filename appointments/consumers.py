@@ -1,8 +1,10 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
+from medtrax.ws_protocol import ProtocolMixin
 
-class QueueConsumer(AsyncWebsocketConsumer):
+
+class QueueConsumer(ProtocolMixin, AsyncWebsocketConsumer):
     async def connect(self):
+        self.negotiate_protocol()
         self.doctor_id = self.scope["url_route"]["kwargs"]["doctor_id"]
         self.group_name = f"doctor_{self.doctor_id}_queue"
         user = self.scope.get("user")
@@ -11,11 +13,12 @@ class QueueConsumer(AsyncWebsocketConsumer):
             return
         
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.accept(self.subprotocol)
 
     async def disconnect(self, code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def send_queue_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self.send_payload(event["data"])
 
@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from Authapi.models import Doctor
+from medtrax.redis_client import get_redis
+from . import geo
+
+logger = logging.getLogger(__name__)
+
+# The booking screen's doctor directory, held by every web worker as a
+# column-oriented snapshot: facet values are dictionary-encoded into small
+# integer arrays and each doctor's API row is serialized once at build time,
+# so listing, filtering and facet counting never touch the database.
+#
+# Doctor writes publish the doctor's id on CHANNEL after commit. Each
+# process runs one listener thread that rebuilds and swaps in a new snapshot
+# (and updates the geo index) when a message arrives, and also every
+# DOCTOR_DIRECTORY_MAX_AGE seconds in case a message was missed while Redis
+# was unreachable.
+
+CHANNEL = 'doctor_directory:changed'
+MAX_PAGE_SIZE = 100
+NO_EXPERIENCE = -1
+EXPERIENCE_BUCKETS = [
+    ('0-4', 0, 4),
+    ('5-9', 5, 9),
+    ('10-19', 10, 19),
+    ('20+', 20, None),
+]
+
+
+def _encode(values):
+    """Dictionary-encode ``values``: (distinct values, array of codes)."""
+    lookup = {}
+    codes = array('H')
+    for value in values:
+        codes.append(lookup.setdefault(value, len(lookup)))
+    return list(lookup), codes
+
+
+def experience_bucket(years):
+    if years == NO_EXPERIENCE:
+        return None
+    for label, low, high in EXPERIENCE_BUCKETS:
+        if years >= low and (high is None or years <= high):
+            return label
+    return None
+
+
+class DirectorySnapshot:
+    """Immutable, array-backed view of the active doctors, in directory order."""
+
+    def __init__(self, doctors):
+        from .serializers import DoctorListSerializer
+
+        doctors = list(doctors)
+        self.built_at = time.monotonic()
+        self.rows = tuple(dict(row) for row in DoctorListSerializer(doctors, many=True).data)
+        self.positions = {doctor.id: position for position, doctor in enumerate(doctors)}
+        self.cities, self.city_codes = _encode((doctor.city or '').strip() for doctor in doctors)
+        self.specializations, self.specialization_codes = _encode(
+            (doctor.specialization or '').strip() for doctor in doctors
+        )
+        self.experience = array('h', (
+            NO_EXPERIENCE if doctor.years_of_experience is None else doctor.years_of_experience
+            for doctor in doctors
+        ))
+        self.approved = bytes(bool(doctor.is_approved) for doctor in doctors)
+
+    @classmethod
+    def build(cls):
+        doctors = (
+            Doctor.objects.filter(user__is_active=True)
+            .select_related('user')
+            .order_by('-created_at')
+        )
+        return cls(doctors.iterator(chunk_size=2000))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row(self, doctor_id):
+        position = self.positions.get(doctor_id)
+        return None if position is None else self.rows[position]
+
+    def _code(self, values, value):
+        """Case-insensitive lookup of a facet value's code; -1 matches nothing."""
+        value = value.strip().lower()
+        for code, candidate in enumerate(values):
+            if candidate.lower() == value:
+                return code
+        return -1
+
+    def query(self, city=None, specialization=None, min_experience=None, approved=None,
+              doctor_ids=None, offset=0, limit=20):
+        """
+        Filter the directory and count facets in a single pass. Each facet is
+        counted over the rows matching every *other* filter, so a client can
+        show how many results picking another value would give. ``doctor_ids``
+        restricts and orders the results, e.g. to ranked search hits.
+        Returns (total, rows, facets).
+        """
+        city_code = self._code(self.cities, city) if city else None
+        specialization_code = self._code(self.specializations, specialization) if specialization else None
+
+        if doctor_ids is None:
+            positions = range(len(self.rows))
+        else:
+            positions = [self.positions[doctor_id] for doctor_id in doctor_ids if doctor_id in self.positions]
+
+        city_counts = [0] * len(self.cities)
+        specialization_counts = [0] * len(self.specializations)
+        experience_counts = {label: 0 for label, _, _ in EXPERIENCE_BUCKETS}
+        approved_counts = {True: 0, False: 0}
+        matches = []
+
+        for position in positions:
+            city_ok = city_code is None or self.city_codes[position] == city_code
+            specialization_ok = (
+                specialization_code is None or self.specialization_codes[position] == specialization_code
+            )
+            years = self.experience[position]
+            experience_ok = min_experience is None or years >= min_experience
+            is_approved = bool(self.approved[position])
+            approved_ok = approved is None or is_approved == approved
+
+            if specialization_ok and experience_ok and approved_ok:
+                city_counts[self.city_codes[position]] += 1
+            if city_ok and experience_ok and approved_ok:
+                specialization_counts[self.specialization_codes[position]] += 1
+            if city_ok and specialization_ok and approved_ok:
+                bucket = experience_bucket(years)
+                if bucket:
+                    experience_counts[bucket] += 1
+            if city_ok and specialization_ok and experience_ok:
+                approved_counts[is_approved] += 1
+                if approved_ok:
+                    matches.append(position)
+
+        facets = {
+            'city': _facet(self.cities, city_counts),
+            'specialization': _facet(self.specializations, specialization_counts),
+            'experience': [{'value': label, 'count': count} for label, count in experience_counts.items()],
+            'approved': [{'value': value, 'count': count} for value, count in approved_counts.items()],
+        }
+        rows = [self.rows[position] for position in matches[offset:offset + limit]]
+        return len(matches), rows, facets
+
+
+def _facet(values, counts):
+    facet = [
+        {'value': value, 'count': count}
+        for value, count in zip(values, counts)
+        if value and count
+    ]
+    facet.sort(key=lambda item: (-item['count'], item['value']))
+    return facet
+
+
+_snapshot = None
+_lock = threading.Lock()
+_listener = None
+
+
+def refresh_snapshot():
+    global _snapshot
+    snapshot = DirectorySnapshot.build()
+    _snapshot = snapshot
+    logger.info(f"Doctor directory snapshot rebuilt with {len(snapshot)} doctors")
+    return snapshot
+
+
+def _changed_ids(message, pubsub):
+    """
+    Drain queued messages into the set of changed doctor ids, or None when
+    one of them asked for everything to be reloaded.
+    """
+    doctor_ids = set()
+    while message is not None:
+        data = message['data']
+        if isinstance(data, bytes):
+            data = data.decode()
+        if doctor_ids is not None:
+            if data.isdigit():
+                doctor_ids.add(int(data))
+            else:
+                doctor_ids = None
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+    return doctor_ids
+
+
+def _refresh(doctor_ids=None):
+    close_old_connections()
+    refresh_snapshot()
+    geo.update_index(doctor_ids)
+
+
+def _listen():
+    max_age = settings.DOCTOR_DIRECTORY_MAX_AGE
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # Changes published while we weren't subscribed are lost; start fresh.
+            _refresh()
+            while True:
+                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                stale = _snapshot is None or time.monotonic() - _snapshot.built_at > max_age
+                if message is None and not stale:
+                    continue
+                # A burst of writes (e.g. an admin bulk edit) costs one rebuild.
+                _refresh(_changed_ids(message, pubsub) if message is not None else None)
+        except Exception as e:
+            logger.error(f"Doctor directory listener failed, retrying: {e}")
+            time.sleep(5)
+        finally:
+            close_old_connections()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def _start_listener():
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = threading.Thread(target=_listen, name='doctor-directory', daemon=True)
+        _listener.start()
+
+
+def get_snapshot():
+    """The current snapshot. Only the first call in a process builds it inline."""
+    if _snapshot is None or _listener is None or not _listener.is_alive():
+        with _lock:
+            if _snapshot is None:
+                refresh_snapshot()
+            _start_listener()
+    return _snapshot
+
+
+def _publish(doctor_id):
+    try:
+        get_redis().publish(CHANNEL, '*' if doctor_id is None else str(doctor_id))
+    except Exception as e:
+        logger.error(f"Could not publish doctor directory change: {e}")
+
+
+def publish_directory_change(doctor_id=None):
+    """Announce a doctor change after commit; without an id every index reloads in full."""
+    transaction.on_commit(lambda: _publish(doctor_id))
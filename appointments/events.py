@@ -0,0 +1,162 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from chat_room.models import ChatRoom
+from chat_room.provisioning import deactivate_appointment_rooms, provision_appointment_rooms
+from . import availability
+from .models import AppointmentEvent
+from .utils import broadcast_queue_update
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+NOTIFICATION_CHUNK_SIZE = 200
+
+# to_status -> notification type for send_appointment_notifications
+NOTIFICATIONS = {
+    'confirmed': 'confirmed',
+    'cancelled': 'cancelled',
+}
+
+# Statuses counted by get_doctor_queue_info
+QUEUE_STATUSES = {'confirmed', 'completed'}
+
+
+def _apply(events):
+    """
+    Database side effects of a batch of transitions, set-based. Only the last
+    transition of each appointment in the batch matters for the chat room.
+    Runs inside the batch transaction, so it commits with processed_at.
+    """
+    latest = {}
+    for event in events:
+        latest[event.appointment_id] = event
+
+    provision_appointment_rooms(
+        [event.appointment for event in latest.values() if event.to_status == 'confirmed']
+    )
+    deactivate_appointment_rooms(
+        [appointment_id for appointment_id, event in latest.items() if event.to_status == 'cancelled']
+    )
+
+
+def _after_commit(events):
+    """Notifications and broadcasts; sent only once the batch is marked processed."""
+    from appointments.tasks import send_appointment_notifications
+
+    notifications = {}
+    completed = []
+    doctors = {}
+    slots = set()
+    today = timezone.localdate()
+    for event in events:
+        appointment = event.appointment
+        slots.add((appointment.doctor_id, appointment.appointment_date))
+        notification = 'created' if event.from_status is None else NOTIFICATIONS.get(event.to_status)
+        if notification:
+            notifications.setdefault(notification, []).append(appointment.id)
+        if event.to_status == 'completed':
+            completed.append(appointment.id)
+        if {event.from_status, event.to_status} & QUEUE_STATUSES and appointment.appointment_date == today:
+            doctors[appointment.doctor_id] = appointment.doctor
+
+    for notification, appointment_ids in notifications.items():
+        for start in range(0, len(appointment_ids), NOTIFICATION_CHUNK_SIZE):
+            chunk = appointment_ids[start:start + NOTIFICATION_CHUNK_SIZE]
+            try:
+                send_appointment_notifications.delay(chunk, notification)
+            except Exception as e:
+                logger.error(f"Failed to queue {notification} notifications for {len(chunk)} appointment(s): {e}")
+
+    try:
+        availability.refresh(slots)
+    except Exception as e:
+        logger.error(f"Failed to refresh slot availability for {len(slots)} doctor-day(s): {e}")
+
+    if completed:
+        channel_layer = get_channel_layer()
+        for room_id in ChatRoom.objects.filter(appointment_id__in=completed).values_list('id', flat=True):
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    f'chat_{room_id}',
+                    {'type': 'appointment_completed', 'stream': f'chat:{room_id}'}
+                )
+            except Exception as e:
+                logger.error(f"Failed to notify chat room {room_id} of completion: {e}")
+
+    # One queue broadcast per doctor, however many of their appointments changed.
+    for doctor in doctors.values():
+        try:
+            broadcast_queue_update(doctor)
+        except Exception as e:
+            logger.error(f"Queue broadcast failed for doctor {doctor.id}: {e}")
+
+
+def _record_failure(events, error):
+    logger.error(f"Failed to process appointment events {[event.id for event in events]}: {error}")
+    AppointmentEvent.objects.filter(id__in=[event.id for event in events]).update(
+        attempts=F('attempts') + 1,
+        last_error=str(error)[:2000]
+    )
+
+
+def _process_batch(event_ids, batch_size):
+    pending = AppointmentEvent.objects.filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+    if event_ids is not None:
+        pending = pending.filter(id__in=event_ids)
+
+    with transaction.atomic():
+        events = list(
+            pending.select_for_update(skip_locked=True, of=('self',))
+            .select_related('appointment__doctor', 'appointment__patient')
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        done = events
+        try:
+            with transaction.atomic():
+                _apply(events)
+        except Exception:
+            # Find the bad events one at a time so they don't hold up the rest.
+            done = []
+            for event in events:
+                try:
+                    with transaction.atomic():
+                        _apply([event])
+                    done.append(event)
+                except Exception as e:
+                    _record_failure([event], e)
+
+        if done:
+            AppointmentEvent.objects.filter(id__in=[event.id for event in done]).update(
+                processed_at=timezone.now(),
+                attempts=F('attempts') + 1
+            )
+            transaction.on_commit(lambda: _after_commit(done))
+        return len(events), len(done)
+
+
+def process_events(event_ids=None, batch_size=500):
+    """
+    Process pending outbox events in id order, a batch at a time. Each batch
+    is claimed with SELECT ... FOR UPDATE SKIP LOCKED and marked processed in
+    the same transaction as its database side effects, so concurrent workers
+    and re-deliveries never apply an event twice. Returns the number processed.
+    """
+    processed = 0
+    while True:
+        claimed, done = _process_batch(event_ids, batch_size)
+        processed += done
+        if claimed < batch_size:
+            break
+
+    if processed:
+        logger.info(f"Processed {processed} appointment events")
+    return processed
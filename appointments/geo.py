@@ -0,0 +1,240 @@
+import csv
+import heapq
+import logging
+import math
+import re
+from collections import defaultdict
+from operator import itemgetter
+from pathlib import Path
+
+from Authapi.models import Doctor
+from .models import PincodeCentroid
+
+logger = logging.getLogger(__name__)
+
+# Nearest approved doctors by pincode. Every doctor is placed at their
+# pincode's centroid, and points live on the unit sphere (x, y, z) so plain
+# Euclidean distance in a 3-d KD-tree orders neighbours exactly like
+# great-circle distance.
+#
+# Address changes don't rebuild the tree: a changed doctor is tombstoned in
+# the tree and kept in a small delta that queries scan linearly, until the
+# delta grows past REBUILD_THRESHOLD.
+
+BUNDLED_CENTROIDS = Path(__file__).resolve().parent / 'data' / 'pincode_centroids.csv'
+EARTH_RADIUS_KM = 6371.0088
+REBUILD_THRESHOLD = 64
+MAX_NEAREST = 50
+PINCODE_RE = re.compile(r'^[1-9]\d{5}$')
+
+
+def normalize_pincode(value):
+    pincode = re.sub(r'\s', '', value or '')
+    return pincode if PINCODE_RE.match(pincode) else None
+
+
+def read_centroids(path):
+    """
+    {pincode: (latitude, longitude)} from a CSV with pincode, latitude and
+    longitude columns (any case). Pincodes listed once per post office, as in
+    the India Post directory, are averaged into one centroid.
+    """
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    with open(path, newline='', encoding='utf-8-sig') as fileobj:
+        reader = csv.DictReader(fileobj)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+        missing = {'pincode', 'latitude', 'longitude'} - fields.keys()
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+        for row in reader:
+            pincode = normalize_pincode(row[fields['pincode']])
+            try:
+                latitude = float(row[fields['latitude']])
+                longitude = float(row[fields['longitude']])
+            except (TypeError, ValueError):
+                continue
+            if pincode is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                continue
+            entry = sums[pincode]
+            entry[0] += latitude
+            entry[1] += longitude
+            entry[2] += 1
+    return {pincode: (lat / count, lon / count) for pincode, (lat, lon, count) in sums.items()}
+
+
+def to_xyz(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(squared_chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class KDTree:
+    """Static 3-d KD-tree stored implicitly in one list of (x, y, z, key)."""
+
+    def __init__(self, points):
+        self.points = list(points)
+        self._build(0, len(self.points), 0)
+
+    def _build(self, lo, hi, axis):
+        if hi - lo <= 1:
+            return
+        self.points[lo:hi] = sorted(self.points[lo:hi], key=itemgetter(axis))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, (axis + 1) % 3)
+        self._build(mid + 1, hi, (axis + 1) % 3)
+
+    def nearest(self, target, k, accept=None):
+        """Up to ``k`` (squared distance, key) pairs nearest to ``target``, nearest first."""
+        heap = []
+        points = self.points
+
+        def visit(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = points[mid]
+            if accept is None or accept(point[3]):
+                distance = (
+                    (point[0] - target[0]) ** 2
+                    + (point[1] - target[1]) ** 2
+                    + (point[2] - target[2]) ** 2
+                )
+                if len(heap) < k:
+                    heapq.heappush(heap, (-distance, point[3]))
+                elif distance < -heap[0][0]:
+                    heapq.heapreplace(heap, (-distance, point[3]))
+
+            diff = target[axis] - point[axis]
+            next_axis = (axis + 1) % 3
+            if diff < 0:
+                near, far = (lo, mid), (mid + 1, hi)
+            else:
+                near, far = (mid + 1, hi), (lo, mid)
+            visit(near[0], near[1], next_axis)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far[0], far[1], next_axis)
+
+        if k > 0:
+            visit(0, len(points), 0)
+        return sorted((-distance, key) for distance, key in heap)
+
+
+def _doctor_rows(doctor_ids=None):
+    doctors = Doctor.objects.filter(is_approved=True, user__is_active=True)
+    if doctor_ids is not None:
+        doctors = doctors.filter(id__in=doctor_ids)
+    return doctors.values_list('id', 'pincode', 'specialization')
+
+
+class GeoIndex:
+    """
+    Immutable KD-tree of approved doctors plus the pending address changes.
+    with_changes() returns a new index, so readers never see a half update.
+    """
+
+    def __init__(self, centroids, entries, tree, delta=None, tombstones=frozenset()):
+        self.centroids = centroids
+        self.entries = entries
+        self.tree = tree
+        self.delta = delta or {}
+        self.tombstones = tombstones
+
+    @classmethod
+    def build(cls, centroids=None):
+        if centroids is None:
+            centroids = {
+                pincode: (latitude, longitude)
+                for pincode, latitude, longitude in
+                PincodeCentroid.objects.values_list('pincode', 'latitude', 'longitude').iterator(chunk_size=5000)
+            }
+        entries = {}
+        for doctor_id, pincode, specialization in _doctor_rows().iterator(chunk_size=2000):
+            entry = cls._entry(centroids, pincode, specialization)
+            if entry:
+                entries[doctor_id] = entry
+        tree = KDTree((*xyz, doctor_id) for doctor_id, (xyz, _) in entries.items())
+        return cls(centroids, entries, tree)
+
+    @staticmethod
+    def _entry(centroids, pincode, specialization):
+        location = centroids.get(normalize_pincode(pincode))
+        if location is None:
+            return None
+        return to_xyz(*location), (specialization or '').strip().lower()
+
+    def with_changes(self, doctor_ids):
+        """Re-read ``doctor_ids`` and fold their new locations into the delta."""
+        rows = {doctor_id: (pincode, specialization) for doctor_id, pincode, specialization in _doctor_rows(doctor_ids)}
+        entries = dict(self.entries)
+        delta = dict(self.delta)
+        tombstones = set(self.tombstones)
+        changed = False
+        for doctor_id in doctor_ids:
+            row = rows.get(doctor_id)
+            entry = self._entry(self.centroids, *row) if row else None
+            if entries.get(doctor_id) == entry:
+                continue
+            changed = True
+            tombstones.add(doctor_id)
+            if entry:
+                entries[doctor_id] = entry
+                delta[doctor_id] = entry
+            else:
+                entries.pop(doctor_id, None)
+                delta.pop(doctor_id, None)
+
+        if not changed:
+            return self
+        if len(delta) + len(tombstones) > REBUILD_THRESHOLD:
+            tree = KDTree((*xyz, doctor_id) for doctor_id, (xyz, _) in entries.items())
+            return GeoIndex(self.centroids, entries, tree)
+        return GeoIndex(self.centroids, entries, self.tree, delta, frozenset(tombstones))
+
+    def locate(self, pincode):
+        return self.centroids.get(normalize_pincode(pincode))
+
+    def nearest(self, latitude, longitude, k=10, specialization=None):
+        """[(doctor_id, distance_km)] for the ``k`` nearest doctors, nearest first."""
+        target = to_xyz(latitude, longitude)
+        specialization = (specialization or '').strip().lower()
+        entries = self.entries
+        tombstones = self.tombstones
+
+        def accept(doctor_id):
+            if doctor_id in tombstones:
+                return False
+            return not specialization or entries[doctor_id][1] == specialization
+
+        found = self.tree.nearest(target, k, accept)
+        for doctor_id, (xyz, doctor_specialization) in self.delta.items():
+            if specialization and doctor_specialization != specialization:
+                continue
+            distance = sum((a - b) ** 2 for a, b in zip(xyz, target))
+            found.append((distance, doctor_id))
+        found.sort()
+        return [(doctor_id, chord_to_km(distance)) for distance, doctor_id in found[:k]]
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = GeoIndex.build()
+    return _index
+
+
+def update_index(doctor_ids=None):
+    """Apply doctor changes to this process's index; None means rebuild everything."""
+    global _index
+    if _index is None:
+        return
+    if doctor_ids is None:
+        _index = GeoIndex.build()
+    elif doctor_ids:
+        _index = _index.with_changes(doctor_ids)
+    logger.info(f"Doctor geo index updated: {len(_index.entries)} doctors, {len(_index.delta)} pending")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from appointments.directory import publish_directory_change
+from appointments.geo import BUNDLED_CENTROIDS, read_centroids
+from appointments.models import PincodeCentroid
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads pincode centroids used by the nearest-doctor lookup from a CSV with pincode, '
+        'latitude and longitude columns (e.g. the India Post pincode directory; offices '
+        'sharing a pincode are averaged). Defaults to the bundled file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(BUNDLED_CENTROIDS),
+                            help='CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows written per statement')
+
+    def handle(self, *args, **options):
+        try:
+            centroids = read_centroids(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        rows = [
+            PincodeCentroid(pincode=pincode, latitude=latitude, longitude=longitude)
+            for pincode, (latitude, longitude) in centroids.items()
+        ]
+        with transaction.atomic():
+            PincodeCentroid.objects.bulk_create(
+                rows,
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['pincode'],
+                update_fields=['latitude', 'longitude'],
+            )
+            # Every worker's geo index reloads the centroids.
+            publish_directory_change()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Imported {len(rows)} pincode centroids"))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2025-11-26 11:20
+
+import csv
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Loading is inlined so later changes to appointments.geo can't alter this migration.
+BUNDLED_CENTROIDS = Path(__file__).resolve().parent.parent / 'data' / 'pincode_centroids.csv'
+PINCODE_RE = re.compile(r'^[1-9]\d{5}$')
+
+
+def read_centroids(path):
+    """{pincode: (latitude, longitude)}, averaging pincodes listed once per post office."""
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    with open(path, newline='', encoding='utf-8-sig') as fileobj:
+        for row in csv.DictReader(fileobj):
+            row = {(name or '').strip().lower(): value for name, value in row.items()}
+            pincode = re.sub(r'\s', '', row.get('pincode') or '')
+            try:
+                latitude = float(row.get('latitude'))
+                longitude = float(row.get('longitude'))
+            except (TypeError, ValueError):
+                continue
+            if not PINCODE_RE.match(pincode) or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                continue
+            entry = sums[pincode]
+            entry[0] += latitude
+            entry[1] += longitude
+            entry[2] += 1
+    return {pincode: (lat / count, lon / count) for pincode, (lat, lon, count) in sums.items()}
+
+
+def load_bundled_centroids(apps, schema_editor):
+    PincodeCentroid = apps.get_model('appointments', 'PincodeCentroid')
+    PincodeCentroid.objects.bulk_create(
+        [
+            PincodeCentroid(pincode=pincode, latitude=latitude, longitude=longitude)
+            for pincode, (latitude, longitude) in read_centroids(BUNDLED_CENTROIDS).items()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_appointmentevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PincodeCentroid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=6, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'ordering': ['pincode'],
+            },
+        ),
+        migrations.RunPython(load_bundled_centroids, migrations.RunPython.noop),
+    ]
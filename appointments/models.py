@@ -1,6 +1,11 @@
-from django.db import models
+import logging
+
+from django.db import models, transaction
+from django.db.models import Q
 from Authapi.models import Doctor, Patient
 
+logger = logging.getLogger(__name__)
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -48,4 +53,104 @@ class Appointment(models.Model):
         verbose_name_plural = 'Appointments'
     
     def __str__(self):
-        return f"{self.patient.get_full_name()} with Dr. {self.doctor.get_full_name()} on {self.appointment_date}"
\ No newline at end of file
+        return f"{self.patient.get_full_name()} with Dr. {self.doctor.get_full_name()} on {self.appointment_date}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        if 'patient_id' in field_names:
+            instance._loaded_patient_id = instance.patient_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Every create or status change writes an AppointmentEvent in the same
+        transaction; side effects (chat, notifications, queue updates) are
+        handled from the outbox by appointments.events. Any save drops the
+        patient's cached dashboard overview as soon as it commits.
+        """
+        from patient_dashboard.overview import invalidate_overviews
+
+        created = self._state.adding
+        previous = getattr(self, '_loaded_status', None)
+        update_fields = kwargs.get('update_fields')
+        status_saved = update_fields is None or 'status' in update_fields
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_saved and (created or previous != self.status):
+                AppointmentEvent.record(self, None if created else previous)
+            invalidate_overviews({self.patient_id, getattr(self, '_loaded_patient_id', self.patient_id)})
+
+        if status_saved:
+            self._loaded_status = self.status
+        self._loaded_patient_id = self.patient_id
+
+    def delete(self, *args, **kwargs):
+        from patient_dashboard.overview import invalidate_overviews
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            invalidate_overviews([self.patient_id])
+        return result
+
+
+class AppointmentEvent(models.Model):
+    """Transactional outbox of appointment status transitions."""
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    from_status = models.CharField(max_length=20, null=True, blank=True)
+    to_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=Q(processed_at__isnull=True),
+                name='appointment_event_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Appointment {self.appointment_id}: {self.from_status or 'new'} -> {self.to_status}"
+
+    @classmethod
+    def record(cls, appointment, from_status):
+        event = cls.objects.create(
+            appointment=appointment,
+            from_status=from_status,
+            to_status=appointment.status
+        )
+        transaction.on_commit(lambda: enqueue_events([event.id]))
+        return event
+
+
+def enqueue_events(event_ids):
+    from appointments.tasks import process_appointment_events
+    try:
+        process_appointment_events.delay(event_ids)
+    except Exception as e:
+        # The periodic sweep picks the events up once the broker is back.
+        logger.error(f"Failed to enqueue appointment events {event_ids}: {e}")
+
+class PincodeCentroid(models.Model):
+    """Approximate location of an Indian postal code, for nearest-doctor lookups."""
+    pincode = models.CharField(max_length=6, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        ordering = ['pincode']
+
+    def __str__(self):
+        return f"{self.pincode} ({self.latitude:.4f}, {self.longitude:.4f})"
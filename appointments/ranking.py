@@ -0,0 +1,228 @@
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from Authapi.models import Doctor
+from medtrax.redis_client import get_redis
+from . import availability
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+# Doctor recommendations. A batch job scores every approved doctor at once
+# with numpy and stores the top SEGMENT_SIZE per segment in Redis, where a
+# segment is a (city, specialization) pair, either side possibly ANY. A
+# request reads one segment and re-ranks it for the patient's history.
+#
+# Each run writes a new generation of keys and then moves CURRENT_KEY to
+# it, so readers never mix two runs; old generations simply expire. If the
+# current one expires too (beat stopped), the first reader to notice queues
+# a run and requests fall back to directory order until it lands.
+
+KEY_PREFIX = 'doctor_rank'
+CURRENT_KEY = f'{KEY_PREFIX}:current'
+REBUILD_LOCK_KEY = f'{KEY_PREFIX}:rebuilding'
+REBUILD_LOCK_TTL = 300
+ANY = '*'
+SEGMENT_SIZE = 200
+MAX_EXPERIENCE_YEARS = 30
+
+WEIGHTS = {
+    'rating': 0.45,
+    'volume': 0.15,
+    'availability': 0.3,
+    'experience': 0.1,
+}
+# Per-patient re-rank
+VISITED_BOOST = 0.2
+SPECIALIZATION_AFFINITY_BOOST = 0.1
+
+
+def _segment(value):
+    return (value or '').strip().lower()
+
+
+def _segment_key(generation, city, specialization):
+    return f"{KEY_PREFIX}:{generation}:{city}:{specialization}"
+
+
+def compute_scores():
+    """
+    Score all approved, active doctors. Returns (rows, scores, rating_mean,
+    rating_count) where rows are (id, city, specialization) and the rest are
+    arrays aligned with them.
+    """
+    doctors = list(
+        Doctor.objects.filter(is_approved=True, user__is_active=True)
+        .order_by('id')
+        .values_list('id', 'city', 'specialization', 'years_of_experience', 'rating_sum', 'rating_count')
+    )
+    if not doctors:
+        return [], np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    ids = [doctor[0] for doctor in doctors]
+    total = np.array([doctor[4] for doctor in doctors], dtype=np.float64)
+    count = np.array([doctor[5] for doctor in doctors], dtype=np.int64)
+
+    # Bayesian average: every doctor starts with RANKING_RATING_PRIOR reviews
+    # at the site-wide mean, so three 5-star reviews don't outrank a hundred 4.8s.
+    prior = settings.RANKING_RATING_PRIOR
+    site_mean = total.sum() / count.sum() if count.sum() else 3.0
+    bayesian = (prior * site_mean + total) / (prior + count)
+    rating_mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+
+    rating_score = (bayesian - 1) / 4
+    volume_score = np.log1p(count) / np.log1p(count.max()) if count.max() else np.zeros(len(ids))
+
+    dates = availability.horizon(days=settings.RANKING_AVAILABILITY_DAYS)
+    masks = availability.get_masks(ids, dates)
+    booked = np.array([[masks[day][doctor_id] for doctor_id in ids] for day in dates], dtype=np.uint32).reshape(len(dates), len(ids))
+    free = np.bitwise_count(~booked & availability.FULL_MASK).sum(axis=0)
+    availability_score = free / max(len(availability.SLOT_TIMES) * len(dates), 1)
+
+    years = np.array([doctor[3] or 0 for doctor in doctors], dtype=np.float64)
+    experience_score = np.clip(years, 0, MAX_EXPERIENCE_YEARS) / MAX_EXPERIENCE_YEARS
+
+    scores = (
+        WEIGHTS['rating'] * rating_score
+        + WEIGHTS['volume'] * volume_score
+        + WEIGHTS['availability'] * availability_score
+        + WEIGHTS['experience'] * experience_score
+    )
+    rows = [(doctor_id, _segment(city), _segment(specialization)) for doctor_id, city, specialization, *_ in doctors]
+    return rows, scores, rating_mean, count
+
+
+def rebuild():
+    """Recompute every segment and publish them as a new generation. Returns it."""
+    rows, scores, rating_mean, rating_count = compute_scores()
+
+    segments = defaultdict(list)
+    # Always written, even empty: its absence marks an expired generation.
+    segments[ANY, ANY] = []
+    for index, (_, city, specialization) in enumerate(rows):
+        segments[ANY, ANY].append(index)
+        if city:
+            segments[city, ANY].append(index)
+        if specialization:
+            segments[ANY, specialization].append(index)
+        if city and specialization:
+            segments[city, specialization].append(index)
+
+    generation = int(time.time() * 1000)
+    ttl = settings.RANKING_TTL
+    redis = get_redis()
+    with redis.pipeline(transaction=False) as pipe:
+        for (city, specialization), members in segments.items():
+            members = np.asarray(members, dtype=np.intp)
+            top = members[np.argsort(-scores[members], kind='stable')[:SEGMENT_SIZE]]
+            payload = [
+                [
+                    rows[index][0],
+                    round(float(scores[index]), 4),
+                    round(float(rating_mean[index]), 2) if rating_count[index] else None,
+                    int(rating_count[index]),
+                ]
+                for index in top
+            ]
+            pipe.set(_segment_key(generation, city, specialization), json.dumps(payload, separators=(',', ':')), ex=ttl)
+        pipe.execute()
+    redis.set(CURRENT_KEY, generation, ex=ttl)
+    redis.delete(REBUILD_LOCK_KEY)
+
+    logger.info(f"Ranked {len(rows)} doctors into {len(segments)} segments (generation {generation})")
+    return generation
+
+
+def _request_rebuild(redis):
+    """Queue one ranking run, however many requests find the rankings missing."""
+    if not redis.set(REBUILD_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_TTL):
+        return
+    from .tasks import rank_doctors
+    try:
+        rank_doctors.delay()
+    except Exception as e:
+        logger.error(f"Failed to queue doctor ranking: {e}")
+        redis.delete(REBUILD_LOCK_KEY)
+
+
+def _candidates(city, specialization):
+    """
+    Stored [doctor_id, score, rating_mean, rating_count] rows for the
+    narrowest segment that has doctors, or None when no ranking is available.
+    """
+    redis = get_redis()
+    generation = redis.get(CURRENT_KEY)
+    if generation is None:
+        _request_rebuild(redis)
+        return None
+    if isinstance(generation, bytes):
+        generation = generation.decode()
+
+    city, specialization = _segment(city), _segment(specialization)
+    if specialization:
+        chain = [(city, specialization), (ANY, specialization)]
+    else:
+        chain = [(city, ANY), (ANY, ANY)]
+    keys = [_segment_key(generation, *segment) for segment in chain if segment[0]]
+    *payloads, everyone = redis.mget([*keys, _segment_key(generation, ANY, ANY)])
+    if everyone is None:
+        _request_rebuild(redis)
+        return None
+    for payload in payloads:
+        if payload:
+            return json.loads(payload)
+    return []
+
+
+def _directory_candidates(snapshot, city, specialization):
+    """Unranked stand-in for _candidates, in directory order."""
+    _, rows, _ = snapshot.query(city=city, specialization=specialization, approved=True, limit=SEGMENT_SIZE)
+    if not rows and city:
+        _, rows, _ = snapshot.query(specialization=specialization, approved=True, limit=SEGMENT_SIZE)
+    return [[row['id'], 0.0, row['average_rating'], row['rating_count']] for row in rows]
+
+
+def recommend(patient, snapshot, specialization=None, limit=10):
+    """
+    Top ``limit`` doctors for ``patient``, as directory rows with their score
+    and rating. The stored segment order is nudged towards doctors the patient
+    has seen before and specializations they visit most.
+    """
+    visits = Counter()
+    specializations = Counter()
+    for doctor_id, doctor_specialization in Appointment.objects.filter(
+        patient=patient, status='completed'
+    ).values_list('doctor_id', 'doctor__specialization'):
+        visits[doctor_id] += 1
+        specializations[_segment(doctor_specialization)] += 1
+    total_visits = sum(visits.values())
+
+    candidates = _candidates(patient.city, specialization)
+    if candidates is None:
+        candidates = _directory_candidates(snapshot, patient.city, specialization)
+
+    ranked = []
+    for doctor_id, score, rating_mean, rating_count in candidates:
+        row = snapshot.row(doctor_id)
+        if row is None:
+            continue
+        score += VISITED_BOOST * min(visits[doctor_id], 3) / 3
+        if total_visits:
+            score += SPECIALIZATION_AFFINITY_BOOST * specializations[_segment(row['specialization'])] / total_visits
+        ranked.append((score, doctor_id, row, rating_mean, rating_count))
+
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return [
+        {
+            **row,
+            'score': round(score, 4),
+            'rating': {'average': rating_mean, 'count': rating_count},
+            'previously_visited': doctor_id in visits,
+        }
+        for score, doctor_id, row, rating_mean, rating_count in ranked[:limit]
+    ]
@@ -123,6 +123,8 @@ class DoctorListSerializer(serializers.ModelSerializer):
             'qualification',
             'years_of_experience',
             'phone_number',
+            'average_rating',
+            'rating_count',
         ]
     
     def get_full_name(self, obj):
@@ -0,0 +1,52 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from patient_dashboard.overview import invalidate_overviews
+from .models import Appointment, AppointmentEvent, enqueue_events
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_transition(queryset, to_status, chunk_size=1000):
+    """
+    Move every appointment in ``queryset`` to ``to_status`` with set-based
+    UPDATEs and record one outbox event per changed row, all in one
+    transaction. Side effects (chat rooms, notifications, queue broadcasts)
+    run from the outbox in batches. Returns the number of appointments changed.
+    """
+    if to_status not in dict(Appointment.STATUS_CHOICES):
+        raise ValueError(f"Unknown appointment status '{to_status}'")
+
+    with transaction.atomic():
+        rows = list(
+            Appointment.objects
+            .filter(id__in=queryset.values('id'))
+            .exclude(status=to_status)
+            .select_for_update()
+            .order_by('id')
+            .values_list('id', 'status', 'patient_id')
+        )
+        if not rows:
+            return 0
+
+        now = timezone.now()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            Appointment.objects.filter(id__in=[appointment_id for appointment_id, _, _ in chunk]).update(
+                status=to_status,
+                updated_at=now
+            )
+            AppointmentEvent.objects.bulk_create([
+                AppointmentEvent(appointment_id=appointment_id, from_status=status, to_status=to_status)
+                for appointment_id, status, _ in chunk
+            ])
+
+        # A sweep rather than a list of ids: the processor pages through
+        # pending events itself, so the task payload stays small.
+        transaction.on_commit(lambda: enqueue_events(None))
+        invalidate_overviews({patient_id for _, _, patient_id in rows})
+
+    logger.info(f"Moved {len(rows)} appointment(s) to {to_status}")
+    return len(rows)
@@ -1,36 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from appointments.models import Appointment
-from chat_room.models import ChatRoom
 
+from Authapi.models import CustomUser, Doctor
+from .directory import publish_directory_change
 
-@receiver(post_save, sender=Appointment)
-def create_chat_room_for_appointment(sender, instance, created, **kwargs):
-    if instance.status != 'confirmed':
-        return
-    existing_room = ChatRoom.objects.filter(
-        room_type='patient_doctor',
-        participants=instance.patient.user,
-        is_active=True
-    ).filter(
-        participants=instance.doctor.user
-    ).first()
-
-    if existing_room:
-        instance.chat_room = existing_room
-        instance.save(update_fields=['chat_room'])
-        print(f"Reusing existing chat room {existing_room.id} for appointment {instance.id}")
-        return
 
-    chat_room = ChatRoom.objects.create(
-        room_type='patient_doctor',
-        is_active=True,
-        appointment=instance
-    )
+@receiver([post_save, post_delete], sender=Doctor)
+def doctor_changed(sender, instance, **kwargs):
+    publish_directory_change(instance.id)
 
-    chat_room.participants.add(
-        instance.patient.user,
-        instance.doctor.user
-    )
 
-    print(f"Created new chat room {chat_room.id} for appointment {instance.id}")
\ No newline at end of file
+@receiver(post_save, sender=CustomUser)
+def doctor_user_changed(sender, instance, update_fields=None, **kwargs):
+    # is_active decides directory membership; login's last_login update doesn't matter.
+    if instance.role != 'doctor' or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    publish_directory_change()
@@ -1,7 +1,8 @@
 from django.utils import timezone
 from datetime import timedelta
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.conf import settings
+from django.db.models import Q
 from .models import Appointment
 import logging
 from celery import shared_task
@@ -167,7 +168,7 @@ def send_immediate_appointment_notification(appointment_id, notification_type='c
         logger.error(f"Error sending {notification_type} notification: {str(e)}")
         return False
 
-def send_appointment_created_notification(appointment):
+def send_appointment_created_notification(appointment, connection=None):
 
     patient_email = appointment.patient.user.email
     doctor_email = appointment.doctor.user.email
@@ -192,6 +193,7 @@ Medtrax Team
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[patient_email],
         fail_silently=True,
+        connection=connection,
     )
 
     send_mail(
@@ -214,10 +216,11 @@ Medtrax Team
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[doctor_email],
         fail_silently=True,
+        connection=connection,
     )
 
 @shared_task
-def send_appointment_confirmed_notification(appointment):
+def send_appointment_confirmed_notification(appointment, connection=None):
 
     send_mail(
         subject=f"Appointment Confirmed - Dr. {appointment.doctor.user.get_full_name()}",
@@ -238,10 +241,11 @@ Medtrax Team
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[appointment.patient.user.email],
         fail_silently=True,
+        connection=connection,
     )
 
 @shared_task
-def send_appointment_cancelled_notification(appointment):
+def send_appointment_cancelled_notification(appointment, connection=None):
 
     message_base = f"""
 Your appointment has been CANCELLED.
@@ -263,6 +267,7 @@ Medtrax Team
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[appointment.patient.user.email],
         fail_silently=True,
+        connection=connection,
     )
 
     send_mail(
@@ -271,31 +276,71 @@ Medtrax Team
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[appointment.doctor.user.email],
         fail_silently=True,
+        connection=connection,
     )
 
+@shared_task
+def send_appointment_notifications(appointment_ids, notification_type):
+    """
+    Batched form of send_immediate_appointment_notification used by the
+    outbox processor: one query for the whole batch and one SMTP connection
+    for all of its mail.
+    """
+    senders = {
+        'created': send_appointment_created_notification,
+        'confirmed': send_appointment_confirmed_notification,
+        'cancelled': send_appointment_cancelled_notification,
+    }
+    appointments = Appointment.objects.filter(id__in=appointment_ids).select_related(
+        'doctor__user', 'patient__user'
+    )
+
+    sent_count = 0
+    with get_connection(fail_silently=True) as connection:
+        for appointment in appointments:
+            try:
+                senders[notification_type](appointment, connection=connection)
+                sent_count += 1
+            except Exception as e:
+                logger.error(f"Error sending {notification_type} notification for appointment {appointment.id}: {str(e)}")
+
+    logger.info(f"Sent {sent_count} {notification_type} notifications")
+    return sent_count
+
 @shared_task
 def auto_complete_appointments():
     from django.utils import timezone
     from datetime import timedelta
+    from appointments.services import bulk_transition
     
-    now = timezone.now()
-    cutoff_time = now - timedelta(minutes=30)
-    
-    expired_appointments = Appointment.objects.filter(
-        appointment_date__lte=now.date(), 
-        status='confirmed'
+    now = timezone.localtime()
+    cutoff = now - timedelta(minutes=30)
+
+    # Confirmed appointments whose slot started at least 30 minutes ago
+    expired_appointments = Appointment.objects.filter(status='confirmed').filter(
+        Q(appointment_date__lt=cutoff.date()) |
+        Q(appointment_date=cutoff.date(), appointment_time__lte=cutoff.time())
     )
 
-    completed_count = 0
-    for appointment in expired_appointments:
-        appointment_datetime = timezone.make_aware(
-            timezone.datetime.combine(appointment.appointment_date, appointment.appointment_time)
-        )
-        if appointment_datetime + timedelta(minutes=30) <= now:
-            appointment.status = 'completed'
-            appointment.save()
-            completed_count += 1
-            logger.info(f"Auto-completed appointment {appointment.id}")
+    completed_count = bulk_transition(expired_appointments, 'completed')
     
     logger.info(f"Auto-completed {completed_count} appointments")
-    return f"Completed {completed_count} appointments"
\ No newline at end of file
+    return f"Completed {completed_count} appointments"
+
+@shared_task
+def process_appointment_events(event_ids=None):
+    """Run side effects for appointment transitions from the outbox. Also swept by beat."""
+    from appointments.events import process_events
+    return process_events(event_ids)
+
+@shared_task
+def rebuild_slot_availability():
+    """Nightly full rebuild of the cross-doctor slot index; also rolls the horizon forward."""
+    from appointments.availability import rebuild
+    return rebuild()
+
+@shared_task
+def rank_doctors():
+    """Recompute the per-segment doctor recommendations."""
+    from appointments.ranking import rebuild
+    return rebuild()
@@ -1,3 +1,128 @@
-from django.test import TestCase
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from Authapi.models import Doctor
+from Authapi.testing import make_doctor
+from . import geo
+from .geo import GeoIndex, KDTree, to_xyz
+
+CENTROIDS = {
+    '110001': (28.6328, 77.2197),  # New Delhi
+    '122001': (28.4595, 77.0266),  # Gurugram
+    '400001': (18.9388, 72.8354),  # Mumbai
+    '560001': (12.9716, 77.5946),  # Bengaluru
+}
+
+
+class KDTreeTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.points = [
+            (*to_xyz(rng.uniform(-60, 60), rng.uniform(-180, 180)), key)
+            for key in range(300)
+        ]
+        self.tree = KDTree(self.points)
+
+    def brute_force(self, target, k, accept=None):
+        found = [
+            (sum((a - b) ** 2 for a, b in zip(point[:3], target)), point[3])
+            for point in self.points
+            if accept is None or accept(point[3])
+        ]
+        return sorted(found)[:k]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(11)
+        for _ in range(25):
+            target = to_xyz(rng.uniform(-60, 60), rng.uniform(-180, 180))
+            for k in (1, 5, 20):
+                self.assertEqual(
+                    [key for _, key in self.tree.nearest(target, k)],
+                    [key for _, key in self.brute_force(target, k)],
+                )
+
+    def test_accept_filters_candidates(self):
+        target = to_xyz(20, 78)
+
+        def even(key):
+            return key % 2 == 0
+
+        result = self.tree.nearest(target, 10, even)
+        self.assertEqual(len(result), 10)
+        self.assertTrue(all(key % 2 == 0 for _, key in result))
+        self.assertEqual(result, self.brute_force(target, 10, even))
+
+    def test_edge_cases(self):
+        self.assertEqual(KDTree([]).nearest(to_xyz(0, 0), 3), [])
+        self.assertEqual(self.tree.nearest(to_xyz(0, 0), 0), [])
+        self.assertEqual(len(self.tree.nearest(to_xyz(0, 0), 1000)), len(self.points))
+
+
+class GeoIndexTests(TestCase):
+
+    def setUp(self):
+        self.delhi = self.located_doctor('delhi', '110001')
+        self.gurugram = self.located_doctor('gurugram', '122001', specialization='Dermatology')
+        self.mumbai = self.located_doctor('mumbai', '400 001')
+        self.located_doctor('pending', '110001', is_approved=False)
+        self.located_doctor('nowhere', '999999')
+        self.index = GeoIndex.build(CENTROIDS)
+
+    def located_doctor(self, name, pincode, **fields):
+        return make_doctor(name, pincode=pincode, **{'specialization': 'Cardiology', 'is_approved': True, **fields})
+
+    def nearest_ids(self, index, pincode, **kwargs):
+        return [doctor_id for doctor_id, _ in index.nearest(*CENTROIDS[pincode], **kwargs)]
+
+    def test_build_skips_unapproved_and_unknown_pincodes(self):
+        self.assertEqual(set(self.index.entries), {self.delhi.id, self.gurugram.id, self.mumbai.id})
+
+    def test_nearest_orders_by_distance(self):
+        result = self.index.nearest(*CENTROIDS['110001'], k=3)
+        self.assertEqual([doctor_id for doctor_id, _ in result], [self.delhi.id, self.gurugram.id, self.mumbai.id])
+        self.assertAlmostEqual(result[0][1], 0, places=3)
+        # Delhi to Gurugram is about 27 km as the crow flies.
+        self.assertAlmostEqual(result[1][1], 27, delta=3)
+
+    def test_nearest_filters_specialization(self):
+        self.assertEqual(
+            self.nearest_ids(self.index, '110001', k=5, specialization='dermatology'),
+            [self.gurugram.id],
+        )
+
+    def test_with_changes_moves_doctor(self):
+        Doctor.objects.filter(id=self.mumbai.id).update(pincode='122001')
+        changed = self.index.with_changes([self.mumbai.id])
+
+        self.assertIsNot(changed, self.index)
+        self.assertIn(self.mumbai.id, changed.delta)
+        self.assertIn(self.mumbai.id, changed.tombstones)
+        self.assertEqual(self.nearest_ids(changed, '122001', k=2), [self.gurugram.id, self.mumbai.id])
+        self.assertEqual(self.nearest_ids(changed, '400001', k=1), [self.gurugram.id])
+        # The original index is untouched.
+        self.assertEqual(self.nearest_ids(self.index, '400001', k=1), [self.mumbai.id])
+
+    def test_with_changes_removes_unapproved_doctor(self):
+        Doctor.objects.filter(id=self.delhi.id).update(is_approved=False)
+        changed = self.index.with_changes([self.delhi.id])
+        self.assertNotIn(self.delhi.id, changed.entries)
+        self.assertNotIn(self.delhi.id, self.nearest_ids(changed, '110001', k=5))
+
+    def test_with_changes_adds_new_doctor(self):
+        bengaluru = self.located_doctor('bengaluru', '560001')
+        changed = self.index.with_changes([bengaluru.id])
+        self.assertEqual(self.nearest_ids(changed, '560001', k=1), [bengaluru.id])
+
+    def test_with_changes_without_changes_returns_same_index(self):
+        self.assertIs(self.index.with_changes([self.delhi.id]), self.index)
+
+    def test_with_changes_rebuilds_past_threshold(self):
+        Doctor.objects.filter(id=self.mumbai.id).update(pincode='560001')
+        with mock.patch.object(geo, 'REBUILD_THRESHOLD', 1):
+            changed = self.index.with_changes([self.mumbai.id])
+        self.assertEqual(changed.delta, {})
+        self.assertEqual(changed.tombstones, frozenset())
+        self.assertEqual(self.nearest_ids(changed, '560001', k=1), [self.mumbai.id])
@@ -7,6 +7,8 @@ from .views import (
     DoctorAcceptAppointmentView,
     DoctorRejectAppointmentView,
     AvailableDoctorsListView,
+    NearbyDoctorsView,
+    RecommendedDoctorsView,
     DoctorAvailableSlotsView,
     DoctorDashboardStatsView,
     PatientDashboardStatsView,
@@ -19,7 +21,9 @@ urlpatterns = [
     # Patient endpoints
     path('patient/book/', PatientBookAppointmentView.as_view(), name='patient-book-appointment'),
     path('patient/list/', PatientAppointmentListView.as_view(), name='patient-appointments-list'),
+    path('patient/recommended-doctors/', RecommendedDoctorsView.as_view(), name='patient-recommended-doctors'),
     path('doctors/available/', AvailableDoctorsListView.as_view(), name='available-doctors'),
+    path('doctors/nearby/', NearbyDoctorsView.as_view(), name='nearby-doctors'),
     path('doctors/<int:doctor_id>/available-slots/', DoctorAvailableSlotsView.as_view(), name='doctor-available-slots'),
     
     # Doctor endpoints
@@ -1,9 +1,21 @@
 from django.utils import timezone
 from .models import Appointment
+from .availability import BOOKED_STATUSES, SLOT_TIMES
 from datetime import datetime, timedelta
 
 from django.utils import timezone
 from datetime import datetime, timedelta
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+
+def broadcast_queue_update(doctor):
+    channel_layer = get_channel_layer()
+    data = get_doctor_queue_info(doctor)
+    async_to_sync(channel_layer.group_send)(
+        f"doctor_{doctor.id}_queue",
+        {"type": "send_queue_update", "stream": f"queue:{doctor.id}", "data": data}
+    )
 
 def get_doctor_queue_info(doctor):
     now = timezone.localtime()
@@ -37,21 +49,12 @@ def get_doctor_queue_info(doctor):
 
 def get_available_slots(doctor, appointment_date):
 
-    start_hour = 9
-    end_hour = 17
-    slot_duration_minutes = 30
-    all_slots = []
-    current_time = datetime.strptime(f"{start_hour}:00", "%H:%M")
-    end_time = datetime.strptime(f"{end_hour}:00", "%H:%M")
-    
-    while current_time < end_time:
-        all_slots.append(current_time.strftime("%H:%M"))
-        current_time += timedelta(minutes=slot_duration_minutes)
+    all_slots = list(SLOT_TIMES)
 
     booked_appointments = Appointment.objects.filter(
         doctor=doctor,
         appointment_date=appointment_date,
-        status__in=['pending', 'confirmed']
+        status__in=BOOKED_STATUSES
     ).values_list('appointment_time', flat=True)
 
     booked_slots = set()
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from django.conf import settings
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
@@ -13,24 +14,17 @@ from .serializers import (
     DoctorAppointmentListSerializer
 )
 from Authapi.models import Doctor
-from datetime import datetime
+from Authapi.search import search_doctors
+from .directory import MAX_PAGE_SIZE as MAX_DIRECTORY_PAGE_SIZE, get_snapshot as get_directory_snapshot
+from .ranking import SEGMENT_SIZE as MAX_RECOMMENDATIONS
+from .geo import MAX_NEAREST as MAX_NEARBY_DOCTORS, get_index as get_geo_index, normalize_pincode
+from datetime import date, datetime
 from .utils import get_available_slots
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .utils import get_doctor_queue_info
-from appointments.tasks import send_immediate_appointment_notification
+from . import availability, ranking
 from appointments.throttles import AppointmentBookingThrottle, AppointmentActionsThrottle, DashboardThrottle
 
 
 
-def broadcast_queue_update(doctor):
-        channel_layer = get_channel_layer()
-        data = get_doctor_queue_info(doctor)
-        async_to_sync(channel_layer.group_send)(
-            f"doctor_{doctor.id}_queue",
-            {"type": "send_queue_update", "data": data}
-        )
-
 class PatientBookAppointmentView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [AppointmentBookingThrottle]
@@ -67,7 +61,6 @@ class PatientBookAppointmentView(APIView):
             
             if serializer.is_valid():
                 appointment = serializer.save(patient=patient, status='pending')
-                send_immediate_appointment_notification.delay(appointment.id, 'created')
                 
                 return Response(
                     {
@@ -197,9 +190,6 @@ class DoctorAcceptAppointmentView(APIView):
             appointment.status = 'confirmed'
             appointment.save()
             
-            broadcast_queue_update(doctor)
-            send_immediate_appointment_notification.delay(appointment.id, 'confirmed')
-            
             return Response(
                 {
                     "message": "Appointment accepted successfully",
@@ -264,8 +254,6 @@ class DoctorRejectAppointmentView(APIView):
             
             appointment.status = 'cancelled'
             appointment.save()
-            broadcast_queue_update(doctor)
-            send_immediate_appointment_notification.delay(appointment.id, 'cancelled')
             
             return Response(
                 {
@@ -282,30 +270,204 @@ class DoctorRejectAppointmentView(APIView):
             )
 
 
+def _slot_payload(slot):
+    if slot is None:
+        return None
+    day, time = slot
+    return {'date': day.isoformat(), 'time': time}
+
+
 class AvailableDoctorsListView(APIView):
     @swagger_auto_schema(
         operation_summary="Get list of available doctors",
-        operation_description="Retrieve all active doctors",
+        operation_description=(
+            "Page through active doctors with facet filters and counts, served from the in-process "
+            "directory snapshot. With q, results are search hits ranked by relevance."
+        ),
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search by name or specialization, best match first", type=openapi.TYPE_STRING),
+            openapi.Parameter('city', openapi.IN_QUERY, description="Only doctors in this city", type=openapi.TYPE_STRING),
+            openapi.Parameter('specialization', openapi.IN_QUERY, description="Only doctors with this specialization", type=openapi.TYPE_STRING),
+            openapi.Parameter('min_experience', openapi.IN_QUERY, description="Minimum years of experience", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('approved', openapi.IN_QUERY, description="Only approved (true) or unapproved (false) doctors", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('sort', openapi.IN_QUERY, description="'availability' to list doctors by earliest free slot; each result gets earliest_slot", type=openapi.TYPE_STRING),
+            openapi.Parameter('available_from', openapi.IN_QUERY, description="First date of the availability window (YYYY-MM-DD, default today)", type=openapi.TYPE_STRING),
+            openapi.Parameter('days', openapi.IN_QUERY, description=f"Length of the availability window in days (default 7, max {settings.AVAILABILITY_DAYS})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_slots', openapi.IN_QUERY, description="With sort=availability, add every free slot in the window as free_slots", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('page', openapi.IN_QUERY, description="Page number (default 1)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description=f"Results per page (max {MAX_DIRECTORY_PAGE_SIZE})", type=openapi.TYPE_INTEGER),
+        ],
         responses={
             200: openapi.Response(
-                description="List of available doctors",
+                description="Page of available doctors with facet counts",
                 schema=openapi.Schema(
-                    type=openapi.TYPE_ARRAY,
-                    items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'count': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'total_pages': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'current_page': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                        'facets': openapi.Schema(type=openapi.TYPE_OBJECT),
+                    }
                 )
+            ),
+            400: "Invalid filter or paging parameter"
+        },
+        tags=['Doctors']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            page = max(int(params.get('page', 1)), 1)
+            page_size = min(max(int(params.get('page_size', settings.DOCTOR_DIRECTORY_PAGE_SIZE)), 1), MAX_DIRECTORY_PAGE_SIZE)
+            min_experience = int(params['min_experience']) if params.get('min_experience') else None
+            days = min(max(int(params.get('days', 7)), 1), settings.AVAILABILITY_DAYS)
+        except ValueError:
+            return Response(
+                {'error': 'page, page_size, min_experience and days must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        sort = params.get('sort', '').strip()
+        if sort not in ('', 'availability'):
+            return Response({'error': "sort must be 'availability'"}, status=status.HTTP_400_BAD_REQUEST)
+        available_from = None
+        if params.get('available_from'):
+            try:
+                available_from = datetime.strptime(params['available_from'], "%Y-%m-%d").date()
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid available_from. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        approved = params.get('approved', '').strip().lower()
+        if approved not in ('', 'true', 'false', '1', '0'):
+            return Response({'error': 'approved must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+        approved = None if not approved else approved in ('true', '1')
+
+        # Only search hits cost a query; the listing itself is served from memory.
+        doctor_ids = None
+        q = params.get('q', '').strip()
+        if q:
+            hits = search_doctors(q, queryset=Doctor.objects.filter(user__is_active=True).only('id'), limit=100)
+            doctor_ids = [doctor.id for doctor in hits]
+
+        snapshot = get_directory_snapshot()
+        filters = {
+            'city': params.get('city', '').strip() or None,
+            'specialization': params.get('specialization', '').strip() or None,
+            'min_experience': min_experience,
+            'approved': approved,
+        }
+        offset = (page - 1) * page_size
+        if sort == 'availability':
+            # Earliest free slot per matching doctor from the Redis slot index:
+            # one pipelined round trip, however many doctors match.
+            total, matches, facets = snapshot.query(**filters, doctor_ids=doctor_ids, limit=len(snapshot))
+            earliest = availability.earliest_slots([row['id'] for row in matches], available_from, days)
+            never = (date.max, '')
+            matches.sort(key=lambda row: earliest.get(row['id'], never))
+            results = [
+                {**row, 'earliest_slot': _slot_payload(earliest.get(row['id']))}
+                for row in matches[offset:offset + page_size]
+            ]
+            if params.get('include_slots', '').strip().lower() in ('true', '1'):
+                window = availability.free_slots([row['id'] for row in results], available_from, days)
+                for row in results:
+                    row['free_slots'] = {
+                        day.isoformat(): slots for day, slots in window.get(row['id'], {}).items()
+                    }
+        else:
+            total, results, facets = snapshot.query(**filters, doctor_ids=doctor_ids, offset=offset, limit=page_size)
+
+        return Response({
+            'count': total,
+            'total_pages': (total + page_size - 1) // page_size,
+            'current_page': page,
+            'results': results,
+            'facets': facets
+        }, status=status.HTTP_200_OK)
+
+
+class NearbyDoctorsView(APIView):
+    @swagger_auto_schema(
+        operation_summary="Find the nearest doctors",
+        operation_description="The k approved doctors closest to a pincode, by distance between pincode centroids",
+        manual_parameters=[
+            openapi.Parameter('pincode', openapi.IN_QUERY, description="6-digit pincode to search from", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('k', openapi.IN_QUERY, description=f"Number of doctors (default 10, max {MAX_NEARBY_DOCTORS})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('specialization', openapi.IN_QUERY, description="Only doctors with this specialization", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(description="Nearest doctors with distance_km, nearest first"),
+            400: "Invalid pincode or k",
+            404: "Pincode not in the centroid dataset"
         },
         tags=['Doctors']
     )
     def get(self, request):
-        from .serializers import DoctorListSerializer
-        
-        doctors = Doctor.objects.filter(
-            user__is_active=True
-        ).select_related('user')
-        
-        serializer = DoctorListSerializer(doctors, many=True) 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        pincode = normalize_pincode(request.query_params.get('pincode'))
+        if not pincode:
+            return Response({'error': 'A valid 6-digit pincode is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = min(max(int(request.query_params.get('k', 10)), 1), MAX_NEARBY_DOCTORS)
+        except ValueError:
+            return Response({'error': 'k must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = get_directory_snapshot()
+        index = get_geo_index()
+        location = index.locate(pincode)
+        if location is None:
+            return Response({'error': 'Unknown pincode'}, status=status.HTTP_404_NOT_FOUND)
+
+        results = []
+        for doctor_id, distance in index.nearest(*location, k=k, specialization=request.query_params.get('specialization')):
+            row = snapshot.row(doctor_id)
+            if row is not None:
+                results.append({**row, 'distance_km': round(distance, 1)})
+
+        return Response({'pincode': pincode, 'results': results}, status=status.HTTP_200_OK)
+
+
+class RecommendedDoctorsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get recommended doctors for the patient",
+        operation_description=(
+            "Doctors in the patient's city ranked by smoothed rating, review volume, availability over the "
+            "coming days and experience, then re-ranked for the patient's past visits. Falls back to "
+            "doctors anywhere when the city has none."
+        ),
+        manual_parameters=[
+            openapi.Parameter('specialization', openapi.IN_QUERY, description="Only doctors with this specialization", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"Number of doctors (default 10, max {MAX_RECOMMENDATIONS})", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(description="Recommended doctors with score, rating and previously_visited, best first"),
+            400: "Invalid limit",
+            403: openapi.Response(description="Only patients can access this")
+        },
+        tags=['Doctors']
+    )
+    def get(self, request):
+        try:
+            patient = request.user.patient_profile
+        except AttributeError:
+            return Response({"error": "Only patients can access this"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), MAX_RECOMMENDATIONS)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = ranking.recommend(
+            patient,
+            get_directory_snapshot(),
+            specialization=request.query_params.get('specialization', '').strip() or None,
+            limit=limit
+        )
+        return Response(results, status=status.HTTP_200_OK)
 
 
 class DoctorAvailableSlotsView(APIView):
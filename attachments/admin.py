@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Attachment
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'owner', 'purpose', 'content_type', 'size', 'status', 'created_at']
+    list_filter = ['purpose', 'status', 'created_at']
+    search_fields = ['filename', 'key', 'owner__username']
+    readonly_fields = ['key', 'size', 'created_at', 'uploaded_at']
@@ -0,0 +1,64 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils.text import get_valid_filename
+
+
+def attachment_key(purpose, filename):
+    return f"attachments/{purpose}/{uuid.uuid4().hex}/{get_valid_filename(filename)[:100]}"
+
+
+class Attachment(models.Model):
+    """
+    A file uploaded straight to storage by the client. Rows start out pending
+    when the upload URL is issued and become ready once the upload is confirmed
+    and the object checked; only ready attachments can be linked to messages
+    or posts.
+    """
+    PURPOSE_CHOICES = [
+        ('chat', 'Chat message'),
+        ('post', 'Community post'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending upload'),
+        ('ready', 'Ready'),
+    ]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    purpose = models.CharField(max_length=10, choices=PURPOSE_CHOICES)
+    key = models.CharField(max_length=255, unique=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['owner', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @classmethod
+    def ready_for(cls, user, purpose):
+        """Confirmed uploads ``user`` may link to a ``purpose`` object."""
+        return cls.objects.filter(owner=user, purpose=purpose, status='ready')
+
+    def is_readable_by(self, user):
+        """The owner, participants of a chat it was sent to, or anyone signed in once it is on a post."""
+        if self.owner_id == user.id:
+            return True
+        if self.purpose == 'post':
+            return self.post_images.exists()
+        return self.messages.filter(room__participants=user).exists()
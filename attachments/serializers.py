@@ -0,0 +1,55 @@
+import posixpath
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import Attachment
+from .storage import attachment_url
+
+
+class AttachmentCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Attachment
+        fields = ['purpose', 'filename', 'content_type', 'size']
+        extra_kwargs = {
+            'purpose': {'help_text': "What the file is for: 'chat' or 'post'"},
+            'filename': {'help_text': 'Original file name'},
+            'content_type': {'help_text': 'MIME type the file will be uploaded with'},
+            'size': {'help_text': 'File size in bytes'},
+        }
+
+    def validate_filename(self, value):
+        name = posixpath.basename(value.replace('\\', '/')).strip()
+        if not name:
+            raise serializers.ValidationError("Invalid file name")
+        return name
+
+    def validate_size(self, value):
+        if value < 1:
+            raise serializers.ValidationError("File is empty")
+        if value > settings.ATTACHMENT_MAX_BYTES:
+            raise serializers.ValidationError(
+                f"File too large (max {settings.ATTACHMENT_MAX_BYTES // (1024 * 1024)} MB)"
+            )
+        return value
+
+    def validate(self, attrs):
+        allowed = settings.ATTACHMENT_CONTENT_TYPES.get(attrs['purpose'], [])
+        if attrs['content_type'] not in allowed:
+            raise serializers.ValidationError({
+                'content_type': f"Unsupported file type for {attrs['purpose']}: {attrs['content_type']}"
+            })
+        return attrs
+
+
+class AttachmentSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Attachment
+        fields = ['id', 'filename', 'content_type', 'size', 'status', 'url']
+
+    def get_url(self, obj):
+        if obj.status != 'ready':
+            return None
+        return attachment_url(obj)
@@ -0,0 +1,124 @@
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SALT = 'attachments.upload'
+
+
+class UploadError(Exception):
+    pass
+
+
+def uses_s3():
+    try:
+        from storages.backends.s3 import S3Storage
+    except ImportError:
+        return False
+    return isinstance(default_storage, S3Storage)
+
+
+def presign_upload(attachment, request):
+    """
+    Upload instructions for the client: a multipart POST of ``fields`` plus
+    the file (as ``file``) to ``url``. On S3 this is a presigned POST straight
+    to the bucket, with size and content type enforced by the policy; on other
+    backends it is a signed, short-lived URL on this server.
+    """
+    expires_in = settings.ATTACHMENT_UPLOAD_TTL
+    if uses_s3():
+        client = default_storage.connection.meta.client
+        presigned = client.generate_presigned_post(
+            Bucket=default_storage.bucket_name,
+            Key=posixpath.join(default_storage.location, attachment.key),
+            Fields={'Content-Type': attachment.content_type},
+            Conditions=[
+                {'Content-Type': attachment.content_type},
+                ['content-length-range', 1, settings.ATTACHMENT_MAX_BYTES],
+            ],
+            ExpiresIn=expires_in,
+        )
+        return {'method': 'POST', 'url': presigned['url'], 'fields': presigned['fields'], 'expires_in': expires_in}
+
+    token = signing.dumps({'id': attachment.id}, salt=UPLOAD_SALT)
+    return {
+        'method': 'POST',
+        'url': request.build_absolute_uri(reverse('attachment-upload', args=[attachment.id])),
+        'fields': {'token': token},
+        'expires_in': expires_in,
+    }
+
+
+def check_upload_token(attachment, token):
+    try:
+        data = signing.loads(token, salt=UPLOAD_SALT, max_age=settings.ATTACHMENT_UPLOAD_TTL)
+    except signing.BadSignature:
+        return False
+    return data.get('id') == attachment.id
+
+
+def store_local_upload(attachment, uploaded_file):
+    if uploaded_file.size > settings.ATTACHMENT_MAX_BYTES:
+        raise UploadError("File too large")
+    name = default_storage.save(attachment.key, uploaded_file)
+    if name != attachment.key:
+        attachment.key = name
+        attachment.save(update_fields=['key'])
+
+
+def confirm_upload(attachment):
+    """Check the uploaded object exists and fits the limits, then mark the attachment ready."""
+    if attachment.status == 'ready':
+        return attachment
+    if not default_storage.exists(attachment.key):
+        raise UploadError("Upload not found")
+
+    size = default_storage.size(attachment.key)
+    if size > settings.ATTACHMENT_MAX_BYTES:
+        default_storage.delete(attachment.key)
+        raise UploadError("File too large")
+
+    attachment.size = size
+    attachment.status = 'ready'
+    attachment.uploaded_at = timezone.now()
+    attachment.save(update_fields=['size', 'status', 'uploaded_at'])
+    return attachment
+
+
+def attachment_url(attachment):
+    """
+    A short-lived presigned GET on S3, signed here because S3Storage.url()
+    returns plain URLs once AWS_S3_CUSTOM_DOMAIN is set. Elsewhere the
+    authenticated download view, since MEDIA_URL is served to anyone.
+    """
+    if uses_s3():
+        return default_storage.connection.meta.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': default_storage.bucket_name,
+                'Key': posixpath.join(default_storage.location, attachment.key),
+            },
+            ExpiresIn=settings.ATTACHMENT_DOWNLOAD_TTL,
+        )
+    return reverse('attachment-download', args=[attachment.id])
+
+
+def delete_stale_uploads(older_than):
+    from .models import Attachment
+
+    deleted = 0
+    for attachment in Attachment.objects.filter(status='pending', created_at__lt=older_than).iterator():
+        try:
+            if default_storage.exists(attachment.key):
+                default_storage.delete(attachment.key)
+            attachment.delete()
+            deleted += 1
+        except Exception as e:
+            logger.error(f"Failed to delete stale attachment {attachment.id}: {e}")
+    return deleted
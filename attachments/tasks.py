@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from .storage import delete_stale_uploads
+
+
+@shared_task
+def purge_stale_attachments():
+    """Remove attachments whose upload was never confirmed."""
+    deleted = delete_stale_uploads(timezone.now() - timedelta(days=1))
+    return f"Deleted {deleted} stale attachments"
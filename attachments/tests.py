@@ -0,0 +1,178 @@
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from Authapi.testing import make_doctor, make_user
+from chat_room.models import ChatRoom, Message
+from .models import Attachment
+
+MEDIA_ROOT = tempfile.mkdtemp()
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CACHES=LOCMEM_CACHES,
+    ATTACHMENT_MAX_BYTES=1024,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+)
+class AttachmentUploadTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = make_user('owner', 'patient')
+        self.other = make_user('other', 'doctor')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request_upload(self, size=5, **overrides):
+        data = {'purpose': 'chat', 'filename': 'scan.png', 'content_type': 'image/png', 'size': size}
+        data.update(overrides)
+        return self.client.post('/api/attachments/', data, format='json')
+
+    def upload(self, upload, content=b'12345', token=None):
+        fields = dict(upload['fields'])
+        if token is not None:
+            fields['token'] = token
+        return APIClient().post(
+            upload['url'], {**fields, 'file': SimpleUploadedFile('scan.png', content)}, format='multipart'
+        )
+
+    def test_upload_and_confirm(self):
+        response = self.request_upload()
+        self.assertEqual(response.status_code, 201)
+        attachment_id = response.data['attachment']['id']
+        self.assertEqual(response.data['attachment']['status'], 'pending')
+        self.assertIsNone(response.data['attachment']['url'])
+
+        self.assertEqual(self.upload(response.data['upload']).status_code, 204)
+        response = self.client.post(f'/api/attachments/{attachment_id}/confirm/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertEqual(response.data['size'], 5)
+        self.assertTrue(response.data['url'])
+
+    def test_rejects_bad_upload_token(self):
+        response = self.request_upload()
+        upload_response = self.upload(response.data['upload'], token='forged')
+        self.assertEqual(upload_response.status_code, 403)
+        self.assertEqual(Attachment.objects.get().status, 'pending')
+
+    def test_token_is_bound_to_its_attachment(self):
+        first = self.request_upload().data
+        second = self.request_upload().data
+        response = self.upload(second['upload'], token=first['upload']['fields']['token'])
+        self.assertEqual(response.status_code, 403)
+
+    def test_confirm_requires_uploaded_object(self):
+        attachment_id = self.request_upload().data['attachment']['id']
+        response = self.client.post(f'/api/attachments/{attachment_id}/confirm/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Upload not found'})
+
+    def test_only_owner_can_confirm(self):
+        response = self.request_upload()
+        self.upload(response.data['upload'])
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        response = other_client.post(f"/api/attachments/{response.data['attachment']['id']}/confirm/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_size_limit(self):
+        response = self.request_upload(size=2048)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('size', response.data)
+
+        # Declared small, uploaded large.
+        response = self.request_upload()
+        upload_response = self.upload(response.data['upload'], content=b'x' * 2048)
+        self.assertEqual(upload_response.status_code, 400)
+        self.assertEqual(upload_response.data, {'error': 'File too large'})
+
+    def test_download_is_limited_to_readers(self):
+        response = self.request_upload()
+        attachment_id = response.data['attachment']['id']
+        self.upload(response.data['upload'])
+        url = self.client.post(f'/api/attachments/{attachment_id}/confirm/').data['url']
+        self.assertEqual(url, f'/api/attachments/{attachment_id}/download/')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'12345')
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        self.assertEqual(other_client.get(url).status_code, 404)
+        self.assertEqual(APIClient().get(url).status_code, 401)
+
+    def test_rejects_unsupported_content_type(self):
+        response = self.request_upload(content_type='application/x-msdownload')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content_type', response.data)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AttachmentLinkTests(TestCase):
+
+    def setUp(self):
+        self.user = make_doctor('sender').user
+        self.other = make_doctor('peer').user
+        self.room = ChatRoom.objects.create(room_type='doctor_doctor')
+        self.room.participants.add(self.user, self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def attachment(self, owner, purpose='chat', status='ready'):
+        return Attachment.objects.create(
+            owner=owner, purpose=purpose, key=f'attachments/{purpose}/{owner.id}-{status}-{Attachment.objects.count()}',
+            filename='scan.png', content_type='image/png', size=5, status=status
+        )
+
+    def send(self, attachment):
+        return self.client.post(
+            f'/api/chat/room/{self.room.id}/send/', {'attachment_id': attachment.id}, format='json'
+        )
+
+    def test_links_own_ready_attachment(self):
+        attachment = self.attachment(self.user)
+        response = self.send(attachment)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Message.objects.get().attachment_id, attachment.id)
+
+    def test_sent_attachment_is_readable_by_participants(self):
+        attachment = self.attachment(self.user)
+        outsider = make_user('outsider', 'doctor')
+        self.assertFalse(attachment.is_readable_by(self.other))
+        self.send(attachment)
+        self.assertTrue(attachment.is_readable_by(self.other))
+        self.assertFalse(attachment.is_readable_by(outsider))
+
+    def test_rejects_other_users_attachment(self):
+        response = self.send(self.attachment(self.other))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Message.objects.exists())
+
+    def test_rejects_pending_attachment(self):
+        response = self.send(self.attachment(self.user, status='pending'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_attachment_for_another_purpose(self):
+        response = self.send(self.attachment(self.user, purpose='post'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_ready_for(self):
+        ready = self.attachment(self.user)
+        self.attachment(self.user, status='pending')
+        self.attachment(self.other)
+        self.assertEqual(list(Attachment.ready_for(self.user, 'chat')), [ready])
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import AttachmentCreateView, AttachmentUploadView, AttachmentConfirmView, AttachmentDownloadView
+
+urlpatterns = [
+    path('', AttachmentCreateView.as_view(), name='attachment-create'),
+    path('<int:pk>/upload/', AttachmentUploadView.as_view(), name='attachment-upload'),
+    path('<int:pk>/confirm/', AttachmentConfirmView.as_view(), name='attachment-confirm'),
+    path('<int:pk>/download/', AttachmentDownloadView.as_view(), name='attachment-download'),
+]
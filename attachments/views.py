@@ -0,0 +1,123 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Attachment, attachment_key
+from .serializers import AttachmentCreateSerializer, AttachmentSerializer
+from .storage import (
+    UploadError, attachment_url, check_upload_token, confirm_upload, presign_upload, store_local_upload, uses_s3
+)
+
+
+class AttachmentCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Request an upload URL for an attachment",
+        operation_description=(
+            "Registers a pending attachment and returns where to upload it. Send a multipart POST "
+            "to `upload.url` with every entry of `upload.fields` plus the file as `file`, then call "
+            "the confirm endpoint."
+        ),
+        request_body=AttachmentCreateSerializer,
+        responses={
+            201: openapi.Response(
+                description="Pending attachment with upload instructions",
+                examples={
+                    "application/json": {
+                        "attachment": {"id": 7, "filename": "report.pdf", "content_type": "application/pdf", "size": 183220, "status": "pending", "url": None},
+                        "upload": {"method": "POST", "url": "https://bucket.s3.amazonaws.com/", "fields": {"key": "attachments/chat/...", "policy": "..."}, "expires_in": 900}
+                    }
+                }
+            )
+        },
+        tags=['Attachments']
+    )
+    def post(self, request):
+        serializer = AttachmentCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        attachment = serializer.save(
+            owner=request.user,
+            key=attachment_key(data['purpose'], data['filename'])
+        )
+        return Response({
+            "attachment": AttachmentSerializer(attachment).data,
+            "upload": presign_upload(attachment, request)
+        }, status=status.HTTP_201_CREATED)
+
+
+class AttachmentUploadView(APIView):
+    """Stand-in for the S3 presigned POST when storage is not S3 (local/dev)."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(auto_schema=None)
+    def post(self, request, pk):
+        if uses_s3():
+            return Response({"error": "Upload directly to storage"}, status=status.HTTP_404_NOT_FOUND)
+
+        attachment = get_object_or_404(Attachment, pk=pk, status='pending')
+        if not check_upload_token(attachment, request.data.get('token', '')):
+            return Response({"error": "Invalid or expired upload token"}, status=status.HTTP_403_FORBIDDEN)
+
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            store_local_upload(attachment, uploaded_file)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AttachmentConfirmView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Confirm an attachment upload",
+        operation_description="Checks the uploaded object in storage and marks the attachment ready to link to a message or post.",
+        responses={200: AttachmentSerializer, 400: "Upload missing or too large"},
+        tags=['Attachments']
+    )
+    def post(self, request, pk):
+        attachment = get_object_or_404(Attachment, pk=pk, owner=request.user)
+        try:
+            confirm_upload(attachment)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AttachmentSerializer(attachment).data)
+
+
+class AttachmentDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Download an attachment",
+        operation_description="Streams the file to its owner, the participants of a chat it was sent in, or any signed-in user for post images. On S3 redirects to a presigned URL.",
+        responses={200: "File contents", 302: "Redirect to storage", 404: "Not found"},
+        tags=['Attachments']
+    )
+    def get(self, request, pk):
+        attachment = get_object_or_404(Attachment, pk=pk, status='ready')
+        if not attachment.is_readable_by(request.user):
+            return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if uses_s3():
+            return HttpResponseRedirect(attachment_url(attachment))
+        return FileResponse(
+            default_storage.open(attachment.key, 'rb'),
+            content_type=attachment.content_type,
+            filename=attachment.filename,
+        )
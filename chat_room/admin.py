@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatRoom, Message, DoctorConnection
+from .models import ChatRoom, ChatArchive, Message, DoctorConnection, ChatInbox
 
 
 @admin.register(ChatRoom)
@@ -13,8 +13,8 @@ class ChatRoomAdmin(admin.ModelAdmin):
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'room', 'sender', 'content_preview', 'timestamp', 'is_read']
-    list_filter = ['is_read', 'timestamp']
+    list_display = ['id', 'room', 'sender', 'content_preview', 'timestamp']
+    list_filter = ['timestamp']
     search_fields = ['content', 'sender__username']
     readonly_fields = ['timestamp']
     
@@ -23,6 +23,14 @@ class MessageAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Message'
 
 
+@admin.register(ChatInbox)
+class ChatInboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'room', 'room_type', 'other_participant_name', 'unread_count', 'last_read_message_id', 'last_message_at']
+    list_filter = ['room_type']
+    search_fields = ['user__username', 'other_participant_name']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(DoctorConnection)
 class DoctorConnectionAdmin(admin.ModelAdmin):
     list_display = ['id', 'from_doctor', 'to_doctor', 'status', 'created_at']
@@ -31,6 +39,14 @@ class DoctorConnectionAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(ChatArchive)
+class ChatArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'room_id', 'room_type', 'message_count', 'size_bytes', 'codec', 'last_message_at', 'created_at']
+    list_filter = ['room_type', 'codec', 'created_at']
+    search_fields = ['room_id', 'appointment_id']
+    readonly_fields = [field.name for field in ChatArchive._meta.fields]
+
+
 # @admin.register(GroupMembership)
 # class GroupMembershipAdmin(admin.ModelAdmin):
 #     list_display = ['id', 'patient', 'group_room', 'is_diagnosed', 'joined_at']
@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ChatArchive, ChatRoom, Message
+from .partitions import delete_messages
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC = 'zstd' if zstandard else 'gzip'
+EXTENSIONS = {'zstd': 'zst', 'gzip': 'gz'}
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _compressor(fileobj):
+    if CODEC == 'zstd':
+        return zstandard.ZstdCompressor(level=settings.CHAT_ARCHIVE_ZSTD_LEVEL).stream_writer(fileobj, closefd=False)
+    return gzip.GzipFile(fileobj=fileobj, mode='wb')
+
+
+def _decompressor(codec, fileobj):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd chat archives")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return gzip.GzipFile(fileobj=fileobj, mode='rb')
+
+
+def serialize_message(message):
+    # Same shape as MessageSearchSerializer, so clients read archived and live history alike.
+    from .serializers import MessageSearchSerializer
+    return json.dumps(MessageSearchSerializer(message).data, separators=(',', ':'), ensure_ascii=False)
+
+
+def _discard_orphans(room_id, first_message_id):
+    """
+    Delete blobs of the segment starting at ``first_message_id`` that no
+    manifest points to: left behind when the transaction around an earlier
+    attempt rolled back after the upload.
+    """
+    directory = f"chat_archives/room_{room_id}"
+    try:
+        _, filenames = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        name = f"{directory}/{filename}"
+        if filename.startswith(f"{first_message_id}-") and not ChatArchive.objects.filter(blob=name).exists():
+            default_storage.delete(name)
+
+
+def archive_room(room, before=None):
+    """
+    Move ``room``'s messages (only those sent before ``before``, if given)
+    into a compressed JSONL blob in default storage, record a ChatArchive
+    manifest and delete the hot rows. Messages written after an earlier
+    archive go into a new segment. Returns the manifest, or None when there
+    was nothing to archive.
+    """
+    messages = Message.objects.filter(room_id=room.id)
+    if before is not None:
+        messages = messages.filter(timestamp__lt=before)
+
+    count = 0
+    first = last = None
+    with tempfile.TemporaryFile() as spool:
+        with _compressor(spool) as writer:
+            rows = messages.select_related(
+                'sender__doctor_profile', 'sender__patient_profile', 'attachment'
+            ).order_by('id')
+            for message in rows.iterator(chunk_size=2000):
+                writer.write(serialize_message(message).encode('utf-8') + b'\n')
+                if first is None:
+                    first = message
+                last = message
+                count += 1
+        if not count:
+            return None
+
+        digest = hashlib.sha256()
+        spool.seek(0)
+        for chunk in iter(lambda: spool.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        size = spool.tell()
+        spool.seek(0)
+
+        _discard_orphans(room.id, first.id)
+        name = f"chat_archives/room_{room.id}/{first.id}-{last.id}.jsonl.{EXTENSIONS[CODEC]}"
+        blob = default_storage.save(name, File(spool, name=name))
+
+    try:
+        with transaction.atomic():
+            archive = ChatArchive.objects.create(
+                room_id=room.id,
+                room_type=room.room_type,
+                appointment_id=room.appointment_id,
+                participant_ids=list(room.participants.values_list('id', flat=True)),
+                blob=blob,
+                codec=CODEC,
+                size_bytes=size,
+                sha256=digest.hexdigest(),
+                message_count=count,
+                first_message_id=first.id,
+                last_message_id=last.id,
+                first_message_at=first.timestamp,
+                last_message_at=last.timestamp,
+            )
+            # Only what went into the blob; anything newer waits for the next segment.
+            deleted = delete_messages(messages.filter(id__lte=last.id))
+    except Exception:
+        default_storage.delete(blob)
+        raise
+
+    logger.info(f"Archived {count} messages of room {room.id} to {blob} ({size} bytes), deleted {deleted}")
+    return archive
+
+
+def archive_closed_rooms(limit=200):
+    """Archive rooms that have been inactive for CHAT_ARCHIVE_AFTER_DAYS and still hold messages."""
+    cutoff = timezone.now() - timedelta(days=settings.CHAT_ARCHIVE_AFTER_DAYS)
+    rooms = (
+        ChatRoom.objects.filter(is_active=False, updated_at__lt=cutoff)
+        .filter(Exists(Message.objects.filter(room_id=OuterRef('pk'))))
+        .order_by('id')[:limit]
+    )
+
+    archived = 0
+    for room in rooms:
+        try:
+            if archive_room(room):
+                archived += 1
+        except Exception as e:
+            logger.error(f"Failed to archive chat room {room.id}: {e}")
+    return archived
+
+
+def archive_expired_messages(cutoff):
+    """
+    Archive every message sent before ``cutoff``, room by room, whether the
+    room is still open (doctor-doctor rooms never close) or already gone.
+    Rooms that fail keep their rows and are retried on the next run.
+    Returns (messages archived, rooms that failed).
+    """
+    room_ids = (
+        Message.objects.filter(timestamp__lt=cutoff)
+        .order_by('room_id').values_list('room_id', flat=True).distinct()
+    )
+    archived = failed = 0
+    for room_id in room_ids.iterator():
+        # Messages of a room deleted before rooms were archived on delete;
+        # without participants only staff can read the archive.
+        room = ChatRoom.objects.filter(id=room_id).first() or ChatRoom(id=room_id, room_type='')
+        try:
+            archive = archive_room(room, before=cutoff)
+        except Exception as e:
+            logger.error(f"Failed to archive expired messages of chat room {room_id}: {e}")
+            failed += 1
+            continue
+        if archive:
+            archived += archive.message_count
+    return archived, failed
+
+
+def user_can_read_archive(user_id, room_id):
+    room = ChatRoom.objects.filter(id=room_id).first()
+    if room is not None:
+        return room.participants.filter(id=user_id).exists()
+    return any(
+        user_id in participant_ids
+        for participant_ids in ChatArchive.objects.filter(room_id=room_id).values_list('participant_ids', flat=True)
+    )
+
+
+def iter_archived_messages(room_id):
+    """Yield the room's archived history as NDJSON bytes, oldest segment first."""
+    for archive in ChatArchive.objects.filter(room_id=room_id).order_by('first_message_id'):
+        with default_storage.open(archive.blob, 'rb') as fileobj:
+            reader = _decompressor(archive.codec, fileobj)
+            for chunk in iter(lambda: reader.read(READ_CHUNK_SIZE), b''):
+                yield chunk
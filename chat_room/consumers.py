@@ -1,15 +1,26 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
+import asyncio
+import logging
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from .models import ChatRoom, Message
+from .inbox import mark_room_read, read_watermarks, is_read_by_others
+from . import presence
+from medtrax.ws_protocol import ProtocolMixin
+from attachments.models import Attachment
+from attachments.serializers import AttachmentSerializer
 from django.utils import timezone
-from urllib.parse import parse_qs
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
-class ChatConsumer(AsyncWebsocketConsumer):
+def attachment_payload(attachment):
+    return AttachmentSerializer(attachment).data if attachment else None
+
+
+class ChatConsumer(ProtocolMixin, AsyncWebsocketConsumer):
     async def connect(self):
+        self.negotiate_protocol()
         try:
             self.room_id = int(self.scope['url_route']['kwargs']['room_id'])
         except:
@@ -17,15 +28,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         self.room_group_name = f'chat_{self.room_id}'
+        self.stream_key = f'chat:{self.room_id}'
+        self.connection_id = f'{self.channel_name}:{self.stream_key}'
 
-        query_string = self.scope.get('query_string', b'').decode()
-        query_params = parse_qs(query_string)
-        token = query_params.get('token', [None])[0]
-
-        if token:
-            self.user = await self.get_user_from_token(token)
-        else:
-            self.user = self.scope.get('user')
+        # JWTAuthMiddleware resolves both ?token= and the access_token cookie.
+        self.user = self.scope.get('user')
 
         if not self.user or not self.user.is_authenticated:
             await self.close(code=4001)
@@ -53,47 +60,131 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.room_type = room_data['room_type']
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        await self.accept(self.subprotocol)
 
         messages = await self.get_message_history()
 
-        await self.send(text_data=json.dumps({
+        try:
+            online_ids = await presence.aonline_user_ids(room_data['participant_ids'])
+        except Exception as e:
+            logger.warning(f"Presence lookup failed for room {self.room_id}: {e}")
+            online_ids = set()
+
+        await self.send_payload({
             'type': 'connection_established',
             'room_id': self.room_id,
             'user_id': self.user.id,
             'messages': messages,
+            'online_user_ids': sorted(online_ids | {self.user.id}),
             'appointment_status': room_data['appointment_status']  # Send status to frontend
-        }))
+        })
+
+        self.heartbeat_task = asyncio.create_task(self.heartbeat_loop())
 
     async def disconnect(self, close_code):
+        heartbeat_task = getattr(self, 'heartbeat_task', None)
+        if heartbeat_task:
+            heartbeat_task.cancel()
+            try:
+                went_offline = await presence.disconnect(self.user.id, self.connection_id)
+            except Exception as e:
+                logger.warning(f"Presence disconnect failed for user {self.user.id}: {e}")
+                went_offline = False
+            if went_offline:
+                await self.broadcast_presence('offline')
+
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
-    async def receive(self, text_data):
+    async def heartbeat_loop(self):
+        interval = max(presence.PRESENCE_TTL / 3, 1)
+        while True:
+            try:
+                came_online = await presence.heartbeat(self.user.id, self.connection_id)
+                if came_online:
+                    await self.broadcast_presence('online')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Presence heartbeat failed for user {self.user.id}: {e}")
+            await asyncio.sleep(interval)
+
+    async def broadcast_presence(self, status):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'presence_update',
+                'stream': self.stream_key,
+                'user_id': self.user.id,
+                'status': status
+            }
+        )
+
+    async def presence_update(self, event):
+        if event['user_id'] == self.user.id:
+            return
+        await self.send_payload({
+            'type': 'presence',
+            'user_id': event['user_id'],
+            'status': event['status']
+        })
+
+    async def handle_typing(self, is_typing):
         try:
-            data = json.parse(text_data)
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({"error": "Invalid JSON"}))
+            allowed = await presence.allow_typing(self.room_id, self.user.id, is_typing)
+        except Exception as e:
+            logger.warning(f"Typing limiter failed for user {self.user.id}: {e}")
+            return
+        if not allowed:
+            return
+
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'typing_indicator',
+                'stream': self.stream_key,
+                'user_id': self.user.id,
+                'is_typing': is_typing
+            }
+        )
+
+    async def typing_indicator(self, event):
+        if event['user_id'] == self.user.id:
+            return
+        await self.send_payload({
+            'type': 'typing',
+            'user_id': event['user_id'],
+            'is_typing': event['is_typing']
+        })
+
+    async def receive_payload(self, data):
+        if data.get('type') == 'read':
+            await self.handle_read(data.get('message_id'))
+            return
+
+        if data.get('type') == 'typing':
+            await self.handle_typing(bool(data.get('is_typing', True)))
             return
 
         message_text = data.get('message', '').strip()
-        if not message_text:
+        attachment_id = data.get('attachment_id')
+        if not message_text and attachment_id is None:
             return
 
         # ✅ Check appointment status before allowing message
         room_data = await self.get_room_data()
         if room_data and room_data['appointment_status'] != 'confirmed' and room_data['appointment_status'] is not None:
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 "type": "error",
                 "error": "appointment_ended",
                 "message": "This appointment has ended. You can no longer send messages."
-            }))
+            })
             await self.close(code=4006)
             return
 
-        saved_message = await self.save_message(message_text)
+        saved_message = await self.save_message(message_text, attachment_id)
         if not saved_message:
-            await self.send(text_data=json.dumps({"error": "Unable to save message"}))
+            await self.send_payload({"error": "Unable to save message"})
             return
 
         full_name = await self.get_user_full_name()
@@ -106,37 +197,70 @@ class ChatConsumer(AsyncWebsocketConsumer):
             "sender_full_name": full_name,
             "sender_role": getattr(self.user, "role", None),
             "content": saved_message.content,
+            "attachment": attachment_payload(saved_message.attachment),
             "timestamp": saved_message.timestamp.isoformat(),
-            "is_read": saved_message.is_read
+            "is_read": False
         }
 
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
+                'stream': self.stream_key,
                 'message': payload
             }
         )
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_payload({
             'type': 'chat_message',
             'message': event['message']
-        }))
+        })
+
+    async def handle_read(self, message_id):
+        if message_id is not None:
+            try:
+                message_id = int(message_id)
+            except (TypeError, ValueError):
+                await self.send_payload({"error": "message_id must be an integer"})
+                return
+
+        watermark = await self.mark_read(message_id)
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'read_receipt',
+                'stream': self.stream_key,
+                'user_id': self.user.id,
+                'last_read_message_id': watermark
+            }
+        )
+
+    async def read_receipt(self, event):
+        if event['user_id'] == self.user.id:
+            return
+        await self.send_payload({
+            'type': 'read_receipt',
+            'user_id': event['user_id'],
+            'last_read_message_id': event['last_read_message_id']
+        })
 
     # ✅ NEW: Handler for appointment completion notification
     async def appointment_completed(self, event):
         """Notify users that appointment has ended"""
-        await self.send(text_data=json.dumps({
+        await self.send_payload({
             'type': 'appointment_completed',
             'message': 'This appointment has ended. Chat is now closed.'
-        }))
+        })
         await self.close(code=4006)
 
     @database_sync_to_async
     def get_message_history(self):
         try:
-            messages = Message.objects.filter(room_id=self.room_id).select_related('sender').order_by('-timestamp')[:50]
+            messages = Message.objects.filter(room_id=self.room_id).select_related(
+                'sender__doctor_profile', 'sender__patient_profile', 'attachment'
+            ).order_by('-timestamp')[:50]
+            watermarks = read_watermarks(self.room_id)
             message_list = []
             for msg in reversed(messages):
                 sender_name = msg.sender.username
@@ -155,8 +279,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     'sender_full_name': sender_name,
                     'sender_role': getattr(msg.sender, "role", None),
                     'content': msg.content,
+                    'attachment': attachment_payload(msg.attachment),
                     'timestamp': msg.timestamp.isoformat(),
-                    'is_read': msg.is_read
+                    'is_read': is_read_by_others(msg.id, msg.sender_id, watermarks)
                 })
             return message_list
         except Exception:
@@ -172,8 +297,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if room.appointment:
                 appointment_status = room.appointment.status
             
+            participant_ids = [user.id for user in room.participants.all()]
+
             return {
-                'is_participant': room.participants.filter(id=self.user.id).exists(),
+                'participant_ids': participant_ids,
+                'is_participant': self.user.id in participant_ids,
                 'is_active': room.is_active,
                 'room_type': room.room_type,
                 'appointment_status': appointment_status  # ✅ NEW
@@ -182,7 +310,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def save_message(self, content):
+    def save_message(self, content, attachment_id=None):
         try:
             room = ChatRoom.objects.select_related('appointment').get(id=self.room_id, is_active=True)
             
@@ -193,13 +321,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if not room.participants.filter(id=self.user.id).exists():
                 return None
                 
-            message = Message.objects.create(room=room, sender=self.user, content=content)
+            attachment = None
+            if attachment_id is not None:
+                attachment = Attachment.ready_for(self.user, 'chat').get(id=int(attachment_id))
+
+            message = Message.objects.create(room=room, sender=self.user, content=content, attachment=attachment)
             room.updated_at = timezone.now()
             room.save()
             return message
         except Exception:
             return None
 
+    @database_sync_to_async
+    def mark_read(self, message_id):
+        room = ChatRoom.objects.get(id=self.room_id)
+        return mark_room_read(room, self.user.id, message_id)
+
     @database_sync_to_async
     def get_user_full_name(self):
         try:
@@ -210,15 +347,3 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except Exception:
             return getattr(self.user, "username", "")
         return getattr(self.user, "username", "")
-
-    @database_sync_to_async
-    def get_user_from_token(self, token):
-        from rest_framework_simplejwt.tokens import AccessToken
-        from django.contrib.auth import get_user_model
-        UserModel = get_user_model()
-        try:
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            return UserModel.objects.get(id=user_id)
-        except Exception:
-            return None
\ No newline at end of file
@@ -0,0 +1,197 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Case, F, Max, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ChatInbox, ChatRoom, Message
+
+
+def display_name(user):
+    if user is None:
+        return ''
+    try:
+        if user.role == 'doctor':
+            return f"Dr. {user.doctor_profile.get_full_name()}"
+        if user.role == 'patient':
+            return user.patient_profile.get_full_name()
+    except Exception:
+        pass
+    return user.username
+
+
+def sync_room_inbox(room):
+    """Make sure every participant of ``room`` has exactly one inbox row."""
+    participants = list(
+        room.participants.select_related('doctor_profile', 'patient_profile')
+    )
+    participant_ids = [user.id for user in participants]
+
+    ChatInbox.objects.filter(room=room).exclude(user_id__in=participant_ids).delete()
+
+    existing = set(
+        ChatInbox.objects.filter(room=room).values_list('user_id', flat=True)
+    )
+    last_message = room.messages.select_related('sender').order_by('-id').first()
+
+    new_rows = []
+    for user in participants:
+        other = next((p for p in participants if p.id != user.id), None)
+        if user.id in existing:
+            ChatInbox.objects.filter(room=room, user=user).update(
+                other_participant=other,
+                other_participant_name=display_name(other),
+            )
+            continue
+
+        row = ChatInbox(
+            user=user,
+            room=room,
+            room_type=room.room_type,
+            other_participant=other,
+            other_participant_name=display_name(other),
+        )
+        if last_message:
+            row.last_message_id = last_message.id
+            row.last_message_preview = last_message.content[:100]
+            row.last_message_sender = last_message.sender.username
+            row.last_message_at = last_message.timestamp
+        new_rows.append(row)
+
+    if new_rows:
+        ChatInbox.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+
+def add_inbox_rows(room_ids):
+    """
+    Set-based counterpart of sync_room_inbox for rooms whose participants were
+    inserted in bulk: creates the missing inbox rows for all ``room_ids`` in a
+    fixed number of queries. Existing rows are left alone.
+    """
+    room_ids = list(room_ids)
+    if not room_ids:
+        return 0
+
+    Through = ChatRoom.participants.through
+    members = {}
+    for room_id, user_id in Through.objects.filter(chatroom_id__in=room_ids).values_list('chatroom_id', 'customuser_id'):
+        members.setdefault(room_id, []).append(user_id)
+
+    existing = set(ChatInbox.objects.filter(room_id__in=room_ids).values_list('room_id', 'user_id'))
+    missing = {
+        room_id: user_ids for room_id, user_ids in members.items()
+        if any((room_id, user_id) not in existing for user_id in user_ids)
+    }
+    if not missing:
+        return 0
+
+    users = get_user_model().objects.select_related('doctor_profile', 'patient_profile').in_bulk(
+        {user_id for user_ids in missing.values() for user_id in user_ids}
+    )
+    room_types = dict(ChatRoom.objects.filter(id__in=missing).values_list('id', 'room_type'))
+    last_ids = (
+        Message.objects.filter(room_id__in=missing)
+        .values('room_id').annotate(last_id=Max('id')).values_list('last_id', flat=True)
+    )
+    last_messages = {
+        message.room_id: message
+        for message in Message.objects.filter(id__in=list(last_ids)).select_related('sender')
+    }
+
+    new_rows = []
+    for room_id, user_ids in missing.items():
+        for user_id in user_ids:
+            if (room_id, user_id) in existing:
+                continue
+            other = next((users.get(uid) for uid in user_ids if uid != user_id), None)
+            row = ChatInbox(
+                user_id=user_id,
+                room_id=room_id,
+                room_type=room_types[room_id],
+                other_participant=other,
+                other_participant_name=display_name(other),
+            )
+            last_message = last_messages.get(room_id)
+            if last_message:
+                row.last_message_id = last_message.id
+                row.last_message_preview = last_message.content[:100]
+                row.last_message_sender = last_message.sender.username
+                row.last_message_at = last_message.timestamp
+            new_rows.append(row)
+
+    ChatInbox.objects.bulk_create(new_rows, ignore_conflicts=True)
+    return len(new_rows)
+
+
+def record_message(message):
+    """Fold a newly written message into every participant's inbox row."""
+    ChatInbox.objects.filter(room_id=message.room_id).update(
+        last_message_id=message.id,
+        last_message_preview=message.content[:100],
+        last_message_sender=message.sender.username,
+        last_message_at=message.timestamp,
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F('unread_count')),
+            default=F('unread_count') + 1,
+        ),
+    )
+
+
+def count_unread(room_id, user_id, last_read_message_id):
+    return Message.objects.filter(
+        room_id=room_id, id__gt=last_read_message_id
+    ).exclude(sender_id=user_id).count()
+
+
+def mark_room_read(room, user_id, up_to_message_id=None):
+    """
+    Move the user's read watermark forward and return it.
+    Without ``up_to_message_id`` the whole room is marked read in one UPDATE.
+    A client supplied id is snapped down to the latest message of ``room`` at
+    or below it, so ids from other rooms or not yet sent can't push it ahead.
+    """
+    entries = ChatInbox.objects.filter(room_id=room.id, user_id=user_id)
+
+    if up_to_message_id is not None:
+        up_to_message_id = Message.objects.filter(
+            room_id=room.id, id__lte=up_to_message_id
+        ).aggregate(last_id=Max('id'))['last_id'] or 0
+
+    if up_to_message_id is None:
+        changes = {
+            'last_read_message_id': Greatest(
+                'last_read_message_id', Coalesce('last_message_id', 0)
+            ),
+            'unread_count': 0,
+        }
+    else:
+        changes = {
+            'last_read_message_id': Greatest('last_read_message_id', up_to_message_id),
+        }
+
+    if not entries.update(**changes):
+        sync_room_inbox(room)
+        entries.update(**changes)
+
+    watermark = entries.values_list('last_read_message_id', flat=True).first() or 0
+    if up_to_message_id is not None:
+        entries.update(unread_count=count_unread(room.id, user_id, watermark))
+    return watermark
+
+
+def read_watermarks(room_id):
+    return dict(
+        ChatInbox.objects.filter(room_id=room_id).values_list('user_id', 'last_read_message_id')
+    )
+
+
+def is_read_by_others(message_id, sender_id, watermarks):
+    return any(
+        watermark >= message_id
+        for user_id, watermark in watermarks.items()
+        if user_id != sender_id
+    )
+
+
+def refresh_participant_name(user):
+    ChatInbox.objects.filter(other_participant=user).update(
+        other_participant_name=display_name(user)
+    )
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from medtrax.ws_protocol import CODECS
+
+
+def sample_message(i):
+    return {
+        "id": 100000 + i,
+        "room": 412,
+        "sender_id": 57 if i % 2 else 91,
+        "sender_username": "dr_ananya" if i % 2 else "rahul.k",
+        "sender_full_name": "Dr. Ananya Sharma" if i % 2 else "Rahul Kumar",
+        "sender_role": "doctor" if i % 2 else "patient",
+        "content": "Please continue the tablets twice a day after meals and check your BP in the evening." if i % 2 else "Okay doctor, thank you.",
+        "timestamp": (datetime(2025, 11, 2, 9, 0) + timedelta(minutes=i)).isoformat(),
+        "is_read": i < 45,
+    }
+
+
+SAMPLES = {
+    "chat_message": {"type": "chat_message", "message": sample_message(1)},
+    "typing": {"type": "typing", "user_id": 57, "is_typing": True},
+    "read_receipt": {"type": "read_receipt", "user_id": 91, "last_read_message_id": 100049},
+    "connection_established (50 msgs)": {
+        "type": "connection_established",
+        "room_id": 412,
+        "user_id": 91,
+        "messages": [sample_message(i) for i in range(50)],
+        "online_user_ids": [57, 91],
+        "appointment_status": "confirmed",
+    },
+    "queue_update": {"current_queue_count": 7, "estimated_wait_time": 210, "current_session": "10:30 - 11:00"},
+    "ice_candidate": {
+        "type": "ice-candidate",
+        "candidate": "candidate:842163049 1 udp 1677729535 203.0.113.7 49203 typ srflx raddr 10.0.0.4 rport 49203 generation 0",
+        "sdpMid": "0",
+        "sdpMLineIndex": 0,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare wire size and serialization cost of the websocket protocols'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        header = f"{'payload':<34}{'codec':<9}{'bytes':>8}{'encode us':>12}{'decode us':>12}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for label, payload in SAMPLES.items():
+            for codec in CODECS.values():
+                frame = codec.encode(payload)
+                wire = frame.get('bytes_data') or frame['text_data'].encode()
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    codec.encode(payload)
+                encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    codec.decode(**frame)
+                decode_us = (time.perf_counter() - start) / iterations * 1e6
+
+                self.stdout.write(
+                    f"{label:<34}{codec.name:<9}{len(wire):>8}{encode_us:>12.1f}{decode_us:>12.1f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"\nDone ({iterations} iterations per row)"))
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from appointments.models import Appointment
+from chat_room.models import ChatRoom
+from chat_room.provisioning import deactivate_appointment_rooms, provision_appointment_rooms
+
+
+def missing_participant(user_field):
+    return ~Exists(ChatRoom.participants.through.objects.filter(
+        chatroom_id=OuterRef('pk'),
+        customuser_id=OuterRef(f'appointment__{user_field}__user_id'),
+    ))
+
+
+def chunked_ids(queryset, field, chunk_size):
+    """Walk ``field`` values of ``queryset`` in ascending keyset pages."""
+    last = 0
+    while True:
+        ids = list(
+            queryset.filter(**{f'{field}__gt': last})
+            .order_by(field)
+            .values_list(field, flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Brings appointment chat rooms in line with appointment status: creates missing rooms, '
+        'reactivates rooms and restores participants for confirmed appointments, and '
+        'deactivates rooms of cancelled appointments'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without writing anything')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Appointments handled per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        verbose = options['verbosity'] > 1
+
+        # Anti-joins: each query returns only rows that are out of line.
+        confirmed_rooms = ChatRoom.objects.filter(appointment__status='confirmed')
+        drift = {
+            'missing': Appointment.objects.filter(status='confirmed', chat_room__isnull=True),
+            'inactive': confirmed_rooms.filter(is_active=False),
+            'participants': confirmed_rooms.filter(is_active=True).filter(
+                missing_participant('patient') | missing_participant('doctor')
+            ),
+            'stale': ChatRoom.objects.filter(appointment__status='cancelled', is_active=True),
+        }
+        labels = {
+            'missing': ('+', 'create room for appointment'),
+            'inactive': ('~', 'reactivate room for appointment'),
+            'participants': ('~', 'add participants to room for appointment'),
+            'stale': ('-', 'deactivate room for cancelled appointment'),
+        }
+
+        totals = {}
+        for kind, queryset in drift.items():
+            field = 'id' if kind == 'missing' else 'appointment_id'
+            sign, label = labels[kind]
+            total = 0
+            for ids in chunked_ids(queryset, field, chunk_size):
+                total += len(ids)
+                if verbose or dry_run:
+                    for appointment_id in ids:
+                        self.stdout.write(f"{sign} {label} {appointment_id}")
+                if dry_run:
+                    continue
+                # One short transaction per chunk; the bulk inserts ignore
+                # conflicts, so racing the outbox processor is harmless.
+                with transaction.atomic():
+                    if kind == 'stale':
+                        deactivate_appointment_rooms(ids)
+                    else:
+                        provision_appointment_rooms(
+                            Appointment.objects.filter(id__in=ids, status='confirmed')
+                            .select_related('doctor', 'patient')
+                        )
+            totals[kind] = total
+
+        summary = (
+            f"{totals['missing']} missing, {totals['inactive']} inactive, "
+            f"{totals['participants']} missing participants, {totals['stale']} stale"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"\nDry run, nothing changed: {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Reconciled: {summary}"))
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2025-11-20 10:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _display_name(user):
+    try:
+        if user.role == 'doctor':
+            profile = user.doctor_profile
+            return f"Dr. {profile.first_name} {profile.last_name}"
+        if user.role == 'patient':
+            profile = user.patient_profile
+            return f"{profile.first_name} {profile.last_name}"
+    except Exception:
+        pass
+    return user.username
+
+
+def backfill_inbox(apps, schema_editor):
+    ChatRoom = apps.get_model('chat_room', 'ChatRoom')
+    Message = apps.get_model('chat_room', 'Message')
+    ChatInbox = apps.get_model('chat_room', 'ChatInbox')
+
+    rows = []
+    for room in ChatRoom.objects.prefetch_related('participants').iterator(chunk_size=500):
+        participants = list(room.participants.all())
+        last_message = Message.objects.filter(room=room).select_related('sender').order_by('-id').first()
+        for user in participants:
+            other = next((p for p in participants if p.id != user.id), None)
+            row = ChatInbox(
+                user=user,
+                room=room,
+                room_type=room.room_type,
+                other_participant=other,
+                other_participant_name=_display_name(other) if other else '',
+                unread_count=Message.objects.filter(room=room, is_read=False).exclude(sender=user).count(),
+            )
+            if last_message:
+                row.last_message_id = last_message.id
+                row.last_message_preview = last_message.content[:100]
+                row.last_message_sender = last_message.sender.username
+                row.last_message_at = last_message.timestamp
+            rows.append(row)
+
+        if len(rows) >= 1000:
+            ChatInbox.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+
+    if rows:
+        ChatInbox.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authapi', '0003_doctor_unique_doctor_phone_and_more'),
+        ('chat_room', '0003_chatroom_chat_room_c_updated_715450_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('patient_doctor', 'Patient-Doctor Chat'), ('doctor_doctor', 'Doctor-Doctor Chat')], max_length=20)),
+                ('other_participant_name', models.CharField(blank=True, default='', max_length=200)),
+                ('last_message_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_message_preview', models.CharField(blank=True, default='', max_length=100)),
+                ('last_message_sender', models.CharField(blank=True, default='', max_length=150)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('other_participant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='chat_room.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_inbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'room_type', '-last_message_at'], name='chat_room_c_user_id_1aee2b_idx'), models.Index(fields=['other_participant'], name='chat_room_c_other_p_2f1c2d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'room'), name='unique_chat_inbox_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
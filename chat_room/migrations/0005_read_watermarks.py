@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2025-11-21 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def backfill_watermarks(apps, schema_editor):
+    ChatInbox = apps.get_model('chat_room', 'ChatInbox')
+    Message = apps.get_model('chat_room', 'Message')
+
+    for entry in ChatInbox.objects.all().iterator(chunk_size=1000):
+        first_unread = Message.objects.filter(
+            room_id=entry.room_id, is_read=False
+        ).exclude(sender_id=entry.user_id).aggregate(first=Min('id'))['first']
+
+        if first_unread is not None:
+            watermark = first_unread - 1
+        else:
+            watermark = entry.last_message_id or 0
+
+        ChatInbox.objects.filter(pk=entry.pk).update(last_read_message_id=watermark)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_room', '0004_chatinbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatinbox',
+            name='last_read_message_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', 'id'], name='chat_room_m_room_id_2527e8_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2025-11-22 14:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The SQL is inlined so later changes to chat_room.search can't alter this migration.
+FTS_TABLE = 'chat_room_message_fts'
+
+POSTGRES_SEARCH_SQL = [
+    "CREATE INDEX IF NOT EXISTS chat_room_message_search_idx "
+    "ON chat_room_message USING GIN (search_vector)",
+    """
+    CREATE OR REPLACE FUNCTION chat_room_message_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('pg_catalog.english', coalesce(NEW.content, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS chat_room_message_search_trg ON chat_room_message",
+    "CREATE TRIGGER chat_room_message_search_trg "
+    "BEFORE INSERT OR UPDATE OF content ON chat_room_message "
+    "FOR EACH ROW EXECUTE FUNCTION chat_room_message_search_update()",
+    "UPDATE chat_room_message SET search_vector = "
+    "to_tsvector('pg_catalog.english', coalesce(content, '')) WHERE search_vector IS NULL",
+]
+
+SQLITE_SEARCH_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(content, content='chat_room_message', content_rowid='id')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_SEARCH_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        for sql in SQLITE_SEARCH_SQL:
+            schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP TRIGGER IF EXISTS chat_room_message_search_trg ON chat_room_message")
+        schema_editor.execute("DROP FUNCTION IF EXISTS chat_room_message_search_update()")
+        schema_editor.execute("DROP INDEX IF EXISTS chat_room_message_search_idx")
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_room', '0005_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
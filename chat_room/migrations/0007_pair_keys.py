@@ -0,0 +1,103 @@
+# Generated by Django 5.2.7 on 2025-11-22 10:15
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 1000
+
+
+def pair_key(user_a_id, user_b_id, room_type):
+    low, high = sorted((user_a_id, user_b_id))
+    return f"{low}:{high}:{room_type}"
+
+
+def backfill_pair_keys(apps, schema_editor):
+    ChatRoom = apps.get_model('chat_room', 'ChatRoom')
+    DoctorConnection = apps.get_model('chat_room', 'DoctorConnection')
+    Through = ChatRoom.participants.through
+
+    # Duplicate doctor-doctor rooms / mirrored connections keep the key on the
+    # oldest row only; the rest stay NULL so the unique indexes can be built.
+    seen = set()
+    last_id = 0
+    while True:
+        rooms = list(
+            ChatRoom.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'room_type')[:BATCH_SIZE]
+        )
+        if not rooms:
+            break
+        members = {}
+        for room_id, user_id in Through.objects.filter(chatroom_id__in=[r[0] for r in rooms]).values_list('chatroom_id', 'customuser_id'):
+            members.setdefault(room_id, []).append(user_id)
+
+        updates = []
+        for room_id, room_type in rooms:
+            user_ids = members.get(room_id, [])
+            if len(user_ids) != 2:
+                continue
+            key = pair_key(*user_ids, room_type)
+            if room_type == 'doctor_doctor':
+                if key in seen:
+                    continue
+                seen.add(key)
+            updates.append(ChatRoom(id=room_id, pair_key=key))
+        with transaction.atomic():
+            ChatRoom.objects.bulk_update(updates, ['pair_key'])
+        last_id = rooms[-1][0]
+
+    seen = set()
+    last_id = 0
+    while True:
+        connections = list(
+            DoctorConnection.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'from_doctor__user_id', 'to_doctor__user_id')[:BATCH_SIZE]
+        )
+        if not connections:
+            break
+        updates = []
+        for connection_id, from_user_id, to_user_id in connections:
+            key = pair_key(from_user_id, to_user_id, 'doctor_doctor')
+            if key in seen:
+                continue
+            seen.add(key)
+            updates.append(DoctorConnection(id=connection_id, pair_key=key))
+        with transaction.atomic():
+            DoctorConnection.objects.bulk_update(updates, ['pair_key'])
+        last_id = connections[-1][0]
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own instead of one long transaction.
+    atomic = False
+
+    dependencies = [
+        ('chat_room', '0006_message_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='pair_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorconnection',
+            name='pair_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='doctorconnection',
+            name='pair_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['pair_key'], name='chat_room_pair_key_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.UniqueConstraint(condition=models.Q(('room_type', 'doctor_doctor')), fields=('pair_key',), name='unique_doctor_room_pair'),
+        ),
+    ]
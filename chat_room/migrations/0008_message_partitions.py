@@ -0,0 +1,148 @@
+# Generated by Django 5.2.7 on 2025-11-23 11:20
+
+from datetime import date, datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Everything below is inlined so later changes to chat_room.partitions or
+# chat_room.search can't alter this migration.
+TABLE = 'chat_room_message'
+LEGACY_TABLE = 'chat_room_message_unpartitioned'
+MONTHS_AHEAD = 3
+
+POSTGRES_SEARCH_TRIGGER = [
+    """
+    CREATE OR REPLACE FUNCTION chat_room_message_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('pg_catalog.english', coalesce(NEW.content, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS chat_room_message_search_trg ON chat_room_message",
+    "CREATE TRIGGER chat_room_message_search_trg "
+    "BEFORE INSERT OR UPDATE OF content ON chat_room_message "
+    "FOR EACH ROW EXECUTE FUNCTION chat_room_message_search_update()",
+]
+
+FTS_TABLE = 'chat_room_message_fts'
+
+SQLITE_SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON chat_room_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partition_sql(month):
+    def bound(value):
+        return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+    return (
+        f"CREATE TABLE IF NOT EXISTS {TABLE}_p{month.year:04d}_{month.month:02d} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{bound(month)}') TO ('{bound(add_months(month, 1))}')"
+    )
+
+
+def partition_message_table(schema_editor):
+    """
+    Rebuild chat_room_message as a table range-partitioned by month on
+    ``timestamp``, copying existing rows and recreating its indexes and search
+    trigger on the parent. The primary key becomes (id, timestamp) because a
+    partitioned table's unique keys must include the partition key; ids still
+    come from a single identity sequence.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey'],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(timestamp) FROM {TABLE}")
+        oldest = cursor.fetchone()[0]
+
+    schema_editor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+    schema_editor.execute(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {LEGACY_TABLE}_pkey")
+
+    schema_editor.execute(
+        f"CREATE TABLE {TABLE} ("
+        f"LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY, "
+        f"PRIMARY KEY (id, timestamp)"
+        f") PARTITION BY RANGE (timestamp)"
+    )
+    for name, definition in foreign_keys:
+        schema_editor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+    now = timezone.now()
+    current = date(now.year, now.month, 1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    while month <= add_months(current, MONTHS_AHEAD):
+        schema_editor.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    # Catches rows outside the pre-created range; kept empty by ensure_partitions().
+    schema_editor.execute(f"CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    schema_editor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)"
+    )
+    schema_editor.execute(f"DROP TABLE {LEGACY_TABLE} CASCADE")
+
+    # Index definitions still name the original table, which is now the parent.
+    for _, definition in indexes:
+        schema_editor.execute(definition)
+    for sql in POSTGRES_SEARCH_TRIGGER:
+        schema_editor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        partition_message_table(schema_editor)
+    elif schema_editor.connection.vendor == 'sqlite':
+        # SQLite rebuilt the table for the AlterField above, dropping the FTS triggers.
+        for sql in SQLITE_SEARCH_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_room', '0007_pair_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='room',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='messages', to='chat_room.chatroom'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
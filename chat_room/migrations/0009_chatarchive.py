@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2025-11-24 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_room', '0008_message_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.BigIntegerField(db_index=True)),
+                ('room_type', models.CharField(choices=[('patient_doctor', 'Patient-Doctor Chat'), ('doctor_doctor', 'Doctor-Doctor Chat')], max_length=20)),
+                ('appointment_id', models.BigIntegerField(blank=True, null=True)),
+                ('participant_ids', models.JSONField(default=list)),
+                ('blob', models.CharField(max_length=255)),
+                ('codec', models.CharField(max_length=10)),
+                ('size_bytes', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('message_count', models.PositiveIntegerField()),
+                ('first_message_id', models.BigIntegerField()),
+                ('last_message_id', models.BigIntegerField()),
+                ('first_message_at', models.DateTimeField()),
+                ('last_message_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['room_id', 'first_message_id'],
+            },
+        ),
+    ]
@@ -1,9 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from Authapi.models import Doctor, Patient 
 from appointments.models import Appointment
 
 
+def make_pair_key(user_a_id, user_b_id, room_type):
+    """Order-independent key for the two participants of a room, e.g. ``12:40:doctor_doctor``."""
+    low, high = sorted((int(user_a_id), int(user_b_id)))
+    return f"{low}:{high}:{room_type}"
+
+
 class ChatRoom(models.Model):
     ROOM_TYPES = [
         ('patient_doctor', 'Patient-Doctor Chat'),
@@ -15,6 +22,10 @@ class ChatRoom(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    # make_pair_key() of the two participants. Unique for doctor-doctor rooms;
+    # a patient and doctor get one room per appointment, so only indexed.
+    pair_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
     participants = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
         related_name='chat_rooms'
@@ -36,6 +47,14 @@ class ChatRoom(models.Model):
         indexes = [
             models.Index(fields=['room_type', 'is_active']),
             models.Index(fields=['updated_at']),
+            models.Index(fields=['pair_key'], name='chat_room_pair_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['pair_key'],
+                condition=models.Q(room_type='doctor_doctor'),
+                name='unique_doctor_room_pair'
+            ),
         ]
 
     def __str__(self):
@@ -43,29 +62,120 @@ class ChatRoom(models.Model):
     
 
 class Message(models.Model):
+    # No database constraint or cascade: on PostgreSQL the table is partitioned
+    # by month (see chat_room.partitions). A room's messages are archived
+    # before the room is deleted (chat_room.signals), and expired months are
+    # archived and then dropped as whole partitions.
     room = models.ForeignKey(
         ChatRoom,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='messages'
     )
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
-    content = models.TextField()
+    content = models.TextField(blank=True)
+    attachment = models.ForeignKey(
+        'attachments.Attachment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='messages'
+    )
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
+    # Maintained by a database trigger on PostgreSQL (GIN indexed); SQLite uses an
+    # FTS5 shadow table instead. See chat_room.search.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['timestamp']
         indexes = [
             models.Index(fields=['room', 'timestamp']),
+            models.Index(fields=['room', 'id']),
         ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}"
 
 
+class ChatArchive(models.Model):
+    """
+    Manifest for one compressed JSONL segment of a closed room's messages,
+    kept in default storage after the rows leave chat_room_message. Room and
+    participants are copied rather than referenced so the record outlives
+    the room itself.
+    """
+    room_id = models.BigIntegerField(db_index=True)
+    room_type = models.CharField(max_length=20, choices=ChatRoom.ROOM_TYPES)
+    appointment_id = models.BigIntegerField(null=True, blank=True)
+    participant_ids = models.JSONField(default=list)
+
+    blob = models.CharField(max_length=255)
+    codec = models.CharField(max_length=10)
+    size_bytes = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    message_count = models.PositiveIntegerField()
+    first_message_id = models.BigIntegerField()
+    last_message_id = models.BigIntegerField()
+    first_message_at = models.DateTimeField()
+    last_message_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['room_id', 'first_message_id']
+
+    def __str__(self):
+        return f"Archive of room #{self.room_id} ({self.message_count} messages)"
+
+
+class ChatInbox(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='chat_inbox'
+    )
+    room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries'
+    )
+    room_type = models.CharField(max_length=20, choices=ChatRoom.ROOM_TYPES)
+
+    other_participant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    other_participant_name = models.CharField(max_length=200, blank=True, default='')
+
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=100, blank=True, default='')
+    last_message_sender = models.CharField(max_length=150, blank=True, default='')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'room'], name='unique_chat_inbox_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'room_type', '-last_message_at']),
+            models.Index(fields=['other_participant']),
+        ]
+
+    def __str__(self):
+        return f"Inbox of user {self.user_id} - Room #{self.room_id}"
+
+
 class DoctorConnection(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -98,6 +208,9 @@ class DoctorConnection(models.Model):
         related_name='doctor_connection'
     )
 
+    # Same key as the connection's chat room, so (A, B) and (B, A) collide.
+    pair_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -112,3 +225,10 @@ class DoctorConnection(models.Model):
             f"Dr. {self.from_doctor.get_full_name()} → "
             f"Dr. {self.to_doctor.get_full_name()} ({self.status})"
         )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.pair_key:
+            self.pair_key = make_pair_key(
+                self.from_doctor.user_id, self.to_doctor.user_id, 'doctor_doctor'
+            )
+        super().save(*args, **kwargs)
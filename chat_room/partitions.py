@@ -0,0 +1,151 @@
+import logging
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'chat_room_message'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def _create_partition_sql(month):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    )
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Monthly partitions as {month: name}, excluding the default partition."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partitions(months_ahead=None):
+    """Create partitions from the current month through ``months_ahead`` months out."""
+    if not is_partitioned():
+        return []
+    if months_ahead is None:
+        months_ahead = settings.MESSAGE_PARTITIONS_AHEAD
+
+    existing = list_partitions()
+    current = month_start(timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(_create_partition_sql(month))
+        except DatabaseError as e:
+            # Rows for this month already sit in the default partition
+            logger.error(f"Could not create message partition {partition_name(month)}: {e}")
+            continue
+        created.append(partition_name(month))
+
+    if created:
+        logger.info(f"Created message partitions: {', '.join(created)}")
+    return created
+
+
+def delete_messages(queryset, chunk_size=5000):
+    """Delete the messages in ``queryset`` in id-ordered chunks. Returns the count."""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        deleted += Message.objects.filter(id__in=ids).delete()[0]
+    return deleted
+
+
+def _is_empty(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {table})")
+        return cursor.fetchone()[0]
+
+
+def enforce_retention(months=None):
+    """
+    Move messages older than ``months`` whole months out of the hot table.
+    They are archived room by room first (chat_room.archive), open rooms
+    included, so history is kept for as long as the archives are. On a
+    partitioned table the expired months, now empty, are then dropped as
+    whole partitions; one still holding rows of a room that failed to
+    archive is kept until a later run succeeds.
+    """
+    from .archive import archive_expired_messages
+
+    if months is None:
+        months = settings.MESSAGE_RETENTION_MONTHS
+    cutoff_month = add_months(month_start(timezone.now()), -months)
+    cutoff = datetime(cutoff_month.year, cutoff_month.month, 1, tzinfo=dt_timezone.utc)
+
+    archived, failed = archive_expired_messages(cutoff)
+    if archived:
+        logger.info(f"Archived {archived} messages older than {cutoff_month}")
+
+    dropped = []
+    if is_partitioned():
+        for month, name in sorted(list_partitions().items()):
+            if add_months(month, 1) > cutoff_month:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                # Lock out writers so nothing lands between the check and the drop.
+                cursor.execute(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE")
+                if not _is_empty(name):
+                    logger.error(f"Message partition {name} still holds unarchived messages; not dropping it")
+                    continue
+                cursor.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+        if dropped:
+            logger.info(f"Dropped message partitions: {', '.join(dropped)}")
+    if failed:
+        logger.error(f"Expired messages of {failed} chat rooms could not be archived")
+    return dropped, archived
@@ -0,0 +1,88 @@
+import logging
+import time
+
+from django.conf import settings
+
+from medtrax.redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_TTL = settings.CHAT_PRESENCE_TTL
+TYPING_INTERVAL_MS = settings.CHAT_TYPING_INTERVAL_MS
+
+
+def _presence_key(user_id):
+    return f"presence:user:{user_id}"
+
+
+def _typing_key(room_id, user_id, is_typing):
+    return f"presence:typing:{room_id}:{user_id}:{int(bool(is_typing))}"
+
+
+# Each user key is a sorted set of live connections (channel names) scored by
+# their expiry time, so a user stays online while any socket on any node keeps
+# heartbeating, and a crashed node's sockets simply age out.
+
+async def heartbeat(user_id, connection_id):
+    """Refresh one connection. Returns True if the user just came online."""
+    now = time.time()
+    key = _presence_key(user_id)
+    async with get_async_redis().pipeline(transaction=True) as pipe:
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcard(key)
+        pipe.zadd(key, {connection_id: now + PRESENCE_TTL})
+        pipe.expire(key, PRESENCE_TTL)
+        _, live_before, _, _ = await pipe.execute()
+    return live_before == 0
+
+
+async def disconnect(user_id, connection_id):
+    """Drop one connection. Returns True if the user has no live connections left."""
+    now = time.time()
+    key = _presence_key(user_id)
+    async with get_async_redis().pipeline(transaction=True) as pipe:
+        pipe.zrem(key, connection_id)
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcard(key)
+        _, _, remaining = await pipe.execute()
+    return remaining == 0
+
+
+async def allow_typing(room_id, user_id, is_typing):
+    """At most one typing event per user, room and state per interval. Redis only."""
+    return bool(await get_async_redis().set(
+        _typing_key(room_id, user_id, is_typing), 1, nx=True, px=TYPING_INTERVAL_MS
+    ))
+
+
+def online_user_ids(user_ids):
+    """Batch lookup used when rendering the inbox: one pipelined round trip."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return set()
+
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.zcount(_presence_key(user_id), now, '+inf')
+        counts = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Presence lookup failed: {e}")
+        return set()
+
+    return {user_id for user_id, count in zip(user_ids, counts) if count}
+
+
+async def aonline_user_ids(user_ids):
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return set()
+
+    now = time.time()
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.zcount(_presence_key(user_id), now, '+inf')
+        counts = await pipe.execute()
+
+    return {user_id for user_id, count in zip(user_ids, counts) if count}
@@ -0,0 +1,87 @@
+import logging
+
+from .inbox import add_inbox_rows
+from .models import ChatRoom, make_pair_key
+
+logger = logging.getLogger(__name__)
+
+
+def provision_appointment_rooms(appointments):
+    """
+    Make sure every appointment in ``appointments`` has an active
+    patient-doctor room with both participants. Set-based: a fixed number of
+    queries however many appointments are passed, and safe to repeat.
+    Appointments need doctor and patient loaded (select_related).
+    """
+    appointments = {appointment.id: appointment for appointment in appointments}
+    if not appointments:
+        return {}
+
+    existing = {
+        appointment_id: (room_id, is_active)
+        for room_id, appointment_id, is_active in ChatRoom.objects
+        .filter(appointment_id__in=appointments)
+        .values_list('id', 'appointment_id', 'is_active')
+    }
+
+    inactive = [room_id for room_id, is_active in existing.values() if not is_active]
+    if inactive:
+        ChatRoom.objects.filter(id__in=inactive).update(is_active=True)
+
+    missing = [appointment_id for appointment_id in appointments if appointment_id not in existing]
+    if missing:
+        # ignore_conflicts: appointment is unique, so a concurrent provisioner just wins.
+        ChatRoom.objects.bulk_create(
+            [ChatRoom(
+                appointment_id=appointment_id,
+                room_type='patient_doctor',
+                is_active=True,
+                pair_key=make_pair_key(
+                    appointments[appointment_id].patient.user_id,
+                    appointments[appointment_id].doctor.user_id,
+                    'patient_doctor'
+                ),
+            ) for appointment_id in missing],
+            ignore_conflicts=True,
+        )
+        existing.update({
+            appointment_id: (room_id, True)
+            for room_id, appointment_id in ChatRoom.objects
+            .filter(appointment_id__in=missing)
+            .values_list('id', 'appointment_id')
+        })
+
+    rooms = {appointment_id: room_id for appointment_id, (room_id, _) in existing.items()}
+
+    Through = ChatRoom.participants.through
+    present = set(
+        Through.objects.filter(chatroom_id__in=rooms.values()).values_list('chatroom_id', 'customuser_id')
+    )
+    new_members = []
+    for appointment_id, room_id in rooms.items():
+        appointment = appointments[appointment_id]
+        for user_id in (appointment.patient.user_id, appointment.doctor.user_id):
+            if (room_id, user_id) not in present:
+                new_members.append(Through(chatroom_id=room_id, customuser_id=user_id))
+    if new_members:
+        # bulk_create skips m2m_changed, so the inbox rows are added explicitly.
+        Through.objects.bulk_create(new_members, ignore_conflicts=True)
+        add_inbox_rows({member.chatroom_id for member in new_members})
+
+    logger.info(
+        f"Provisioned chat rooms for {len(appointments)} appointment(s): "
+        f"{len(missing)} created, {len(inactive)} reactivated"
+    )
+    return rooms
+
+
+def provision_appointment_room(appointment):
+    room_id = provision_appointment_rooms([appointment])[appointment.id]
+    return ChatRoom.objects.get(id=room_id)
+
+
+def deactivate_appointment_rooms(appointment_ids):
+    updated = ChatRoom.objects.filter(appointment_id__in=list(appointment_ids), is_active=True).update(is_active=False)
+    if updated:
+        logger.info(f"Deactivated {updated} appointment chat room(s)")
+    return updated
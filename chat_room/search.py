@@ -0,0 +1,58 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Message
+
+SEARCH_CONFIG = 'english'
+# Both are also baked into the search triggers of migrations 0006, 0008 and 0010.
+FTS_TABLE = 'chat_room_message_fts'
+
+
+def _fts5_query(query):
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    # Quote every term so user input can't inject FTS5 syntax; prefix-match the last one.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_messages(user, query, room_id=None, before_id=None, limit=20):
+    """
+    Messages matching ``query`` in rooms ``user`` participates in, newest first.
+    Keyset paginated on id: pass the returned cursor back as ``before_id``.
+    """
+    messages = Message.objects.filter(room__participants=user)
+    if room_id is not None:
+        messages = messages.filter(room_id=room_id)
+    if before_id is not None:
+        messages = messages.filter(id__lt=before_id)
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        messages = messages.filter(
+            search_vector=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        )
+    elif vendor == 'sqlite':
+        fts_query = _fts5_query(query)
+        if fts_query is None:
+            return [], None
+        messages = messages.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts_query]
+        ))
+    else:
+        messages = messages.filter(content__icontains=query)
+
+    results = list(
+        messages.select_related('sender__doctor_profile', 'sender__patient_profile', 'attachment')
+        .order_by('-id')[:limit + 1]
+    )
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = results[-1].id
+    return results, next_cursor
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import ChatRoom, Message, DoctorConnection
+from .models import ChatRoom, Message, DoctorConnection, ChatInbox, make_pair_key
 from Authapi.models import Doctor, Patient
-from django.db import models
+from attachments.serializers import AttachmentSerializer
+from .inbox import count_unread, read_watermarks, is_read_by_others
+from django.db import IntegrityError, transaction
 User = get_user_model()
 
 class UserBasicSerializer(serializers.ModelSerializer):
@@ -44,14 +46,29 @@ class PatientMinimalSerializer(serializers.ModelSerializer):
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserBasicSerializer(read_only=True)
+    attachment = AttachmentSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = [
             "id", "room", "sender",
-            "content", "timestamp", "is_read"
+            "content", "attachment", "timestamp", "is_read"
         ]
-        read_only_fields = ["id", "timestamp", "is_read", "room"]
+        read_only_fields = ["id", "timestamp", "room"]
+
+    def get_is_read(self, obj):
+        watermarks = self.context.get("read_watermarks", {})
+        return is_read_by_others(obj.id, obj.sender_id, watermarks)
+
+
+class MessageSearchSerializer(serializers.ModelSerializer):
+    sender = UserBasicSerializer(read_only=True)
+    attachment = AttachmentSerializer(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ["id", "room", "sender", "content", "attachment", "timestamp"]
 
 
 class MessageCreateSerializer(serializers.ModelSerializer):
@@ -91,9 +108,10 @@ class ChatRoomListSerializer(serializers.ModelSerializer):
         if not request:
             return 0
 
-        return obj.messages.filter(
-            is_read=False
-        ).exclude(sender=request.user).count()
+        watermark = obj.inbox_entries.filter(
+            user=request.user
+        ).values_list("last_read_message_id", flat=True).first() or 0
+        return count_unread(obj.id, request.user.id, watermark)
 
     def get_other_participant(self, obj):
         request = self.context.get("request")
@@ -106,6 +124,62 @@ class ChatRoomListSerializer(serializers.ModelSerializer):
 
         return UserBasicSerializer(other).data
 
+class ChatInboxSerializer(serializers.ModelSerializer):
+    """Same shape as ChatRoomListSerializer, served from the denormalized inbox row."""
+    id = serializers.IntegerField(source="room_id")
+    name = serializers.CharField(source="room.name")
+    is_active = serializers.BooleanField(source="room.is_active")
+    participants = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    other_participant = serializers.SerializerMethodField()
+    created_at = serializers.DateTimeField(source="room.created_at")
+    updated_at = serializers.DateTimeField(source="room.updated_at")
+
+    class Meta:
+        model = ChatInbox
+        fields = [
+            "id", "room_type", "name", "is_active",
+            "participants", "last_message",
+            "unread_count", "other_participant",
+            "created_at", "updated_at"
+        ]
+
+    def get_last_message(self, obj):
+        if not obj.last_message_id:
+            return None
+
+        return {
+            "id": obj.last_message_id,
+            "content": obj.last_message_preview,
+            "timestamp": obj.last_message_at,
+            "sender": obj.last_message_sender
+        }
+
+    def get_other_participant(self, obj):
+        other = obj.other_participant
+        if not other:
+            return None
+
+        return {
+            "id": other.id,
+            "username": other.username,
+            "email": other.email,
+            "role": other.role,
+            "full_name": obj.other_participant_name,
+            "is_online": other.id in self.context.get("online_user_ids", ())
+        }
+
+    def get_participants(self, obj):
+        participants = []
+        viewer = self.context.get("viewer")
+        if viewer:
+            participants.append(viewer)
+        other = self.get_other_participant(obj)
+        if other:
+            participants.append(other)
+        return participants
+
+
 class ChatRoomDetailSerializer(serializers.ModelSerializer):
     participants = UserBasicSerializer(many=True, read_only=True)
     messages = serializers.SerializerMethodField()
@@ -119,8 +193,11 @@ class ChatRoomDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_messages(self, obj):
-        msgs = obj.messages.order_by("-timestamp")[:50]
-        return MessageSerializer(msgs, many=True).data
+        msgs = obj.messages.select_related(
+            "sender__doctor_profile", "sender__patient_profile", "attachment"
+        ).order_by("-timestamp")[:50]
+        context = {"read_watermarks": read_watermarks(obj.id)}
+        return MessageSerializer(msgs, many=True, context=context).data
 
     def get_appointment_info(self, obj):
         appt = obj.appointment
@@ -160,17 +237,21 @@ class DoctorConnectionSerializer(serializers.ModelSerializer):
         if from_doc.id == to_doc.id:
             raise serializers.ValidationError("Cannot connect to yourself")
         
-        if DoctorConnection.objects.filter(
-            models.Q(from_doctor=from_doc, to_doctor=to_doc) |
-            models.Q(from_doctor=to_doc, to_doctor=from_doc)
-        ).exists():
+        pair_key = make_pair_key(from_doc.user_id, to_doc.user_id, "doctor_doctor")
+        if DoctorConnection.objects.filter(pair_key=pair_key).exists():
             raise serializers.ValidationError("Connection already exists")
         
-        return DoctorConnection.objects.create(
-            from_doctor=from_doc,
-            to_doctor=to_doc,
-            status="pending"
-        )
+        try:
+            with transaction.atomic():
+                return DoctorConnection.objects.create(
+                    from_doctor=from_doc,
+                    to_doctor=to_doc,
+                    status="pending",
+                    pair_key=pair_key
+                )
+        except IntegrityError:
+            # Lost a race with the other doctor's request
+            raise serializers.ValidationError("Connection already exists")
 
 
 class DoctorConnectionListSerializer(serializers.ModelSerializer):
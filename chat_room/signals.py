@@ -1,60 +1,43 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete, m2m_changed
 from django.dispatch import receiver
-from appointments.models import Appointment
-from chat_room.models import ChatRoom
+from Authapi.models import Doctor, Patient
+from chat_room.models import ChatRoom, Message, ChatInbox
+from chat_room.inbox import record_message, sync_room_inbox, refresh_participant_name
+from chat_room.archive import archive_room
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(post_save, sender=Appointment)
-def manage_patient_doctor_chat(sender, instance, created, **kwargs):
-    """
-    Creates chat room when appointment is confirmed.
-    Deactivates chat room when appointment is cancelled.
-    """
-    logger.info(f"🔔 Signal fired: Appointment {instance.id}, Status: '{instance.status}', Created: {created}")
-    
-    # ✅ Create chat room when status is 'confirmed'
-    if instance.status == 'confirmed':
-        logger.info(f"✅ Status is 'confirmed', creating/checking chat room...")
-        
-        # Check if chat room already exists
-        existing_room = ChatRoom.objects.filter(appointment=instance).first()
-        
-        if existing_room:
-            if not existing_room.is_active:
-                existing_room.is_active = True
-                existing_room.save()
-                logger.info(f"♻️ Existing chat room reactivated: ID={existing_room.id}")
-            else:
-                logger.info(f"✅ Chat room already exists and is active: ID={existing_room.id}")
-            return
-        
-        # Create new chat room
-        try:
-            room = ChatRoom.objects.create(
-                appointment=instance,
-                room_type='patient_doctor',
-                is_active=True,
-            )
-            room.participants.add(instance.patient.user, instance.doctor.user)
-            logger.info(f"🆕 NEW chat room created: ID={room.id}")
-            logger.info(f"👥 Participants added: Patient={instance.patient.user.id}, Doctor={instance.doctor.user.id}")
-        except Exception as e:
-            logger.error(f"❌ Failed to create chat room: {e}")
-        
+@receiver(post_save, sender=Message)
+def update_inbox_on_message(sender, instance, created, **kwargs):
+    if created:
+        record_message(instance)
+
+
+@receiver(m2m_changed, sender=ChatRoom.participants.through)
+def sync_inbox_on_participants_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_room_inbox(instance)
+        return
+    if action == 'post_clear':
+        ChatInbox.objects.filter(user=instance).delete()
         return
-    
-    # ✅ Deactivate chat room when cancelled
-    elif instance.status == 'cancelled':
-        logger.info(f"🚫 Status is 'cancelled', deactivating chat room...")
-        try:
-            room = ChatRoom.objects.get(appointment=instance)
-            room.is_active = False
-            room.save()
-            logger.info(f"🔒 Chat room deactivated: ID={room.id}")
-        except ChatRoom.DoesNotExist:
-            logger.warning(f"⚠️ No chat room found for cancelled appointment {instance.id}")
-    else:
-        logger.info(f"ℹ️ Status is '{instance.status}', no chat action taken")
\ No newline at end of file
+    for room in ChatRoom.objects.filter(pk__in=pk_set):
+        sync_room_inbox(room)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def refresh_inbox_names(sender, instance, created, **kwargs):
+    if not created:
+        refresh_participant_name(instance.user)
+
+
+@receiver(pre_delete, sender=ChatRoom)
+def archive_room_before_delete(sender, instance, **kwargs):
+    # Messages don't cascade with the room (see Message.room), so move them
+    # to cold storage first. A failure aborts the delete rather than lose them.
+    archive_room(instance)
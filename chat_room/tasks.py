@@ -2,6 +2,7 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from celery import shared_task
 from .models import ChatRoom
+from .archive import archive_closed_rooms
 from django.utils.timezone import is_aware
 
 
@@ -51,7 +52,23 @@ def delete_old_chats():
             appt_datetime = timezone.make_aware(appt_datetime)
 
         if appt_datetime < cutoff:
+            # Archived by chat_room.signals before the row goes.
             room.delete()
             deleted_count += 1
 
     return f"Deleted {deleted_count} old chats"
+
+
+@shared_task
+def archive_closed_chats():
+    archived = archive_closed_rooms()
+    return f"Archived {archived} closed chats"
+
+
+@shared_task
+def maintain_message_partitions():
+    from .partitions import ensure_partitions, enforce_retention
+
+    created = ensure_partitions()
+    dropped, archived = enforce_retention()
+    return f"Created {len(created)} partitions, dropped {len(dropped)}, archived {archived} messages"
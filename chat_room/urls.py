@@ -3,6 +3,7 @@ from .views import (
     PatientChatViewSet,
     DoctorChatViewSet,
     ChatRoomViewSet,
+    PresenceViewSet,
 )
 
 urlpatterns = [
@@ -53,6 +54,18 @@ urlpatterns = [
         name='doctor-reject'
     ),
 
+    path(
+        'presence/',
+        PresenceViewSet.as_view({'get': 'list'}),
+        name='chat-presence'
+    ),
+
+    path(
+        'messages/search/',
+        ChatRoomViewSet.as_view({'get': 'search_messages'}),
+        name='chat-message-search'
+    ),
+
     path(
         'room/<int:pk>/',
         ChatRoomViewSet.as_view({'get': 'retrieve'}),
@@ -2,18 +2,27 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
 
-from .models import ChatRoom, Message, DoctorConnection
+from .models import ChatRoom, ChatArchive, Message, DoctorConnection, ChatInbox, make_pair_key
+from .inbox import mark_room_read
+from .presence import online_user_ids
+from . import archive, search
 from .serializers import (
-    ChatRoomListSerializer, ChatRoomDetailSerializer,
-    MessageSerializer, DoctorConnectionSerializer,
+    ChatInboxSerializer, UserBasicSerializer, ChatRoomDetailSerializer,
+    MessageSerializer, MessageSearchSerializer, DoctorConnectionSerializer,
     DoctorConnectionListSerializer, DoctorMinimalSerializer
 )
 from Authapi.models import Doctor
+from Authapi import search as doctor_search
+from attachments.models import Attachment
 from .throttles import (
     ChatListThrottle, ChatMessageThrottle,
     ChatConnectionThrottle, ChatSearchThrottle,
@@ -21,6 +30,39 @@ from .throttles import (
 )
 
 
+def broadcast_read_receipt(room_id, user_id, last_read_message_id):
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"chat_{room_id}",
+        {
+            "type": "read_receipt",
+            "stream": f"chat:{room_id}",
+            "user_id": user_id,
+            "last_read_message_id": last_read_message_id,
+        }
+    )
+
+
+def inbox_queryset(user, room_type):
+    return ChatInbox.objects.filter(
+        user=user,
+        room_type=room_type,
+        room__is_active=True,
+    ).select_related("room", "other_participant").order_by(
+        F("last_message_at").desc(nulls_last=True), "-room__updated_at"
+    )
+
+
+def inbox_context(request, entries):
+    return {
+        "request": request,
+        "viewer": UserBasicSerializer(request.user).data,
+        "online_user_ids": online_user_ids(
+            entry.other_participant_id for entry in entries if entry.other_participant_id
+        ),
+    }
+
+
 class PatientChatViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     throttle_classes = [ChatListThrottle]
@@ -33,21 +75,52 @@ class PatientChatViewSet(viewsets.ViewSet):
         if request.user.role != "patient":
             return Response({"error": "Only patients allowed"}, status=403)
 
-        # ✅ FIXED: Only fetch chat rooms that actually exist
-        chat_rooms = ChatRoom.objects.filter(
-            room_type="patient_doctor",
-            participants=request.user,
-            is_active=True,
-            appointment__isnull=False,  # Must have an appointment
-            appointment__status="confirmed"  # Appointment must be confirmed
-        ).select_related('appointment').prefetch_related("participants")
-
-        print(f"🔍 Patient {request.user.id} has {chat_rooms.count()} chat rooms")
-        
-        serializer = ChatRoomListSerializer(chat_rooms, many=True, context={"request": request})
+        inbox = inbox_queryset(request.user, "patient_doctor").filter(
+            room__appointment__status="confirmed"
+        )
+
+        inbox = list(inbox)
+        serializer = ChatInboxSerializer(inbox, many=True, context=inbox_context(request, inbox))
         return Response(serializer.data)
 
 
+class PresenceViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ChatListThrottle]
+
+    @swagger_auto_schema(
+        operation_summary="Batch presence lookup for chat contacts",
+        manual_parameters=[
+            openapi.Parameter(
+                "user_ids", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="Comma separated user ids (max 100)"
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Online users among the requested ids",
+                examples={"application/json": {"online_user_ids": [4, 9]}}
+            )
+        },
+        tags=["Chat"]
+    )
+    def list(self, request):
+        try:
+            user_ids = [
+                int(value) for value in request.query_params.get("user_ids", "").split(",") if value.strip()
+            ][:100]
+        except ValueError:
+            return Response({"error": "user_ids must be comma separated integers"}, status=400)
+
+        # Only contacts the requester shares a room with
+        contact_ids = ChatInbox.objects.filter(
+            user=request.user,
+            other_participant_id__in=user_ids
+        ).values_list("other_participant_id", flat=True)
+
+        return Response({"online_user_ids": sorted(online_user_ids(contact_ids))})
+
+
 class DoctorChatViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     throttle_classes = [ChatListThrottle]
@@ -60,18 +133,12 @@ class DoctorChatViewSet(viewsets.ViewSet):
         if request.user.role != "doctor":
             return Response({"error": "Only doctors allowed"}, status=403)
 
-        # ✅ FIXED: Only fetch chat rooms that actually exist
-        chat_rooms = ChatRoom.objects.filter(
-            room_type="patient_doctor",
-            participants=request.user,
-            is_active=True,
-            appointment__isnull=False,  # Must have an appointment
-            appointment__status="confirmed"  # Appointment must be confirmed
-        ).select_related('appointment').prefetch_related("participants")
-
-        print(f"🔍 Doctor {request.user.id} has {chat_rooms.count()} patient chat rooms")
+        inbox = inbox_queryset(request.user, "patient_doctor").filter(
+            room__appointment__status="confirmed"
+        )
 
-        serializer = ChatRoomListSerializer(chat_rooms, many=True, context={"request": request})
+        inbox = list(inbox)
+        serializer = ChatInboxSerializer(inbox, many=True, context=inbox_context(request, inbox))
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -82,13 +149,10 @@ class DoctorChatViewSet(viewsets.ViewSet):
         if request.user.role != "doctor":
             return Response({"error": "Only doctors allowed"}, status=403)
 
-        chat_rooms = ChatRoom.objects.filter(
-            room_type="doctor_doctor",
-            participants=request.user,
-            is_active=True
-        ).prefetch_related("participants")
+        inbox = inbox_queryset(request.user, "doctor_doctor")
 
-        serializer = ChatRoomListSerializer(chat_rooms, many=True, context={"request": request})
+        inbox = list(inbox)
+        serializer = ChatInboxSerializer(inbox, many=True, context=inbox_context(request, inbox))
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -137,7 +201,7 @@ class DoctorChatViewSet(viewsets.ViewSet):
             return Response({"error": "Only doctors allowed"}, status=403)
 
         connection = get_object_or_404(
-            DoctorConnection,
+            DoctorConnection.objects.select_related("from_doctor", "to_doctor"),
             pk=pk,
             to_doctor=request.user.doctor_profile,
             status="pending"
@@ -145,17 +209,37 @@ class DoctorChatViewSet(viewsets.ViewSet):
 
         connection.status = "accepted"
 
-        chat_room = ChatRoom.objects.create(
-            room_type="doctor_doctor",
-            is_active=True
-        )
-        chat_room.participants.add(
-            connection.from_doctor.user,
-            connection.to_doctor.user
-        )
-
-        connection.chat_room = chat_room
-        connection.save()
+        # Single unique-index probe; reuses the room if the pair already has one.
+        with transaction.atomic():
+            chat_room, created = ChatRoom.objects.get_or_create(
+                pair_key=make_pair_key(
+                    connection.from_doctor.user_id,
+                    connection.to_doctor.user_id,
+                    "doctor_doctor"
+                ),
+                room_type="doctor_doctor",
+                defaults={"is_active": True}
+            )
+            if created:
+                chat_room.participants.add(
+                    connection.from_doctor.user_id,
+                    connection.to_doctor.user_id
+                )
+            else:
+                if DoctorConnection.objects.filter(chat_room=chat_room).exclude(pk=connection.pk).exists():
+                    return Response({"error": "These doctors are already connected"}, status=409)
+                if not chat_room.is_active:
+                    chat_room.is_active = True
+                    chat_room.save(update_fields=["is_active", "updated_at"])
+
+            connection.chat_room = chat_room
+            try:
+                with transaction.atomic():
+                    connection.save()
+            except IntegrityError:
+                # Another connection for this pair took the room meanwhile.
+                transaction.set_rollback(True)
+                return Response({"error": "These doctors are already connected"}, status=409)
 
         return Response(DoctorConnectionSerializer(connection).data)
 
@@ -182,7 +266,10 @@ class DoctorChatViewSet(viewsets.ViewSet):
     @swagger_auto_schema(
         operation_summary="Search doctors",
         manual_parameters=[
-            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Search keyword")
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Search keyword"),
+            openapi.Parameter("city", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Only doctors in this city"),
+            openapi.Parameter("specialization", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Only doctors with this specialization"),
         ],
         tags=["Chat"]
     )
@@ -195,11 +282,12 @@ class DoctorChatViewSet(viewsets.ViewSet):
         if not q:
             return Response({"error": "Query param 'q' is required"}, status=400)
 
-        doctors = Doctor.objects.filter(
-            Q(first_name__icontains=q) |
-            Q(last_name__icontains=q) |
-            Q(specialization__icontains=q)
-        ).exclude(user=request.user).select_related("user")[:20]
+        doctors = doctor_search.search_doctors(
+            q,
+            queryset=Doctor.objects.exclude(user=request.user).select_related("user"),
+            city=request.query_params.get("city", "").strip(),
+            specialization=request.query_params.get("specialization", "").strip()
+        )
 
         return Response(DoctorMinimalSerializer(doctors, many=True).data)
 
@@ -207,8 +295,17 @@ class DoctorChatViewSet(viewsets.ViewSet):
 class ChatRoomViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
-    @swagger_auto_schema(tags=["Chat"])
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("archived", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                              description="Stream archived history as NDJSON (works for closed and deleted rooms)"),
+        ],
+        tags=["Chat"]
+    )
     def retrieve(self, request, pk):
+        if request.query_params.get("archived") in ("1", "true"):
+            return self.retrieve_archived(request, pk)
+
         try:
             chat_room = ChatRoom.objects.prefetch_related(
                 "participants"
@@ -232,6 +329,61 @@ class ChatRoomViewSet(viewsets.ViewSet):
         serializer = ChatRoomDetailSerializer(chat_room, context={"request": request})
         return Response(serializer.data)
 
+    def retrieve_archived(self, request, pk):
+        if not ChatArchive.objects.filter(room_id=pk).exists():
+            return Response({"error": "No archived history for this chat"}, status=404)
+        if not archive.user_can_read_archive(request.user.id, pk):
+            return Response({"error": "Not a participant"}, status=403)
+
+        return StreamingHttpResponse(
+            archive.iter_archived_messages(pk),
+            content_type="application/x-ndjson"
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Search messages across your chats",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Search text", required=True),
+            openapi.Parameter("room", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Limit to one room"),
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="next_cursor from the previous page"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Page size (max 50)"),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Matching messages, newest first",
+                examples={
+                    "application/json": {
+                        "results": [{"id": 812, "room": 14, "content": "Take the BP tablet after breakfast", "timestamp": "2025-11-02T09:14:00Z"}],
+                        "next_cursor": 812
+                    }
+                }
+            )
+        },
+        tags=["Chat"]
+    )
+    @action(detail=False, methods=["get"], throttle_classes=[ChatSearchThrottle])
+    def search_messages(self, request):
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response({"error": "Query param 'q' is required"}, status=400)
+
+        try:
+            room_id = request.query_params.get("room")
+            room_id = int(room_id) if room_id else None
+            cursor = request.query_params.get("cursor")
+            cursor = int(cursor) if cursor else None
+            limit = min(int(request.query_params.get("limit", 20)), 50)
+        except ValueError:
+            return Response({"error": "room, cursor and limit must be integers"}, status=400)
+
+        results, next_cursor = search.search_messages(
+            request.user, q, room_id=room_id, before_id=cursor, limit=max(limit, 1)
+        )
+        return Response({
+            "results": MessageSearchSerializer(results, many=True).data,
+            "next_cursor": next_cursor
+        })
+
     @swagger_auto_schema(tags=["Chat"])
     @action(detail=True, methods=["post"], throttle_classes=[ChatMessageThrottle])
     def send_message(self, request, pk):
@@ -244,13 +396,24 @@ class ChatRoomViewSet(viewsets.ViewSet):
             return Response({"error": "Chat inactive"}, status=403)
 
         content = request.data.get("content", "").strip()
-        if not content:
+        attachment = None
+        attachment_id = request.data.get("attachment_id")
+        if attachment_id is not None:
+            try:
+                attachment_id = int(attachment_id)
+            except (TypeError, ValueError):
+                return Response({"error": "attachment_id must be an integer"}, status=400)
+            attachment = Attachment.ready_for(request.user, "chat").filter(id=attachment_id).first()
+            if attachment is None:
+                return Response({"error": "Attachment not found or not uploaded"}, status=400)
+        if not content and attachment is None:
             return Response({"error": "Message content required"}, status=400)
 
         message = Message.objects.create(
             room=chat_room,
             sender=request.user,
-            content=content
+            content=content,
+            attachment=attachment
         )
 
         return Response(MessageSerializer(message).data, status=201)
@@ -263,9 +426,14 @@ class ChatRoomViewSet(viewsets.ViewSet):
         if not chat_room.participants.filter(id=request.user.id).exists():
             return Response({"error": "Not a participant"}, status=403)
 
-        Message.objects.filter(
-            room=chat_room,
-            is_read=False
-        ).exclude(sender=request.user).update(is_read=True)
+        up_to = request.data.get("message_id")
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response({"error": "message_id must be an integer"}, status=400)
+
+        watermark = mark_room_read(chat_room, request.user.id, up_to)
+        broadcast_read_receipt(chat_room.id, request.user.id, watermark)
 
-        return Response({"message": "Messages marked as read"})
\ No newline at end of file
+        return Response({"message": "Messages marked as read", "last_read_message_id": watermark})
\ No newline at end of file
@@ -79,7 +79,14 @@ class Post(models.Model):
 
 class PostImage(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='community/posts/%Y/%m/%d/')
+    image = models.ImageField(upload_to='community/posts/%Y/%m/%d/', blank=True)
+    attachment = models.ForeignKey(
+        'attachments.Attachment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='post_images'
+    )
     caption = models.CharField(max_length=200, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Post, Comment, Like, Category, PostImage
 from Authapi.models import CustomUser
+from attachments.models import Attachment
+from attachments.serializers import AttachmentSerializer
+from django.db import transaction
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for post categories"""
@@ -11,9 +14,11 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class PostImageSerializer(serializers.ModelSerializer):
     """Serializer for post images"""
+    attachment = AttachmentSerializer(read_only=True)
+
     class Meta:
         model = PostImage
-        fields = ['id', 'image', 'caption', 'uploaded_at']
+        fields = ['id', 'image', 'attachment', 'caption', 'uploaded_at']
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -173,6 +178,13 @@ class PostDetailSerializer(serializers.ModelSerializer):
 
 class PostCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new posts"""
+    attachment_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        write_only=True,
+        required=False,
+        help_text="IDs of confirmed 'post' attachments to add as post images"
+    )
+
     class Meta:
         model = Post
         fields = [
@@ -181,7 +193,8 @@ class PostCreateSerializer(serializers.ModelSerializer):
             'content',
             'excerpt',
             'featured_image',
-            'status'
+            'status',
+            'attachment_ids'
         ]
         extra_kwargs = {
             'title': {'help_text': 'Post title (max 200 characters)'},
@@ -192,6 +205,22 @@ class PostCreateSerializer(serializers.ModelSerializer):
             'status': {'help_text': 'Post status: draft, published, or archived'}
         }
 
+    def create(self, validated_data):
+        attachment_ids = validated_data.pop('attachment_ids', [])
+        attachments = list(
+            Attachment.ready_for(validated_data['author'], 'post').filter(id__in=attachment_ids)
+        )
+        if len(attachments) != len(set(attachment_ids)):
+            raise serializers.ValidationError({'attachment_ids': "Attachment not found or not uploaded"})
+
+        with transaction.atomic():
+            post = super().create(validated_data)
+            PostImage.objects.bulk_create([
+                PostImage(post=post, attachment=attachment)
+                for attachment in attachments
+            ])
+        return post
+
 
 class CommentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating comments"""
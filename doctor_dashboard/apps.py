@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DoctorDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctor_dashboard'
+
+    def ready(self):
+        import doctor_dashboard.signals
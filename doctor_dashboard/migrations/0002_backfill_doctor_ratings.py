@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2025-11-26 14:03
+
+from django.db import migrations
+
+from doctor_dashboard.ratings import reconcile
+
+
+def backfill(apps, schema_editor):
+    reconcile(apps.get_model('Authapi', 'Doctor'), apps.get_model('doctor_dashboard', 'DoctorReview'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authapi', '0006_doctor_rating_aggregates'),
+        ('doctor_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from Authapi.models import Doctor, Patient
 
 class DoctorReview(models.Model):
@@ -33,6 +33,23 @@ class DoctorReview(models.Model):
     def __str__(self):
         return f"{self.patient.get_full_name()} rated Dr. {self.doctor.get_full_name()} - {self.rating}★"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the doctor's rating aggregates currently count for this review.
+        if 'rating' in field_names and 'doctor_id' in field_names:
+            instance._counted = (instance.doctor_id, instance.rating)
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The aggregate update in doctor_dashboard.signals commits or rolls back with the review.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
 
 
     
\ No newline at end of file
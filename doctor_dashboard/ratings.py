@@ -0,0 +1,68 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+STARS = range(1, 6)
+FIELDS = ['rating_sum', 'rating_count', *(f'ratings_{stars}' for stars in STARS)]
+
+
+def adjust(doctor_model, doctor_id, rating, sign):
+    """Add (sign=1) or remove (sign=-1) one review's rating from a doctor's aggregates."""
+    doctor_model.objects.filter(id=doctor_id).update(**{
+        'rating_sum': F('rating_sum') + sign * rating,
+        'rating_count': F('rating_count') + sign,
+        f'ratings_{rating}': F(f'ratings_{rating}') + sign,
+    })
+
+
+def actual_aggregates(review_model, doctor_ids):
+    """{doctor_id: {field: value}} computed from the reviews themselves."""
+    rows = review_model.objects.filter(doctor_id__in=doctor_ids).values('doctor_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{f'ratings_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS}
+    )
+    empty = dict.fromkeys(FIELDS, 0)
+    actual = {doctor_id: dict(empty) for doctor_id in doctor_ids}
+    for row in rows:
+        actual[row.pop('doctor_id')] = row
+    return actual
+
+
+def reconcile(doctor_model, review_model, chunk_size=1000):
+    """
+    Recompute every doctor's rating aggregates from DoctorReview and fix the
+    ones that drifted (bulk updates, raw SQL, a crash between writes).
+    Each chunk locks its doctor rows first so a review saved meanwhile waits
+    and then applies its delta on top of the corrected values.
+    Returns the number of doctors fixed.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            doctors = list(
+                doctor_model.objects.filter(id__gt=last_id).order_by('id')
+                .select_for_update().only('id', *FIELDS)[:chunk_size]
+            )
+            if not doctors:
+                break
+            actual = actual_aggregates(review_model, [doctor.id for doctor in doctors])
+            drifted = []
+            for doctor in doctors:
+                values = actual[doctor.id]
+                if any(getattr(doctor, field) != values[field] for field in FIELDS):
+                    for field in FIELDS:
+                        setattr(doctor, field, values[field])
+                    drifted.append(doctor)
+            if drifted:
+                doctor_model.objects.bulk_update(drifted, FIELDS)
+            fixed += len(drifted)
+            last_id = doctors[-1].id
+
+    if fixed:
+        logger.warning(f"Reconciled rating aggregates of {fixed} doctors")
+    return fixed
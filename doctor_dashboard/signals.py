@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from Authapi.models import Doctor
+from appointments.directory import publish_directory_change
+from .models import DoctorReview
+from .ratings import adjust
+
+
+@receiver(post_save, sender=DoctorReview)
+def review_saved(sender, instance, created, **kwargs):
+    counted = getattr(instance, '_counted', None)
+    current = (instance.doctor_id, instance.rating)
+    if not created and counted == current:
+        return
+    if counted and not created:
+        adjust(Doctor, counted[0], counted[1], -1)
+        publish_directory_change(counted[0])
+    adjust(Doctor, instance.doctor_id, instance.rating, 1)
+    instance._counted = current
+    publish_directory_change(instance.doctor_id)
+
+
+@receiver(post_delete, sender=DoctorReview)
+def review_deleted(sender, instance, **kwargs):
+    doctor_id, rating = getattr(instance, '_counted', (instance.doctor_id, instance.rating))
+    adjust(Doctor, doctor_id, rating, -1)
+    publish_directory_change(doctor_id)
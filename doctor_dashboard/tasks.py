@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from Authapi.models import Doctor
+from .models import DoctorReview
+from .ratings import reconcile
+
+
+@shared_task
+def reconcile_doctor_ratings():
+    """Recompute doctors' stored rating aggregates from their reviews."""
+    fixed = reconcile(Doctor, DoctorReview)
+    return f"Reconciled ratings of {fixed} doctors"
@@ -1,3 +1,91 @@
 from django.test import TestCase
 
-# Create your tests here.
+from Authapi.models import Doctor
+from Authapi.testing import make_doctor, make_patient
+from .models import DoctorReview
+from .ratings import reconcile
+
+
+class DoctorRatingAggregateTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor('ann')
+        self.other_doctor = make_doctor('bob')
+        self.patients = [make_patient(f'patient{index}') for index in range(3)]
+
+    def review(self, patient, rating, doctor=None):
+        return DoctorReview.objects.create(
+            doctor=doctor or self.doctor, patient=patient, rating=rating, comment='ok'
+        )
+
+    def assertAggregates(self, doctor, rating_sum, histogram):
+        doctor = Doctor.objects.get(id=doctor.id)
+        self.assertEqual(doctor.rating_sum, rating_sum)
+        self.assertEqual(doctor.rating_count, sum(histogram))
+        self.assertEqual(doctor.rating_histogram, {str(stars): n for stars, n in enumerate(histogram, 1)})
+
+    def test_create(self):
+        self.review(self.patients[0], 5)
+        self.review(self.patients[1], 3)
+        self.assertAggregates(self.doctor, 8, [0, 0, 1, 0, 1])
+        self.assertEqual(Doctor.objects.get(id=self.doctor.id).average_rating, 4.0)
+
+    def test_no_reviews(self):
+        doctor = Doctor.objects.get(id=self.doctor.id)
+        self.assertIsNone(doctor.average_rating)
+        self.assertAggregates(self.doctor, 0, [0, 0, 0, 0, 0])
+
+    def test_rating_change_moves_bucket(self):
+        review = self.review(self.patients[0], 2)
+        review = DoctorReview.objects.get(id=review.id)
+        review.rating = 4
+        review.save()
+        self.assertAggregates(self.doctor, 4, [0, 0, 0, 1, 0])
+
+        # Saving the same instance again must not count the change twice.
+        review.save()
+        self.assertAggregates(self.doctor, 4, [0, 0, 0, 1, 0])
+
+    def test_unrelated_change_leaves_aggregates(self):
+        review = self.review(self.patients[0], 4)
+        review = DoctorReview.objects.get(id=review.id)
+        review.comment = 'Updated'
+        review.save()
+        self.assertAggregates(self.doctor, 4, [0, 0, 0, 1, 0])
+
+    def test_change_of_doctor_moves_review(self):
+        review = self.review(self.patients[0], 5)
+        review.doctor = self.other_doctor
+        review.rating = 1
+        review.save()
+        self.assertAggregates(self.doctor, 0, [0, 0, 0, 0, 0])
+        self.assertAggregates(self.other_doctor, 1, [1, 0, 0, 0, 0])
+
+    def test_delete(self):
+        first = self.review(self.patients[0], 5)
+        self.review(self.patients[1], 4)
+        first.delete()
+        self.assertAggregates(self.doctor, 4, [0, 0, 0, 1, 0])
+
+    def test_delete_of_edited_instance_uses_stored_rating(self):
+        review = DoctorReview.objects.get(id=self.review(self.patients[0], 5).id)
+        review.rating = 1  # edited in memory but never saved
+        review.delete()
+        self.assertAggregates(self.doctor, 0, [0, 0, 0, 0, 0])
+
+    def test_queryset_delete(self):
+        for index, patient in enumerate(self.patients):
+            self.review(patient, index + 3)
+        DoctorReview.objects.filter(rating__gte=4).delete()
+        self.assertAggregates(self.doctor, 3, [0, 0, 1, 0, 0])
+
+    def test_reconcile_fixes_drift(self):
+        self.review(self.patients[0], 5)
+        self.review(self.patients[1], 2, doctor=self.other_doctor)
+        Doctor.objects.filter(id=self.doctor.id).update(rating_sum=99, rating_count=7, ratings_1=3)
+        DoctorReview.objects.filter(doctor=self.other_doctor).update(rating=3)
+
+        self.assertEqual(reconcile(Doctor, DoctorReview, chunk_size=1), 2)
+        self.assertAggregates(self.doctor, 5, [0, 0, 0, 0, 1])
+        self.assertAggregates(self.other_doctor, 3, [0, 0, 1, 0, 0])
+        self.assertEqual(reconcile(Doctor, DoctorReview), 0)
@@ -3,11 +3,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.utils import timezone
-from django.db.models import Avg, Count
+from django.db.models import Count
 from datetime import timedelta
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from appointments.models import Appointment
+from Authapi.models import Doctor
 from .models import DoctorReview
 from .serializers import (
     DoctorDashboardProfileSerializer,
@@ -100,7 +101,8 @@ class DoctorDashboardStatsView(APIView):
                         "upcoming_appointments": 25,
                         "completed_appointments": 156,
                         "average_rating": 4.6,
-                        "total_reviews": 45
+                        "total_reviews": 45,
+                        "rating_histogram": {"1": 1, "2": 0, "3": 2, "4": 12, "5": 30}
                     }
                 }
             ),
@@ -153,15 +155,18 @@ class DoctorDashboardStatsView(APIView):
                 doctor=doctor,
                 status='completed'
             ).count()
-            reviews = DoctorReview.objects.filter(doctor=doctor)
-            avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+            # Read the counters fresh: request.user.doctor_profile may be a cached principal.
+            ratings = Doctor.objects.only(
+                'rating_sum', 'rating_count', 'ratings_1', 'ratings_2', 'ratings_3', 'ratings_4', 'ratings_5'
+            ).get(id=doctor.id)
             stats = {
                 'total_appointments_today': total_appointments_today,
                 'pending_appointments': pending_appointments,
                 'upcoming_appointments': upcoming_appointments,
                 'completed_appointments': completed_appointments,
-                'average_rating': round(avg_rating, 1),
-                'total_reviews': reviews.count()
+                'average_rating': ratings.average_rating or 0,
+                'total_reviews': ratings.rating_count,
+                'rating_histogram': ratings.rating_histogram
             }
             return Response(stats, status=status.HTTP_200_OK)
         except AttributeError:
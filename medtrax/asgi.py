@@ -12,10 +12,11 @@ from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
 
-from Authapi.models import CustomUser
+from Authapi.principal import get_principal, peek_principal
 import chat_room.routing
 import videocounselling.routing
 import appointments.routing
+import medtrax.multiplex
 
 
 class JWTAuthMiddleware:
@@ -40,7 +41,8 @@ class JWTAuthMiddleware:
         if token:
             try:
                 access_token = AccessToken(token)
-                user = await self.get_user(access_token["user_id"])
+                user_id = access_token["user_id"]
+                user = peek_principal(user_id) or await self.get_user(user_id)
                 scope["user"] = user
                 print(f"WebSocket authenticated user: {user.email if user.is_authenticated else 'Anonymous'}")
             except Exception as e:
@@ -54,23 +56,22 @@ class JWTAuthMiddleware:
 
     @database_sync_to_async
     def get_user(self, user_id):
-        try:
-            return CustomUser.objects.get(id=user_id)
-        except CustomUser.DoesNotExist:
-            return AnonymousUser()
+        return get_principal(user_id) or AnonymousUser()
 
 django_asgi_app = get_asgi_application()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": WebSocketRateLimitMiddleware(AllowedHostsOriginValidator(
+    "websocket": AllowedHostsOriginValidator(
         JWTAuthMiddleware(
-            URLRouter(
-                chat_room.routing.websocket_urlpatterns +
-                videocounselling.routing.websocket_urlpatterns +
-                appointments.routing.websocket_urlpatterns
+            WebSocketRateLimitMiddleware(
+                URLRouter(
+                    chat_room.routing.websocket_urlpatterns +
+                    videocounselling.routing.websocket_urlpatterns +
+                    appointments.routing.websocket_urlpatterns +
+                    medtrax.multiplex.websocket_urlpatterns
+                )
             )
         )
-    )
     ),
 })
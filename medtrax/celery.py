@@ -10,10 +10,45 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'appointments.tasks.auto_complete_appointments',
         'schedule': crontab(minute='*/5'),
     },
+    'process-appointment-events': {
+        'task': 'appointments.tasks.process_appointment_events',
+        'schedule': crontab(minute='*'),
+    },
+    'prune-expired-tokens': {
+        'task': 'Authapi.tasks.prune_expired_tokens',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'archive-closed-chats': {
+        'task': 'chat_room.tasks.archive_closed_chats',
+        'schedule': crontab(hour=1, minute=45),
+    },
+    'purge-stale-attachments': {
+        'task': 'attachments.tasks.purge_stale_attachments',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'maintain-message-partitions': {
+        'task': 'chat_room.tasks.maintain_message_partitions',
+        'schedule': crontab(hour=2, minute=15),
+    },
+    'rebuild-slot-availability': {
+        'task': 'appointments.tasks.rebuild_slot_availability',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'rank-doctors': {
+        'task': 'appointments.tasks.rank_doctors',
+        'schedule': crontab(minute='*/15'),
+    },
+    'reconcile-doctor-ratings': {
+        'task': 'doctor_dashboard.tasks.reconcile_doctor_ratings',
+        'schedule': crontab(hour=3, minute=45),
+    },
 }
 
 app = Celery('medtrax')
 app.config_from_object('django.conf:settings', namespace='CELERY')
+# Not a settings module, so config_from_object doesn't pick the schedule up;
+# the DatabaseScheduler syncs these entries into django_celery_beat on start.
+app.conf.beat_schedule = CELERY_BEAT_SCHEDULE
 app.autodiscover_tasks()
 
 @app.task(bind=True)
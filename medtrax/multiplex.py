@@ -0,0 +1,154 @@
+import logging
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.consumer import get_handler_name
+from django.conf import settings
+from django.urls import path
+
+from appointments.consumers import QueueConsumer
+from chat_room.consumers import ChatConsumer
+from medtrax.ws_protocol import ProtocolMixin
+from videocounselling.consumers import VideoCallConsumer
+
+logger = logging.getLogger(__name__)
+
+# stream prefix -> (consumer that already implements it, its url kwarg)
+STREAM_CONSUMERS = {
+    'chat': (ChatConsumer, 'room_id'),
+    'queue': (QueueConsumer, 'doctor_id'),
+    'video': (VideoCallConsumer, 'room_id'),
+}
+
+
+def parse_stream(stream):
+    try:
+        kind, object_id = stream.split(':', 1)
+        return kind, int(object_id)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+class MultiplexConsumer(ProtocolMixin, AsyncWebsocketConsumer):
+    """
+    One authenticated socket carrying many chat, queue and video streams.
+
+    Client frames:
+        {"action": "subscribe", "stream": "chat:12"}
+        {"action": "unsubscribe", "stream": "chat:12"}
+        {"stream": "chat:12", "payload": {...}}   # same payload the single-stream socket takes
+
+    Server frames:
+        {"stream": "chat:12", "action": "subscribed"}
+        {"stream": "chat:12", "action": "closed", "code": 4003}
+        {"stream": "chat:12", "payload": {...}}   # same payload the single-stream socket sends
+
+    Each stream is served by an instance of the existing consumer sharing this
+    connection's channel name, so authorization and event handling stay in one
+    place. Group events carry a "stream" key so they reach the right instance.
+    """
+    max_streams = settings.WS_MULTIPLEX_MAX_STREAMS
+
+    async def connect(self):
+        self.negotiate_protocol()
+        self.streams = {}
+        self.accepted_streams = set()
+
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        await self.accept(self.subprotocol)
+
+    async def disconnect(self, code):
+        for stream in list(getattr(self, 'streams', {})):
+            await self.drop_stream(stream, code)
+
+    async def dispatch(self, message):
+        if message['type'].startswith('websocket.'):
+            return await super().dispatch(message)
+
+        consumer = self.streams.get(message.get('stream'))
+        if consumer is None:
+            return
+        handler = getattr(consumer, get_handler_name(message), None)
+        if handler is None:
+            logger.warning(f"No handler for {message['type']} on stream {message.get('stream')}")
+            return
+        await handler(message)
+
+    async def receive_payload(self, data):
+        stream = data.get('stream')
+        action = data.get('action')
+
+        if action == 'subscribe':
+            await self.subscribe(stream)
+        elif action == 'unsubscribe':
+            if stream in self.streams:
+                await self.drop_stream(stream, 1000)
+                await self.send_payload({'stream': stream, 'action': 'unsubscribed'})
+        elif stream in self.accepted_streams and isinstance(data.get('payload'), dict):
+            await self.streams[stream].receive_payload(data['payload'])
+        else:
+            await self.send_payload({'stream': stream, 'error': 'Not subscribed'})
+
+    async def subscribe(self, stream):
+        if stream in self.streams:
+            await self.send_payload({'stream': stream, 'action': 'subscribed'})
+            return
+
+        kind, object_id = parse_stream(stream)
+        if kind not in STREAM_CONSUMERS:
+            await self.send_payload({'stream': stream, 'error': 'Unknown stream'})
+            return
+        if len(self.streams) >= self.max_streams:
+            await self.send_payload({'stream': stream, 'error': 'Too many streams'})
+            return
+
+        consumer_class, url_kwarg = STREAM_CONSUMERS[kind]
+        consumer = consumer_class()
+        consumer.scope = {
+            **self.scope,
+            'url_route': {'args': (), 'kwargs': {url_kwarg: object_id}},
+        }
+        consumer.channel_layer = self.channel_layer
+        consumer.channel_name = self.channel_name
+        consumer.codec = self.codec
+        consumer.base_send = self.stream_sender(stream)
+
+        async def send_payload(payload):
+            await self.send_payload({'stream': stream, 'payload': payload})
+        consumer.send_payload = send_payload
+
+        self.streams[stream] = consumer
+        await consumer.connect()
+
+    def stream_sender(self, stream):
+        async def base_send(message):
+            kind = message['type']
+            if kind == 'websocket.accept':
+                self.accepted_streams.add(stream)
+                await self.send_payload({'stream': stream, 'action': 'subscribed'})
+            elif kind == 'websocket.close':
+                code = message.get('code') or 1000
+                await self.drop_stream(stream, code)
+                await self.send_payload({'stream': stream, 'action': 'closed', 'code': code})
+            elif kind == 'websocket.send':
+                # Consumers send through send_payload; anything raw is passed on untouched.
+                await self.send(text_data=message.get('text'), bytes_data=message.get('bytes'))
+        return base_send
+
+    async def drop_stream(self, stream, code):
+        consumer = self.streams.pop(stream, None)
+        self.accepted_streams.discard(stream)
+        if consumer is None:
+            return
+        try:
+            await consumer.disconnect(code)
+        except Exception as e:
+            logger.warning(f"Error closing stream {stream}: {e}")
+
+
+websocket_urlpatterns = [
+    path("ws/stream/", MultiplexConsumer.as_asgi()),
+]
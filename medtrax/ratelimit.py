@@ -0,0 +1,89 @@
+import logging
+
+from django.conf import settings
+from redis.commands.core import AsyncScript
+
+from medtrax.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Checks every bucket in KEYS and only spends a token from all of them if all
+# of them have one, so a denied request never drains the other buckets.
+# ARGV: cost, then (capacity, refill per second) for each key.
+# Returns {allowed, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local levels = {}
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if tokens == nil or ts == nil then
+        tokens = capacity
+        ts = now
+    end
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+    if tokens < cost then
+        return {0, math.ceil((cost - tokens) * 1000 / rate)}
+    end
+    levels[i] = tokens
+end
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity * 1000 / rate) + 1000)
+end
+return {1, 0}
+"""
+
+# Built once; each call runs it on the calling loop's client. The script is
+# passed as bytes because there is no client yet to encode it with.
+_token_bucket = AsyncScript(None, TOKEN_BUCKET_LUA.encode())
+
+
+def client_ip(scope):
+    """The peer address, or X-Real-IP when the peer is our own nginx proxy."""
+    client = scope.get('client')
+    peer = client[0] if client else None
+    if peer in settings.WS_TRUSTED_PROXIES:
+        real_ip = dict(scope.get('headers') or []).get(b'x-real-ip')
+        if real_ip:
+            return real_ip.decode().strip()
+    return peer or 'unknown'
+
+
+def _buckets(scope, kind):
+    limits = settings.WS_RATE_LIMITS
+    buckets = [(f"ws_rl:{kind}:ip:{client_ip(scope)}", limits[f'{kind}_ip'])]
+    user = scope.get('user')
+    if user is not None and user.is_authenticated:
+        buckets.append((f"ws_rl:{kind}:user:{user.id}", limits[f'{kind}_user']))
+    return buckets
+
+
+async def consume(scope, kind, cost=1):
+    """
+    Take ``cost`` tokens from the per-IP and per-user buckets for ``kind``
+    ('connect' or 'message'). Returns (allowed, retry_after_ms).
+    Fails open if Redis is unavailable.
+    """
+    buckets = _buckets(scope, kind)
+    keys = [key for key, _ in buckets]
+    args = [cost]
+    for _, (capacity, refill_per_second) in buckets:
+        args.extend([capacity, refill_per_second])
+
+    try:
+        allowed, retry_after = await _token_bucket(keys=keys, args=args, client=get_async_redis())
+    except Exception as e:
+        logger.warning(f"WebSocket rate limiter unavailable, allowing {kind}: {e}")
+        return True, 0
+
+    return bool(allowed), int(retry_after)
@@ -0,0 +1,26 @@
+import asyncio
+import weakref
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django_redis import get_redis_connection
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_redis():
+    """Synchronous client sharing the connection pool of the default cache."""
+    return get_redis_connection('default')
+
+
+def get_async_redis():
+    """
+    Asyncio client for code running inside the event loop (consumers, ASGI middleware).
+    Connection pools cannot be shared between loops, so one client is kept per loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _async_clients[loop] = client
+    return client
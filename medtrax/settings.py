@@ -54,7 +54,8 @@ INSTALLED_APPS = [
     'doctor_dashboard',
     'community',
     'patient_dashboard',
-    'prescription'
+    'prescription',
+    'attachments'
 ]
 
 MIDDLEWARE = [
@@ -115,17 +116,39 @@ AWS_S3_FILE_OVERWRITE = False
 AWS_QUERYSTRING_AUTH = True
 AWS_S3_VERIFY = True
 
-DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+# Django 5.1+ only reads STORAGES. Media (and chat archives, attachments)
+# go to S3 when a bucket is configured; otherwise to MEDIA_ROOT, where
+# attachments are uploaded through the app (see attachments.storage).
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'storages.backends.s3boto3.S3Boto3Storage' if AWS_STORAGE_BUCKET_NAME
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    # What STATICFILES_STORAGE (also ignored since 5.1) effectively gave us.
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 
 AUTH_USER_MODEL = 'Authapi.CustomUser'
 AUTH_PASSWORD_VALIDATORS = []
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'Authapi.hashers.TunedArgon2PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
 ]
-ARGON2_PARAMETERS = {'time_cost': 2, 'memory_cost': 512, 'parallelism': 2}
+# Only parameters set in the environment (memory_cost in KiB) override
+# Django's Argon2PasswordHasher defaults. Tune with `manage.py benchmark_hashers`;
+# hashes made with other parameters are upgraded as users log in.
+ARGON2_PARAMETERS = {
+    name: config(f'ARGON2_{name.upper()}', cast=int)
+    for name in ('time_cost', 'memory_cost', 'parallelism')
+    if config(f'ARGON2_{name.upper()}', default='')
+}
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 2, cast=int)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -216,7 +239,6 @@ SESSION_COOKIE_NAME = "sessionid"
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -233,11 +255,12 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 REDIS_HOST = config('REDIS_HOST', default='redis')
 REDIS_PORT = config('REDIS_PORT', default=6379, cast=int)
 REDIS_PASSWORD = config('REDIS_PASSWORD', default=None)
+REDIS_URL = f'redis://{":" + REDIS_PASSWORD + "@" if REDIS_PASSWORD else ""}{REDIS_HOST}:{REDIS_PORT}/1'
 
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': f'redis://{":" + REDIS_PASSWORD + "@" if REDIS_PASSWORD else ""}{REDIS_HOST}:{REDIS_PORT}/1',
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
@@ -269,6 +292,53 @@ CHANNEL_LAYERS = {
     },
 }
 
+CHAT_PRESENCE_TTL = config('CHAT_PRESENCE_TTL', default=60, cast=int)
+CHAT_TYPING_INTERVAL_MS = config('CHAT_TYPING_INTERVAL_MS', default=2000, cast=int)
+WS_MULTIPLEX_MAX_STREAMS = config('WS_MULTIPLEX_MAX_STREAMS', default=64, cast=int)
+MESSAGE_RETENTION_MONTHS = config('MESSAGE_RETENTION_MONTHS', default=12, cast=int)
+MESSAGE_PARTITIONS_AHEAD = config('MESSAGE_PARTITIONS_AHEAD', default=3, cast=int)
+CHAT_ARCHIVE_AFTER_DAYS = config('CHAT_ARCHIVE_AFTER_DAYS', default=1, cast=int)
+CHAT_ARCHIVE_ZSTD_LEVEL = config('CHAT_ARCHIVE_ZSTD_LEVEL', default=10, cast=int)
+
+ATTACHMENT_MAX_BYTES = config('ATTACHMENT_MAX_BYTES', default=25 * 1024 * 1024, cast=int)
+ATTACHMENT_UPLOAD_TTL = config('ATTACHMENT_UPLOAD_TTL', default=900, cast=int)
+ATTACHMENT_DOWNLOAD_TTL = config('ATTACHMENT_DOWNLOAD_TTL', default=3600, cast=int)
+ATTACHMENT_CONTENT_TYPES = {
+    'chat': ['image/jpeg', 'image/png', 'image/webp', 'application/pdf'],
+    'post': ['image/jpeg', 'image/png', 'image/webp', 'image/gif'],
+}
+
+PRINCIPAL_CACHE_TTL = config('PRINCIPAL_CACHE_TTL', default=300, cast=int)
+PRINCIPAL_L1_TTL = config('PRINCIPAL_L1_TTL', default=5, cast=int)
+
+# pg_trgm word similarity a doctor search match needs (0-1)
+DOCTOR_SEARCH_SIMILARITY = config('DOCTOR_SEARCH_SIMILARITY', default=0.3, cast=float)
+DOCTOR_DIRECTORY_PAGE_SIZE = config('DOCTOR_DIRECTORY_PAGE_SIZE', default=20, cast=int)
+# Seconds before a worker rebuilds its directory snapshot even without a change notification
+DOCTOR_DIRECTORY_MAX_AGE = config('DOCTOR_DIRECTORY_MAX_AGE', default=600, cast=int)
+# Days ahead covered by the cross-doctor slot availability index
+AVAILABILITY_DAYS = config('AVAILABILITY_DAYS', default=14, cast=int)
+
+# Doctor recommendations: reviews assumed at the site mean before real ones
+# count, days of availability scored, and how long a ranking run stays readable
+RANKING_RATING_PRIOR = config('RANKING_RATING_PRIOR', default=5, cast=int)
+RANKING_AVAILABILITY_DAYS = config('RANKING_AVAILABILITY_DAYS', default=7, cast=int)
+RANKING_TTL = config('RANKING_TTL', default=2 * 24 * 3600, cast=int)
+
+# Seconds a patient's cached dashboard overview lives if no appointment change drops it first
+PATIENT_OVERVIEW_CACHE_TTL = config('PATIENT_OVERVIEW_CACHE_TTL', default=300, cast=int)
+
+# Peers whose X-Real-IP header is trusted: the nginx proxy in nginx-system.conf.
+WS_TRUSTED_PROXIES = config('WS_TRUSTED_PROXIES', default='127.0.0.1,::1').split(',')
+
+# (bucket capacity, refill per second)
+WS_RATE_LIMITS = {
+    'connect_user': (10, 10 / 60),
+    'connect_ip': (30, 30 / 60),
+    'message_user': (20, 5),
+    'message_ip': (60, 15),
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
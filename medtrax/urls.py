@@ -48,6 +48,7 @@ urlpatterns = [
     path('api/appointments/', include('appointments.urls')),
     path('video/', include('videocounselling.urls')),
     path('api/prescriptions/', include('prescription.urls')),
+    path('api/attachments/', include('attachments.urls')),
 
     re_path(
         r'^swagger(?P<format>\.json|\.yaml)$',
@@ -0,0 +1,158 @@
+import json
+import zlib
+from urllib.parse import parse_qs
+
+import msgpack
+
+from medtrax.ratelimit import consume
+
+# Short field codes used on MessagePack connections. Keys not listed here are
+# sent as-is, so new fields keep working before they get a code.
+FIELD_CODES = {
+    'type': 't',
+    'message': 'm',
+    'messages': 'ms',
+    'id': 'i',
+    'room': 'r',
+    'room_id': 'ri',
+    'user_id': 'u',
+    'sender_id': 'si',
+    'sender_username': 'su',
+    'sender_full_name': 'sn',
+    'sender_role': 'sr',
+    'content': 'c',
+    'timestamp': 'ts',
+    'is_read': 'rd',
+    'appointment_status': 'as',
+    'online_user_ids': 'on',
+    'last_read_message_id': 'lr',
+    'status': 's',
+    'is_typing': 'ty',
+    'error': 'e',
+    'role': 'ro',
+    'payload': 'p',
+    'stream': 'st',
+    'action': 'ac',
+    'code': 'cd',
+    'doctor_id': 'di',
+    'current_queue_count': 'qc',
+    'estimated_wait_time': 'ew',
+    'current_session': 'cs',
+    'retry_after_ms': 'ra',
+    'attachment': 'at',
+    'attachment_id': 'ai',
+}
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+# Fields holding server-built objects whose keys are coded too. Anything else
+# nested, such as relayed SDP offers and ICE candidates, is passed through
+# untouched so client keys that happen to equal a code survive the round trip.
+NESTED_FIELDS = {'payload', 'message', 'messages', 'attachment'}
+
+# Frames on MessagePack connections start with one flag byte.
+FRAME_PLAIN = b'\x00'
+FRAME_ZLIB = b'\x01'
+COMPRESS_THRESHOLD = 1024
+
+
+def _rename_keys(value, mapping):
+    if isinstance(value, list):
+        return [_rename_keys(item, mapping) for item in value]
+    if not isinstance(value, dict):
+        return value
+    renamed = {}
+    for key, item in value.items():
+        new_key = mapping.get(key, key)
+        if key in NESTED_FIELDS or new_key in NESTED_FIELDS:
+            item = _rename_keys(item, mapping)
+        renamed[new_key] = item
+    return renamed
+
+
+class JSONCodec:
+    name = 'json'
+    subprotocol = 'medtrax.json.v1'
+
+    def encode(self, payload):
+        return {'text_data': json.dumps(payload)}
+
+    def decode(self, text_data=None, bytes_data=None):
+        if text_data is None:
+            raise ValueError("Expected a text frame")
+        return json.loads(text_data)
+
+
+class MsgPackCodec:
+    name = 'msgpack'
+    subprotocol = 'medtrax.msgpack.v1'
+
+    def encode(self, payload):
+        packed = msgpack.packb(_rename_keys(payload, FIELD_CODES), use_bin_type=True)
+        if len(packed) >= COMPRESS_THRESHOLD:
+            return {'bytes_data': FRAME_ZLIB + zlib.compress(packed, 6)}
+        return {'bytes_data': FRAME_PLAIN + packed}
+
+    def decode(self, text_data=None, bytes_data=None):
+        if not bytes_data:
+            raise ValueError("Expected a binary frame")
+        flag, body = bytes_data[:1], bytes_data[1:]
+        if flag not in (FRAME_PLAIN, FRAME_ZLIB):
+            raise ValueError("Unknown frame flag")
+        try:
+            if flag == FRAME_ZLIB:
+                body = zlib.decompress(body)
+            data = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack frame: {e}")
+        return _rename_keys(data, FIELD_NAMES)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec(), MsgPackCodec())}
+SUBPROTOCOLS = {codec.subprotocol: codec for codec in CODECS.values()}
+
+
+class ProtocolMixin:
+    """
+    Opt-in wire protocol negotiation for websocket consumers.
+
+    Clients ask for MessagePack with the ``medtrax.msgpack.v1`` subprotocol (or
+    ``?protocol=msgpack`` where subprotocols can't be set); everyone else keeps
+    plain JSON text frames. Consumers call ``negotiate_protocol()`` before
+    accepting, send with ``send_payload()`` and handle decoded frames in
+    ``receive_payload()``.
+    """
+    codec = CODECS['json']
+    subprotocol = None
+
+    def negotiate_protocol(self):
+        for offered in self.scope.get('subprotocols') or []:
+            if offered in SUBPROTOCOLS:
+                self.codec = SUBPROTOCOLS[offered]
+                self.subprotocol = offered
+                return self.subprotocol
+
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        requested = params.get('protocol', [None])[0]
+        if requested in CODECS:
+            self.codec = CODECS[requested]
+        return self.subprotocol
+
+    async def send_payload(self, payload):
+        await self.send(**self.codec.encode(payload))
+
+    async def receive(self, text_data=None, bytes_data=None):
+        allowed, retry_after_ms = await consume(self.scope, 'message')
+        if not allowed:
+            await self.send_payload({"error": "rate_limited", "retry_after_ms": retry_after_ms})
+            return
+
+        try:
+            data = self.codec.decode(text_data, bytes_data)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await self.send_payload({"error": f"Invalid {self.codec.name.upper()}"})
+            return
+        await self.receive_payload(data)
+
+    async def receive_payload(self, data):
+        pass
@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from appointments.models import Appointment
+from .serializers import DashboardAppointmentSerializer
+
+# The patient home screen in one response. Stats come from one conditional
+# aggregate; upcoming and recent appointments from one query that numbers
+# each group's rows with a window function and keeps the first LIST_SIZE.
+#
+# Results are cached per patient and day under a version that is bumped as
+# soon as any write to one of the patient's appointments commits (see
+# Appointment.save and bulk_transition), so a reader racing a write can only
+# ever fill an abandoned key.
+
+LIST_SIZE = 4
+UPCOMING_STATUSES = ('pending', 'confirmed')
+UPCOMING = 'upcoming'
+RECENT = 'recent'
+
+
+def _version_key(patient_id):
+    return f"patient_overview:{patient_id}:ver"
+
+
+def _overview_key(patient_id, version, day):
+    return f"patient_overview:{patient_id}:v{version}:{day.isoformat()}"
+
+
+def _current_version(patient_id):
+    key = _version_key(patient_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _stats(patient, today):
+    return Appointment.objects.filter(patient=patient).aggregate(
+        total_appointments=Count('id'),
+        upcoming=Count('id', filter=Q(appointment_date__gte=today, status__in=UPCOMING_STATUSES)),
+        completed=Count('id', filter=Q(status='completed')),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+
+
+def _appointment_lists(patient, today):
+    group = Case(
+        When(appointment_date__gte=today, status__in=UPCOMING_STATUSES, then=Value(UPCOMING)),
+        When(appointment_date__lt=today, status='completed', then=Value(RECENT)),
+        output_field=CharField(),
+    )
+    # Inside each partition only its own pair of sort keys is non-null:
+    # upcoming runs soonest first, recent latest first.
+    position = Window(
+        RowNumber(),
+        partition_by=[F('group')],
+        order_by=[
+            Case(When(group=UPCOMING, then=F('appointment_date'))).asc(),
+            Case(When(group=UPCOMING, then=F('appointment_time'))).asc(),
+            Case(When(group=RECENT, then=F('appointment_date'))).desc(),
+            Case(When(group=RECENT, then=F('appointment_time'))).desc(),
+            F('id').asc(),
+        ],
+    )
+    appointments = (
+        Appointment.objects.filter(patient=patient)
+        .annotate(group=group)
+        .filter(group__isnull=False)
+        .annotate(position=position)
+        .filter(position__lte=LIST_SIZE)
+        .select_related('doctor')
+        .order_by('group', 'position')
+    )
+    lists = {UPCOMING: [], RECENT: []}
+    for appointment in appointments:
+        lists[appointment.group].append(appointment)
+    return {
+        group: DashboardAppointmentSerializer(rows, many=True).data
+        for group, rows in lists.items()
+    }
+
+
+def build_overview(patient, today):
+    lists = _appointment_lists(patient, today)
+    return {
+        'stats': _stats(patient, today),
+        'upcoming_appointments': lists[UPCOMING],
+        'recent_appointments': lists[RECENT],
+    }
+
+
+def get_overview(patient):
+    """Stats plus upcoming and recent appointments for ``patient``, cached."""
+    today = timezone.localdate()
+    try:
+        key = _overview_key(patient.id, _current_version(patient.id), today)
+        overview = cache.get(key)
+    except Exception:
+        key, overview = None, None
+
+    if overview is None:
+        overview = build_overview(patient, today)
+        if key is not None:
+            try:
+                cache.set(key, overview, settings.PATIENT_OVERVIEW_CACHE_TTL)
+            except Exception:
+                pass
+    return overview
+
+
+def _bump(patient_ids):
+    for patient_id in patient_ids:
+        try:
+            cache.incr(_version_key(patient_id))
+        except ValueError:
+            cache.set(_version_key(patient_id), int(time.time() * 1000), None)
+        except Exception:
+            pass
+
+
+def invalidate_overviews(patient_ids):
+    """Drop the cached overviews of ``patient_ids`` once the current transaction commits."""
+    patient_ids = list(patient_ids)
+    if patient_ids:
+        transaction.on_commit(lambda: _bump(patient_ids))
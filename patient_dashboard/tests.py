@@ -1,3 +1,137 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from Authapi.testing import make_doctor, make_patient
+from appointments.models import Appointment
+from appointments.services import bulk_transition
+from .overview import LIST_SIZE, _appointment_lists, _stats, get_overview, invalidate_overviews
+
+TODAY = date(2025, 11, 26)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PatientOverviewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.doctor = make_doctor('doctor', first_name='Ann', last_name='Lee')
+        self.patient = make_patient('patient')
+        self.other_patient = make_patient('other')
+
+    def book(self, days, hour, status, patient=None, minute=0):
+        return Appointment.objects.create(
+            doctor=self.doctor, patient=patient or self.patient,
+            appointment_date=TODAY + timedelta(days=days), appointment_time=time(hour, minute), status=status
+        )
+
+    def slots(self, rows):
+        return [(row['appointment_date'], row['appointment_time'][:5]) for row in rows]
+
+    def test_upcoming_soonest_first_and_recent_latest_first(self):
+        self.book(2, 10, 'confirmed')
+        self.book(1, 15, 'pending')
+        self.book(1, 9, 'confirmed')
+        self.book(0, 16, 'pending', minute=30)
+        self.book(-1, 9, 'completed')
+        self.book(-3, 15, 'completed')
+        self.book(-3, 11, 'completed')
+
+        lists = _appointment_lists(self.patient, TODAY)
+        self.assertEqual(self.slots(lists['upcoming']), [
+            ('2025-11-26', '16:30'), ('2025-11-27', '09:00'), ('2025-11-27', '15:00'), ('2025-11-28', '10:00'),
+        ])
+        self.assertEqual(self.slots(lists['recent']), [
+            ('2025-11-25', '09:00'), ('2025-11-23', '15:00'), ('2025-11-23', '11:00'),
+        ])
+        self.assertEqual(lists['upcoming'][0]['doctor_name'], 'Dr. Ann Lee')
+
+    def test_lists_are_capped_per_group(self):
+        for day in range(1, LIST_SIZE + 3):
+            self.book(day, 10, 'confirmed')
+            self.book(-day, 10, 'completed')
+
+        lists = _appointment_lists(self.patient, TODAY)
+        self.assertEqual(len(lists['upcoming']), LIST_SIZE)
+        self.assertEqual(len(lists['recent']), LIST_SIZE)
+        self.assertEqual(lists['upcoming'][0]['appointment_date'], '2025-11-27')
+        self.assertEqual(lists['recent'][0]['appointment_date'], '2025-11-25')
+
+    def test_lists_skip_other_statuses_and_patients(self):
+        self.book(1, 10, 'cancelled')
+        self.book(-1, 10, 'cancelled')
+        self.book(-1, 11, 'confirmed')
+        self.book(1, 12, 'completed')
+        self.book(1, 13, 'confirmed', patient=self.other_patient)
+        self.book(-1, 13, 'completed', patient=self.other_patient)
+
+        self.assertEqual(_appointment_lists(self.patient, TODAY), {'upcoming': [], 'recent': []})
+
+    def test_stats(self):
+        self.book(1, 10, 'pending')
+        self.book(2, 10, 'confirmed')
+        self.book(-1, 10, 'pending')
+        self.book(-2, 10, 'completed')
+        self.book(3, 10, 'cancelled')
+        self.book(1, 11, 'confirmed', patient=self.other_patient)
+
+        self.assertEqual(_stats(self.patient, TODAY), {
+            'total_appointments': 5, 'upcoming': 2, 'completed': 1, 'pending': 2,
+        })
+
+    def test_overview_is_cached_until_invalidated(self):
+        self.book(1, 10, 'confirmed')
+        self.assertEqual(get_overview(self.patient)['stats']['total_appointments'], 1)
+
+        Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient,
+            appointment_date=date.today() + timedelta(days=1), appointment_time=time(11), status='pending'
+        )
+        # Invalidation waits for the commit.
+        with self.assertNumQueries(0):
+            self.assertEqual(get_overview(self.patient)['stats']['total_appointments'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_overviews([self.patient.id])
+        self.assertEqual(get_overview(self.patient)['stats']['total_appointments'], 2)
+
+    @mock.patch('appointments.tasks.process_appointment_events.delay')
+    def test_appointment_writes_invalidate_on_commit(self, delay):
+        appointment = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient,
+            appointment_date=date.today() + timedelta(days=1), appointment_time=time(10), status='confirmed'
+        )
+        self.assertEqual(get_overview(self.patient)['upcoming_appointments'][0]['appointment_time'][:5], '10:00')
+
+        # An edit that leaves the status alone.
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.appointment_time = time(12)
+            appointment.save()
+        self.assertEqual(get_overview(self.patient)['upcoming_appointments'][0]['appointment_time'][:5], '12:00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Appointment.objects.filter(id=appointment.id), 'cancelled')
+        self.assertEqual(get_overview(self.patient)['upcoming_appointments'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(2, 9, 'pending').delete()
+        self.assertEqual(get_overview(self.patient)['stats']['total_appointments'], 1)
+
+    def test_view(self):
+        self.book(-1, 10, 'completed')
+        client = APIClient()
+        client.force_authenticate(self.patient.user)
+        with self.assertNumQueries(2):
+            response = client.get('/api/patient/dashboard/overview/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data), {'profile', 'stats', 'upcoming_appointments', 'recent_appointments'}
+        )
+        self.assertEqual(response.data['profile']['first_name'], 'patient')
+        self.assertEqual(response.data['stats']['completed'], 1)
+
+        client.force_authenticate(self.doctor.user)
+        self.assertEqual(client.get('/api/patient/dashboard/overview/').status_code, 403)
@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import PatientDashboardView,PatientUpcomingAppointmentsView, PatientRecentAppointmentsView,PatientDashboardStatsView,PatientCompleteProfileView
+from .views import PatientDashboardView,PatientUpcomingAppointmentsView, PatientRecentAppointmentsView,PatientDashboardStatsView,PatientCompleteProfileView,PatientDashboardOverviewView
 
 urlpatterns = [
     path('profile/', PatientDashboardView.as_view(), name='patient-dashboard-profile'),
     path('appointments/', PatientUpcomingAppointmentsView.as_view(), name='patient-upcoming-appointments'),
     path('appointments/recent/', PatientRecentAppointmentsView.as_view(), name='patient-recent-appointments'),
     path('stats/', PatientDashboardStatsView.as_view(), name='patient-dashboard-stats'),
+    path('overview/', PatientDashboardOverviewView.as_view(), name='patient-dashboard-overview'),
     path('profile/complete/', PatientCompleteProfileView.as_view(), name='patient-complete-profile'),
 ]
\ No newline at end of file
@@ -6,6 +6,7 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .serializers import PatientDashboardSerializer, DashboardAppointmentSerializer, PatientCompleteProfileSerializer
+from .overview import get_overview
 from django.utils import timezone
 from datetime import datetime, date
 
@@ -533,4 +534,100 @@ class PatientDashboardStatsView(APIView):
             return Response(
                 {"error": "Something went wrong", "detail": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+class PatientDashboardOverviewView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Everything the patient home screen needs in one call: profile, appointment stats, up to 4 upcoming (pending or confirmed) and up to 4 recent completed appointments. Appointment data is cached per patient and refreshed whenever one of their appointments changes",
+        operation_summary="Get Patient Dashboard Overview",
+        responses={
+            200: openapi.Response(
+                description="Overview retrieved successfully",
+                examples={
+                    "application/json": {
+                        "profile": {
+                            "first_name": "Asha",
+                            "last_name": "Verma",
+                            "date_of_birth": "1990-04-12",
+                            "blood_group": "O+",
+                            "known_allergies": "Penicillin",
+                            "chronic_diseases": None
+                        },
+                        "stats": {
+                            "total_appointments": 45,
+                            "upcoming": 3,
+                            "completed": 38,
+                            "pending": 4
+                        },
+                        "upcoming_appointments": [
+                            {
+                                "id": 412,
+                                "doctor_name": "Dr. Ann Lee",
+                                "appointment_date": "2025-12-02",
+                                "appointment_time": "10:30:00",
+                                "reason": "Follow-up",
+                                "status": "confirmed"
+                            }
+                        ],
+                        "recent_appointments": [
+                            {
+                                "id": 377,
+                                "doctor_name": "Dr. Bob Kay",
+                                "appointment_date": "2025-11-14",
+                                "appointment_time": "09:00:00",
+                                "reason": "Skin rash",
+                                "status": "completed"
+                            }
+                        ]
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied - User is not a patient",
+                examples={
+                    "application/json": {
+                        "error": "Only patients can access this endpoint"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Authentication required",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+            500: openapi.Response(
+                description="Server error",
+                examples={
+                    "application/json": {
+                        "error": "Something went wrong",
+                        "detail": "Error message"
+                    }
+                }
+            )
+        },
+        tags=['Patient Dashboard']
+    )
+    def get(self, request):
+        try:
+            patient = request.user.patient_profile
+            # The profile comes from the (already cached) principal; only appointment data is cached here.
+            data = {
+                'profile': PatientDashboardSerializer(patient).data,
+                **get_overview(patient),
+            }
+            return Response(data, status=status.HTTP_200_OK)
+        except AttributeError:
+            return Response(
+                {"error": "Only patients can access this endpoint"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        except Exception as e:
+            return Response(
+                {"error": "Something went wrong", "detail": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
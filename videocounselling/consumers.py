@@ -2,13 +2,14 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.utils import timezone
 from django.contrib.auth.models import AnonymousUser
-import json
 
 from chat_room.models import ChatRoom 
+from medtrax.ws_protocol import ProtocolMixin
 
 
-class VideoCallConsumer(AsyncWebsocketConsumer):
+class VideoCallConsumer(ProtocolMixin, AsyncWebsocketConsumer):
     async def connect(self):
+        self.negotiate_protocol()
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
         self.group = f"video_{self.room_id}"
         self.user = self.scope.get("user") or AnonymousUser()
@@ -29,7 +30,7 @@ class VideoCallConsumer(AsyncWebsocketConsumer):
             return
 
         await self.channel_layer.group_add(self.group, self.channel_name)
-        await self.accept()
+        await self.accept(self.subprotocol)
         await self.send_json({
             "type": "connected",
             "user_id": self.user.id,
@@ -40,16 +41,12 @@ class VideoCallConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, code):
         await self.channel_layer.group_discard(self.group, self.channel_name)
 
-    async def receive(self, text_data):
-        try:
-            data = json.loads(text_data)
-        except:
-            return
-
+    async def receive_payload(self, data):
         kind = data.get("type")
         if kind in ("offer", "answer", "ice-candidate", "end"):
             await self.channel_layer.group_send(self.group, {
                 "type": "signal.forward",
+                "stream": f"video:{self.room_id}",
                 "from_user_id": self.user.id,
                 "payload": data,
             })
@@ -60,7 +57,8 @@ class VideoCallConsumer(AsyncWebsocketConsumer):
         await self.send_json(event["payload"])
 
     async def send_json(self, payload):
-        await self.send(text_data=json.dumps(payload))
+        await self.send_payload(payload)
+
     @database_sync_to_async
     def _get_room_data(self, room_id, user_id):
         try: